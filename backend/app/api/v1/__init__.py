@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from . import properties, users, favorites, ai
+from . import properties, users, favorites, ai, metrics
 
 
 router = APIRouter(prefix="/api/v1")
@@ -11,6 +11,7 @@ router.include_router(properties.router, tags=["properties"])
 router.include_router(users.router, tags=["users"])
 router.include_router(favorites.router, tags=["favorites"])
 router.include_router(ai.router, tags=["ai"])
+router.include_router(metrics.router, tags=["metrics"])
 
 
 __all__ = ["router"]
@@ -1,9 +1,27 @@
 """Endpoints exposing the smart real estate assistant."""
 
-from fastapi import APIRouter, HTTPException
+import json
+from collections.abc import AsyncIterator
+from enum import Enum
+from typing import Any
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
-from ...services import query_smart_agent
+from ... import schemas
+from ...dependencies import async_db_session
+from ...services import (
+    AIOverloaded,
+    build_listing_query,
+    extract_property_filters,
+    parse_property_query,
+    query_smart_agent,
+    stream_smart_agent,
+)
 
 
 router = APIRouter(prefix="/ai")
@@ -13,6 +31,47 @@ class AgentQuery(BaseModel):
     prompt: str = Field(..., description="User natural language property query")
 
 
+class FilterSource(str, Enum):
+    RULES = "rules"
+    LLM = "llm"
+    KEYWORDS = "keywords"
+
+
+class AgentSearchResult(BaseModel):
+    filters: schemas.PropertyFilters
+    source: FilterSource = Field(..., description="How the filters were obtained from the prompt")
+    results: list[schemas.PropertyCard]
+
+
+class StreamFormat(str, Enum):
+    SSE = "sse"
+    NDJSON = "ndjson"
+
+
+STREAM_MEDIA_TYPES = {
+    StreamFormat.SSE: "text/event-stream",
+    StreamFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def format_event(stream_format: StreamFormat, event: str, data: dict[str, Any]) -> str:
+    """Serialize one stream event as an SSE message or an NDJSON line."""
+
+    if stream_format is StreamFormat.SSE:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+
+
+def overloaded_error(exc: AIOverloaded) -> HTTPException:
+    """Translate an admission rejection into a 429/503 with ``Retry-After``."""
+
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @router.post("/query")
 async def query_agent(body: AgentQuery) -> dict[str, str]:
     """Forward the prompt to the AI agent and return the response."""
@@ -20,5 +79,91 @@ async def query_agent(body: AgentQuery) -> dict[str, str]:
     if not body.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty")
 
-    result = await query_smart_agent(body.prompt)
+    try:
+        result = await query_smart_agent(body.prompt)
+    except AIOverloaded as exc:
+        raise overloaded_error(exc) from exc
     return {"response": result["response"], "model": result["model"]}
+
+
+@router.post("/search", response_model=AgentSearchResult)
+async def search_with_agent(
+    body: AgentQuery,
+    db: AsyncSession = Depends(async_db_session),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> AgentSearchResult:
+    """Turn a natural language request into listing filters and run the search.
+
+    Common phrasings are parsed by deterministic rules without calling the
+    model. Only prompts the rules cannot resolve are sent to Ollama in JSON
+    mode; if the model is unavailable or unusable, the prompt falls back to
+    a keyword search.
+    """
+
+    if not body.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    parsed = parse_property_query(body.prompt)
+    filters, source = parsed.filters, FilterSource.RULES
+    if not parsed.resolved:
+        try:
+            filters, source = await extract_property_filters(body.prompt), FilterSource.LLM
+        except (httpx.HTTPError, AIOverloaded, ValueError):
+            source = FilterSource.KEYWORDS
+
+    query = build_listing_query(filters, schemas.PropertyView.CARD, dialect=db.bind.dialect.name)
+    rows = (await db.scalars(query.limit(limit))).all()
+    return AgentSearchResult(
+        filters=filters,
+        source=source,
+        results=[schemas.PropertyCard.model_validate(row) for row in rows],
+    )
+
+
+@router.post("/query/stream")
+async def stream_agent(
+    body: AgentQuery,
+    stream_format: StreamFormat = Query(StreamFormat.SSE, alias="format"),
+) -> StreamingResponse:
+    """Relay the model's answer token by token as SSE or NDJSON.
+
+    The stream ends with a ``done`` event carrying the time to first token.
+    When the client disconnects, the response task is cancelled, which
+    closes the upstream request and stops the generation in Ollama.
+    """
+
+    if not body.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    events = stream_smart_agent(body.prompt)
+    # Wait for the first event so an unreachable model is reported as an
+    # HTTP error instead of a stream that ends immediately.
+    try:
+        first = await anext(events)
+    except StopAsyncIteration:
+        first = None
+    except AIOverloaded as exc:
+        await events.aclose()
+        raise overloaded_error(exc) from exc
+    except httpx.HTTPError as exc:
+        await events.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="AI model unavailable"
+        ) from exc
+
+    async def relay() -> AsyncIterator[str]:
+        if first is None:
+            return
+        yield format_event(stream_format, *first)
+        try:
+            async for event in events:
+                yield format_event(stream_format, *event)
+        except httpx.HTTPError:
+            yield format_event(stream_format, "error", {"detail": "AI model stream interrupted"})
+
+    return StreamingResponse(
+        relay(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(events.aclose),
+    )
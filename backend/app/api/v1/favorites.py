@@ -1,77 +1,148 @@
 """Favorites endpoints for user saved properties."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import Insert, delete, literal, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from ... import schemas
-from ...dependencies import db_session, get_current_user
+from ...dependencies import async_db_session, get_current_user
 from ...models import Favorite, Property, User
+from ...services import apply_cursor, next_cursor
 
 
 router = APIRouter(prefix="/favorites")
 
+# Favorites are serialized with their property and its images.
+FAVORITE_LOAD_OPTIONS = (selectinload(Favorite.property).selectinload(Property.images),)
+
+
+def insert_favorite(user_id: int, property_id: int, *, dialect: str) -> Insert:
+    """Return a statement adding a favorite if the property exists and it is not one yet.
+
+    The row is inserted from a select on the property, so a missing property
+    inserts nothing, and the unique ``(user_id, property_id)`` index turns a
+    duplicate into a no-op: the statement's row count is 1 only when a
+    favorite was created. MySQL uses ``INSERT IGNORE``: with the
+    ``CLIENT_FOUND_ROWS`` flag set by its drivers, ``ON DUPLICATE KEY UPDATE``
+    would count the duplicate row as matched.
+    """
+
+    source = select(literal(user_id), Property.id, literal(datetime.utcnow())).where(
+        Property.id == property_id
+    )
+    columns = [Favorite.user_id, Favorite.property_id, Favorite.created_at]
+    if dialect == "mysql":
+        return mysql.insert(Favorite).from_select(columns, source).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return sqlite.insert(Favorite).from_select(columns, source).on_conflict_do_nothing()
+    raise ValueError(f"Unsupported database dialect: {dialect}")
+
 
 @router.get("", response_model=list[schemas.FavoriteRead])
-def list_favorites(
+async def list_favorites(
     *,
-    db: Session = Depends(db_session),
+    response: Response,
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(
+        default=None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page",
+    ),
 ) -> list[Favorite]:
-    """Return the authenticated user's favorite properties."""
-
-    favorites = (
-        db.query(Favorite)
-        .filter(Favorite.user_id == current_user.id)
-        .order_by(Favorite.created_at.desc())
-        .all()
+    """Return a page of the authenticated user's favorite properties, newest first.
+
+    Properties and their images are loaded for the whole page with two
+    ``IN`` queries. Pass the ``X-Next-Cursor`` response header back as
+    ``cursor`` to get the next page.
+    """
+
+    query = (
+        select(Favorite)
+        .where(Favorite.user_id == current_user.id)
+        .order_by(Favorite.created_at.desc(), Favorite.id.desc())
+        .options(*FAVORITE_LOAD_OPTIONS)
     )
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, Favorite)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    favorites = (await db.scalars(query.limit(limit))).all()
+    cursor_out = next_cursor(favorites, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
     return favorites
 
 
+@router.post("/lookup", response_model=schemas.FavoriteLookupResult)
+async def lookup_favorites(
+    *,
+    lookup: schemas.FavoriteLookup,
+    db: AsyncSession = Depends(async_db_session),
+    current_user: User = Depends(get_current_user),
+) -> schemas.FavoriteLookupResult:
+    """Tell which of the given properties the user has saved, e.g. for a page of cards."""
+
+    if not lookup.property_ids:
+        return schemas.FavoriteLookupResult(favorited=[])
+    favorited = set(
+        await db.scalars(
+            select(Favorite.property_id).where(
+                Favorite.user_id == current_user.id,
+                Favorite.property_id.in_(lookup.property_ids),
+            )
+        )
+    )
+    return schemas.FavoriteLookupResult(
+        favorited=[property_id for property_id in dict.fromkeys(lookup.property_ids) if property_id in favorited]
+    )
+
+
 @router.post("/{property_id}", response_model=schemas.FavoriteRead, status_code=status.HTTP_201_CREATED)
-def add_favorite(
+async def add_favorite(
     *,
     property_id: int,
-    db: Session = Depends(db_session),
+    response: Response,
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
 ) -> Favorite:
-    """Create a favorite link between the user and a property."""
-
-    property_obj = db.get(Property, property_id)
-    if not property_obj:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+    """Save a property for the user; saving it again returns the existing favorite (200)."""
 
-    existing = (
-        db.query(Favorite)
-        .filter(Favorite.user_id == current_user.id, Favorite.property_id == property_id)
-        .first()
+    result = await db.execute(
+        insert_favorite(current_user.id, property_id, dialect=db.bind.dialect.name)
     )
-    if existing:
-        return existing
+    await db.commit()
 
-    favorite = Favorite(user_id=current_user.id, property_id=property_id)
-    db.add(favorite)
-    db.commit()
-    db.refresh(favorite)
+    favorite = await db.scalar(
+        select(Favorite)
+        .where(Favorite.user_id == current_user.id, Favorite.property_id == property_id)
+        .options(*FAVORITE_LOAD_OPTIONS)
+    )
+    if not favorite:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+    if not result.rowcount:
+        response.status_code = status.HTTP_200_OK
     return favorite
 
 
 @router.delete("/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_favorite(
+async def remove_favorite(
     *,
     property_id: int,
-    db: Session = Depends(db_session),
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
 ) -> None:
-    """Remove the property from favorites."""
+    """Remove the property from favorites; removing a property that is not saved is a no-op."""
 
-    favorite = (
-        db.query(Favorite)
-        .filter(Favorite.user_id == current_user.id, Favorite.property_id == property_id)
-        .first()
+    await db.execute(
+        delete(Favorite).where(
+            Favorite.user_id == current_user.id, Favorite.property_id == property_id
+        )
     )
-    if not favorite:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Favorite not found")
-
-    db.delete(favorite)
-    db.commit()
+    await db.commit()
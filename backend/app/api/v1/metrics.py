@@ -0,0 +1,29 @@
+"""Operational metrics of the API's internal caches and queues."""
+
+from fastapi import APIRouter
+
+from ...services import (
+    ai_admission,
+    listing_cache,
+    listing_snapshot,
+    prompt_cache,
+    stream_stats,
+    user_cache,
+)
+
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("")
+def read_metrics() -> dict[str, dict[str, int]]:
+    """Return usage counters of the in-process caches and AI streams."""
+
+    return {
+        "listing_cache": listing_cache.stats().as_dict(),
+        "listing_snapshot": listing_snapshot.stats().as_dict(),
+        "ai_admission": ai_admission.stats().as_dict(),
+        "ai_prompt_cache": prompt_cache.stats().as_dict(),
+        "ai_streams": stream_stats.stats().as_dict(),
+        "user_cache": user_cache.stats().as_dict(),
+    }
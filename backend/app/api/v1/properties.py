@@ -1,62 +1,291 @@
 """Property endpoints for the Togo Real Estate API."""
 
-from collections.abc import Sequence
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+import httpx
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from ... import schemas
-from ...dependencies import db_session, get_current_user
-from ...models import Property, PropertyImage, PropertyStatus, PropertyType, User
+from ...dependencies import async_db_session, get_current_user, property_filters
+from ...geo import BoundingBox
+from ...models import Property, PropertyImage, PropertyStatus, User
+from ...services import (
+    AIOverloaded,
+    FeatureRow,
+    ListingImporter,
+    apply_cursor,
+    build_listing_query,
+    cards_query,
+    clusters_in_box,
+    compute_facets,
+    decode_cursor,
+    export_listings,
+    feature_query,
+    gzip_chunks,
+    is_not_modified,
+    listing_cache,
+    listing_rows_query,
+    listing_schema,
+    listing_snapshot,
+    make_etag,
+    next_cursor,
+    property_snapshot,
+    property_version_query,
+    refresh_embeddings,
+    semantic_search,
+    similarity_index,
+    similarity_score,
+    snapshot_row,
+    supports_cursor,
+    validator_headers,
+)
 
 
 router = APIRouter(prefix="/properties")
 
+NOT_MODIFIED_RESPONSE = {304: {"description": "The client's cached copy is current"}}
+
+IMPORT_MEDIA_TYPES = {
+    "text/csv": schemas.ListingFormat.CSV,
+    "application/x-ndjson": schemas.ListingFormat.JSONL,
+    "application/jsonl": schemas.ListingFormat.JSONL,
+}
+EXPORT_MEDIA_TYPES = {
+    schemas.ListingFormat.CSV: ("text/csv; charset=utf-8", "csv"),
+    schemas.ListingFormat.JSONL: ("application/x-ndjson", "ndjson"),
+}
+
+
+def property_etag(
+    property_id: int, updated_at: datetime, image_count: int, last_image_id: int | None
+) -> str:
+    """Return the entity tag of a property version."""
 
-@router.get("", response_model=list[schemas.PropertyRead])
-def list_properties(
+    return make_etag("property", property_id, updated_at.isoformat(), image_count, last_image_id)
+
+
+@router.get(
+    "",
+    response_model=list[schemas.PropertyRead] | list[schemas.PropertyCard],
+    responses=NOT_MODIFIED_RESPONSE,
+)
+async def list_properties(
     *,
-    db: Session = Depends(db_session),
-    city: str | None = Query(default=None, description="Filter by city name"),
-    property_type: PropertyType | None = Query(default=None),
-    status: PropertyStatus | None = Query(default=None),
-    min_price: float | None = Query(default=None),
-    max_price: float | None = Query(default=None),
-    bedrooms: int | None = Query(default=None),
-    bathrooms: int | None = Query(default=None),
-    is_featured: bool | None = Query(default=None),
+    request: Request,
+    db: AsyncSession = Depends(async_db_session),
+    filters: schemas.PropertyFilters = Depends(property_filters),
+    view: schemas.PropertyView = Query(
+        default=schemas.PropertyView.FULL,
+        description="Use 'card' to skip heavy fields such as the description",
+    ),
+    sort: schemas.ListingSort = Query(
+        default=schemas.ListingSort.NEWEST,
+        description="'distance' orders results by distance to 'near'",
+    ),
     limit: int = Query(default=50, le=100),
     offset: int = Query(default=0, ge=0),
-) -> Sequence[Property]:
-    """Return a filtered list of properties."""
-
-    query = db.query(Property).order_by(Property.created_at.desc())
-
-    if city:
-        query = query.filter(Property.city.ilike(f"%{city}%"))
-    if property_type:
-        query = query.filter(Property.property_type == property_type)
-    if status:
-        query = query.filter(Property.status == status)
-    if min_price is not None:
-        query = query.filter(Property.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Property.price <= max_price)
-    if bedrooms is not None:
-        query = query.filter(Property.bedrooms >= bedrooms)
-    if bathrooms is not None:
-        query = query.filter(Property.bathrooms >= bathrooms)
-    if is_featured is not None:
-        query = query.filter(Property.is_featured.is_(is_featured))
-
-    return query.offset(offset).limit(limit).all()
+    cursor: str | None = Query(
+        default=None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page",
+    ),
+) -> Response:
+    """Return a filtered list of properties.
+
+    Pages can be walked with ``offset`` or, preferably, by passing back the
+    ``X-Next-Cursor`` response header as ``cursor``. Keyword searches (``q``)
+    and distance sorting use their own order and only support ``offset``.
+    Rendered pages are served from the listing cache when possible, and a
+    matching ``If-None-Match`` gets an empty 304 response. With the
+    ``snapshot`` listing engine, simple filters are evaluated in memory and
+    only the page's rows are read from the database.
+    """
+
+    if sort is schemas.ListingSort.DISTANCE and not filters.near:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sorting by distance requires the 'near' parameter",
+        )
+
+    cache_key = listing_cache.key(
+        filters, view=view, sort=sort, limit=limit, offset=offset, cursor=cursor
+    )
+    page = listing_cache.get(cache_key)
+    if page is not None:
+        return _listing_response(request, page.body, page.headers)
+
+    keyset = supports_cursor(filters, sort)
+    position = None
+    if cursor:
+        if offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or offset pagination, not both",
+            )
+        if not keyset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Keyword and distance searches use offset pagination",
+            )
+        try:
+            position = decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    if listing_snapshot.supports(filters, sort):
+        await listing_snapshot.refresh(db)
+        ids = listing_snapshot.search(filters, limit, offset=offset, after=position)
+        by_id = {row.id: row for row in await db.scalars(listing_rows_query(ids, view))} if ids else {}
+        rows = [by_id[property_id] for property_id in ids if property_id in by_id]
+    else:
+        query = build_listing_query(filters, view, dialect=db.bind.dialect.name, sort=sort)
+        query = apply_cursor(query, cursor) if cursor else query.offset(offset)
+        rows = (await db.scalars(query.limit(limit))).all()
+    headers = {}
+    cursor_out = next_cursor(rows, limit) if keyset else None
+    if cursor_out:
+        headers["X-Next-Cursor"] = cursor_out
+
+    schema = listing_schema(view)
+    body = TypeAdapter(list[schema]).dump_json([schema.model_validate(row) for row in rows])
+    headers.update(validator_headers(make_etag(body)))
+    page = listing_cache.put(cache_key, filters, body, headers)
+    return _listing_response(request, page.body, page.headers)
+
+
+def _listing_response(request: Request, body: bytes, headers: dict[str, str]) -> Response:
+    # Listings only honour If-None-Match: a deletion leaves no newer
+    # updated_at behind, so If-Modified-Since could validate a stale page.
+    if is_not_modified(request.headers, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/clusters", response_model=list[schemas.PropertyClusterRead])
+async def list_property_clusters(
+    *,
+    db: AsyncSession = Depends(async_db_session),
+    bbox: str = Query(description="Map viewport as 'min_lon,min_lat,max_lon,max_lat'"),
+    zoom: int = Query(ge=0, le=22, description="Web map zoom level"),
+) -> list[schemas.PropertyClusterRead]:
+    """Return pre-aggregated clusters of the geolocated properties in a viewport."""
+
+    try:
+        box = BoundingBox.parse(bbox)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    return [
+        schemas.PropertyClusterRead(
+            cell=cluster.cell,
+            count=cluster.listing_count,
+            latitude=cluster.latitude_sum / cluster.listing_count,
+            longitude=cluster.longitude_sum / cluster.listing_count,
+            min_price=cluster.min_price,
+            max_price=cluster.max_price,
+        )
+        for cluster in await db.scalars(clusters_in_box(box, zoom))
+    ]
+
+
+@router.get("/facets", response_model=schemas.PropertyFacets, responses=NOT_MODIFIED_RESPONSE)
+async def read_property_facets(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(async_db_session),
+    filters: schemas.PropertyFilters = Depends(property_filters),
+    buckets: int = Query(default=10, ge=1, le=50, description="Number of price histogram buckets"),
+) -> Response:
+    """Return facet counts and price statistics of the listings matching the filters.
+
+    Counts per city, type, status and bedrooms, a price histogram and the
+    min/median/max price are aggregated by the database. Results go through
+    the listing cache, so the unfiltered facets of the home page are only
+    recomputed after a write.
+    """
+
+    cache_key = listing_cache.key(filters, endpoint="facets", buckets=buckets)
+    page = listing_cache.get(cache_key)
+    if page is None:
+        facets = await compute_facets(db, filters, buckets)
+        body = facets.model_dump_json().encode()
+        page = listing_cache.put(cache_key, filters, body, validator_headers(make_etag(body)))
+    return _listing_response(request, page.body, page.headers)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_properties(
+    *,
+    filters: schemas.PropertyFilters = Depends(property_filters),
+    export_format: schemas.ListingFormat = Query(
+        default=schemas.ListingFormat.JSONL, alias="format", description="'jsonl' (NDJSON) or 'csv'"
+    ),
+    gzip: bool = Query(default=False, description="Compress the file with gzip"),
+) -> StreamingResponse:
+    """Stream every listing matching the filters, with its images, as a file.
+
+    Unlike the paged list, the export walks the matching rows once through a
+    server-side cursor, in id order, and sends each batch as soon as it is
+    encoded; the CSV layout is the one accepted by ``POST /import``.
+    """
+
+    media_type, extension = EXPORT_MEDIA_TYPES[export_format]
+    chunks = export_listings(filters, export_format)
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        media_type, extension = "application/gzip", f"{extension}.gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="properties.{extension}"'},
+    )
+
+
+@router.get("/semantic", response_model=list[schemas.ScoredPropertyCard])
+async def search_properties_semantically(
+    *,
+    db: AsyncSession = Depends(async_db_session),
+    filters: schemas.PropertyFilters = Depends(property_filters),
+    query: str = Query(min_length=1, description="Free-text description of the wanted property"),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> list[schemas.ScoredPropertyCard]:
+    """Return the listings closest in meaning to ``query``, best match first.
+
+    Listings are ranked by cosine similarity between their embedded title and
+    description and the embedded query; the usual listing filters restrict
+    the candidates.
+    """
+
+    try:
+        hits = await semantic_search(db, query, filters, limit)
+    except AIOverloaded as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail,
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except httpx.HTTPError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="Embedding model unavailable"
+        ) from exc
+
+    return [
+        schemas.ScoredPropertyCard(
+            **schemas.PropertyCard.model_validate(property_obj).model_dump(), score=score
+        )
+        for property_obj, score in hits
+    ]
 
 
 @router.post("", response_model=schemas.PropertyRead, status_code=status.HTTP_201_CREATED)
-def create_property(
+async def create_property(
     *,
     property_in: schemas.PropertyCreate,
-    db: Session = Depends(db_session),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
 ) -> Property:
     """Create a new property listing."""
@@ -66,47 +295,153 @@ def create_property(
         owner_id=current_user.id,
     )
 
-    if property_in.images:
-        property_obj.images = [
-            PropertyImage(**image.model_dump()) for image in property_in.images
-        ]
+    property_obj.images = [
+        PropertyImage(**image.model_dump()) for image in property_in.images or []
+    ]
 
     db.add(property_obj)
-    db.commit()
-    db.refresh(property_obj)
+    await db.commit()
+    listing_cache.invalidate_property(None, property_snapshot(property_obj))
+    background_tasks.add_task(refresh_embeddings, [property_obj.id])
+    if similarity_index.loaded:
+        similarity_index.upsert(FeatureRow.from_property(property_obj))
+    if listing_snapshot.loaded:
+        listing_snapshot.upsert(snapshot_row(property_obj))
     return property_obj
 
 
-@router.get("/{property_id}", response_model=schemas.PropertyRead)
-def get_property(
+@router.post("/import", response_model=schemas.ImportReport)
+async def import_properties(
+    *,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(async_db_session),
+    current_user: User = Depends(get_current_user),
+    import_format: schemas.ListingFormat | None = Query(
+        default=None,
+        alias="format",
+        description="Format of the request body; taken from its Content-Type by default",
+    ),
+) -> schemas.ImportReport:
+    """Create many listings, owned by the caller, from a CSV or JSON Lines body.
+
+    The body is read as it is uploaded and written in batches of
+    ``BULK_IMPORT_BATCH_SIZE`` listings, each committed on its own. Invalid
+    rows are skipped and reported with their line number.
+    """
+
+    if import_format is None:
+        media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        import_format = IMPORT_MEDIA_TYPES.get(media_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or set the format parameter",
+        )
+
+    importer = ListingImporter(db, current_user.id, import_format)
+    report = await importer.run(request.stream())
+    if importer.property_ids:
+        background_tasks.add_task(refresh_embeddings, importer.property_ids)
+    return report
+
+
+@router.get(
+    "/{property_id}", response_model=schemas.PropertyRead, responses=NOT_MODIFIED_RESPONSE
+)
+async def get_property(
     *,
     property_id: int,
-    db: Session = Depends(db_session),
-) -> Property:
-    """Retrieve a single property by its identifier."""
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(async_db_session),
+) -> Property | Response:
+    """Retrieve a single property by its identifier.
+
+    Conditional requests are answered from a version lookup alone: when the
+    client's ``If-None-Match``/``If-Modified-Since`` is still current, a 304 is
+    returned without loading the row.
+    """
+
+    version = (await db.execute(property_version_query(property_id))).first()
+    if not version:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
 
-    property_obj = db.get(Property, property_id)
+    etag = property_etag(property_id, *version)
+    if is_not_modified(request.headers, etag, version.updated_at):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=validator_headers(etag, version.updated_at),
+        )
+
+    property_obj = await db.get(Property, property_id, options=[selectinload(Property.images)])
     if not property_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+    etag = property_etag(
+        property_id,
+        property_obj.updated_at,
+        len(property_obj.images),
+        max((image.id for image in property_obj.images), default=None),
+    )
+    response.headers.update(validator_headers(etag, property_obj.updated_at))
     return property_obj
 
 
+@router.get("/{property_id}/similar", response_model=list[schemas.ScoredPropertyCard])
+async def list_similar_properties(
+    *,
+    property_id: int,
+    db: AsyncSession = Depends(async_db_session),
+    limit: int = Query(default=6, ge=1, le=50),
+    include_unavailable: bool = Query(
+        default=False, description="Also suggest pending, sold or rented listings"
+    ),
+) -> list[schemas.ScoredPropertyCard]:
+    """Return the listings closest to a property in price, size, location, type and city."""
+
+    await similarity_index.ensure_loaded(db)
+    if property_id not in similarity_index:
+        # Listings written by another worker are picked up when first asked for.
+        features = (await db.execute(feature_query([property_id]))).first()
+        if not features:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
+        similarity_index.upsert(FeatureRow.from_values(*features))
+
+    statuses = None if include_unavailable else {PropertyStatus.AVAILABLE}
+    neighbours = similarity_index.nearest(property_id, limit, statuses)
+    if not neighbours:
+        return []
+
+    rows = await db.scalars(cards_query([neighbour_id for neighbour_id, _ in neighbours]))
+    by_id = {row.id: row for row in rows}
+    return [
+        schemas.ScoredPropertyCard(
+            **schemas.PropertyCard.model_validate(by_id[neighbour_id]).model_dump(),
+            score=similarity_score(distance),
+        )
+        for neighbour_id, distance in neighbours
+        if neighbour_id in by_id
+    ]
+
+
 @router.put("/{property_id}", response_model=schemas.PropertyRead)
-def update_property(
+async def update_property(
     *,
     property_id: int,
     property_in: schemas.PropertyUpdate,
-    db: Session = Depends(db_session),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
 ) -> Property:
     """Update an existing property."""
 
-    property_obj = db.get(Property, property_id)
+    property_obj = await db.get(Property, property_id, options=[selectinload(Property.images)])
     if not property_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
     if property_obj.owner_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to modify this property")
 
+    before = property_snapshot(property_obj)
     for field, value in property_in.model_dump(
         exclude_unset=True, exclude={"images"}
     ).items():
@@ -116,27 +451,45 @@ def update_property(
         property_obj.images.clear()
         for image in property_in.images:
             property_obj.images.append(PropertyImage(**image.model_dump()))
+        # Image changes alone would not touch the row, yet they change its ETag.
+        property_obj.updated_at = datetime.utcnow()
 
     db.add(property_obj)
-    db.commit()
-    db.refresh(property_obj)
+    await db.commit()
+    listing_cache.invalidate_property(before, property_snapshot(property_obj))
+    if {"title", "description"} & property_in.model_fields_set:
+        background_tasks.add_task(refresh_embeddings, [property_id])
+    if similarity_index.loaded:
+        similarity_index.upsert(FeatureRow.from_property(property_obj))
+    if listing_snapshot.loaded:
+        listing_snapshot.upsert(snapshot_row(property_obj))
     return property_obj
 
 
 @router.delete("/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_property(
+async def delete_property(
     *,
     property_id: int,
-    db: Session = Depends(db_session),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(async_db_session),
     current_user: User = Depends(get_current_user),
 ) -> None:
     """Remove a property listing."""
 
-    property_obj = db.get(Property, property_id)
+    property_obj = await db.get(
+        Property,
+        property_id,
+        options=[selectinload(Property.images), selectinload(Property.favorites)],
+    )
     if not property_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Property not found")
     if property_obj.owner_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this property")
 
-    db.delete(property_obj)
-    db.commit()
+    before = property_snapshot(property_obj)
+    await db.delete(property_obj)
+    await db.commit()
+    listing_cache.invalidate_property(before, None)
+    background_tasks.add_task(refresh_embeddings, [property_id])
+    similarity_index.remove(property_id)
+    listing_snapshot.remove(property_id)
@@ -1,22 +1,45 @@
 """User management endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ... import schemas
-from ...dependencies import db_session
+from ...config import get_settings
+from ...database import AsyncSessionLocal
+from ...dependencies import async_db_session, get_token_user
 from ...models import User
-from ...security import get_password_hash, verify_password
+from ...security import create_access_token, password_hasher
+from ...services import apply_cursor, next_cursor, user_cache
 
 
 router = APIRouter(prefix="/users")
+settings = get_settings()
+
+# Columns of UserRead; the export reads plain rows instead of ORM objects.
+USER_READ_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.phone_number,
+    User.is_active,
+    User.is_superuser,
+    User.created_at,
+    User.updated_at,
+)
+EXPORT_BATCH_SIZE = 1000
 
 
 @router.post("", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-def create_user(*, user_in: schemas.UserCreate, db: Session = Depends(db_session)) -> User:
+async def create_user(
+    *, user_in: schemas.UserCreate, db: AsyncSession = Depends(async_db_session)
+) -> User:
     """Create a new user in the system."""
 
-    existing = db.query(User).filter(User.email == user_in.email).first()
+    existing = await db.scalar(select(User).where(User.email == user_in.email))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,34 +50,140 @@ def create_user(*, user_in: schemas.UserCreate, db: Session = Depends(db_session
         email=user_in.email,
         full_name=user_in.full_name,
         phone_number=user_in.phone_number,
-        hashed_password=get_password_hash(user_in.password),
+        # bcrypt is CPU-bound; it runs in the password hashing pool.
+        hashed_password=await password_hasher.hash(user_in.password),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return user
 
 
 @router.get("", response_model=list[schemas.UserRead])
-def list_users(db: Session = Depends(db_session)) -> list[User]:
-    """Return all users."""
+async def list_users(
+    *,
+    response: Response,
+    db: AsyncSession = Depends(async_db_session),
+    current_user: User = Depends(get_token_user),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(
+        default=None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page",
+    ),
+) -> list[User]:
+    """Return a page of users, newest first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; ``/users/export`` streams the whole table instead.
+    Superusers only, with a bearer token: the demo fallback does not apply.
+    """
+
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Superuser access required")
+
+    query = select(User).order_by(User.created_at.desc(), User.id.desc())
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, User)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    users = (await db.scalars(query.limit(limit))).all()
+    cursor_out = next_cursor(users, limit)
+    if cursor_out:
+        response.headers["X-Next-Cursor"] = cursor_out
+    return users
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(current_user: User = Depends(get_token_user)) -> StreamingResponse:
+    """Stream every user as NDJSON (one ``UserRead`` object per line), for admin tooling.
+
+    Rows are read through a server-side cursor in batches and written as
+    they arrive, so memory use does not depend on the number of users.
+    Superusers only, with a bearer token: the demo fallback does not apply.
+    """
+
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Superuser access required")
+
+    return StreamingResponse(
+        _user_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="users.ndjson"'},
+    )
+
 
-    return db.query(User).order_by(User.created_at.desc()).all()
+async def _user_lines() -> AsyncIterator[bytes]:
+    # The request's session is closed before the body is sent: the export
+    # uses a session of its own for as long as it streams.
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(*USER_READ_COLUMNS)
+            .order_by(User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield b"".join(
+                schemas.UserRead.model_validate(row).model_dump_json().encode() + b"\n" for row in rows
+            )
 
 
-@router.post("/login", response_model=schemas.UserRead)
-def login_user(
+@router.post("/login", response_model=schemas.UserToken)
+async def login_user(
     *,
     credentials: schemas.UserLogin,
-    db: Session = Depends(db_session),
-) -> User:
-    """Authenticate a user. (Simplified for demonstration)"""
+    db: AsyncSession = Depends(async_db_session),
+) -> schemas.UserToken:
+    """Authenticate a user and issue an access token.
+
+    Send the token back as ``Authorization: Bearer <access_token>``; it is
+    verified without a database query.
+    """
 
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await db.scalar(select(User).where(User.email == credentials.email))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not verify_password(credentials.password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify(credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+
+    if new_hash:
+        # The hash predates the current BCRYPT_ROUNDS: store it with the new cost.
+        user.hashed_password = new_hash
+        await db.commit()
+
+    user_cache.put(user)
+    return schemas.UserToken(
+        **schemas.UserRead.model_validate(user).model_dump(),
+        access_token=create_access_token(user.id),
+        expires_in=settings.access_token_ttl_seconds,
+    )
+
+
+@router.post("/{user_id}/deactivate", response_model=schemas.UserRead)
+async def deactivate_user(
+    *,
+    user_id: int,
+    db: AsyncSession = Depends(async_db_session),
+    current_user: User = Depends(get_token_user),
+) -> User:
+    """Deactivate an account (one's own, or any as a superuser); its tokens stop working.
+
+    Requires a bearer token: the demo fallback does not apply.
+    """
+
+    if current_user.id != user_id and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to deactivate this user")
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    user.is_active = False
+    await db.commit()
+    user_cache.invalidate(user_id)
     return user
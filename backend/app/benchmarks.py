@@ -0,0 +1,365 @@
+"""Micro-benchmarks of the in-memory search structures, and a load test.
+
+The micro-benchmarks run against synthetic data, without a database or Ollama::
+
+    python -m app.benchmarks similar --rows 100000
+    python -m app.benchmarks snapshot --rows 100000
+    python -m app.benchmarks login --repeat 64 --concurrency 16
+
+``load`` compares a sync and an async property endpoint under concurrent
+clients, on the database of ``DATABASE_URL``::
+
+    python -m app.benchmarks load --repeat 2000 --concurrency 64 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import socket
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .models import PropertyStatus, PropertyType
+from .schemas import LocalityMatch, PropertyFilters
+from .security import PasswordHasher, get_password_hash
+from .services.similarity import FeatureMatrix, FeatureRow
+from .services.snapshot import ListingSnapshot
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+CITY_KEYS = ("lome", "kara", "sokode", "kpalime", "atakpame", "dapaong", "tsevie", "aneho")
+
+
+def timed(function: Callable[[], object], repeat: int) -> list[float]:
+    """Return the duration of ``repeat`` calls of ``function``, in milliseconds."""
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def report(label: str, durations: list[float]) -> None:
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<28} median {statistics.median(ordered):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def synthetic_features(rows: int, seed: int = 0) -> list[FeatureRow]:
+    """Return ``rows`` random but plausible listings."""
+
+    rng = np.random.default_rng(seed)
+    types = list(PropertyType)
+    statuses = list(PropertyStatus)
+    prices = rng.lognormal(mean=17, sigma=1, size=rows)
+    areas = rng.lognormal(mean=5, sigma=0.6, size=rows)
+    bedrooms = rng.integers(0, 7, size=rows)
+    bathrooms = rng.integers(0, 4, size=rows)
+    latitudes = rng.uniform(6.1, 11.0, size=rows)
+    longitudes = rng.uniform(0.1, 1.8, size=rows)
+    return [
+        FeatureRow.from_values(
+            index + 1,
+            float(prices[index]),
+            float(areas[index]),
+            int(bedrooms[index]),
+            int(bathrooms[index]),
+            float(latitudes[index]),
+            float(longitudes[index]),
+            types[index % len(types)],
+            CITY_KEYS[index % len(CITY_KEYS)],
+            statuses[index % len(statuses)],
+        )
+        for index in range(rows)
+    ]
+
+
+def benchmark_similar(args: argparse.Namespace) -> None:
+    """Time building the feature matrix, k-NN queries and incremental writes."""
+
+    rows, repeat = args.rows, args.repeat
+    features = synthetic_features(rows)
+    matrix = FeatureMatrix()
+    report(f"load {rows} rows", timed(lambda: matrix.load(features), 1))
+
+    rng = np.random.default_rng(1)
+    targets = iter(rng.integers(1, rows + 1, size=repeat * 2).tolist())
+    report("nearest k=6", timed(lambda: matrix.nearest(next(targets), 6), repeat))
+    report(
+        "nearest k=6, available only",
+        timed(lambda: matrix.nearest(next(targets), 6, {PropertyStatus.AVAILABLE}), repeat),
+    )
+
+    inserts = iter(
+        replace(row, property_id=rows + row.property_id)
+        for row in synthetic_features(repeat, seed=2)
+    )
+    report("insert", timed(lambda: matrix.upsert(next(inserts)), repeat))
+    report("update", timed(lambda: matrix.upsert(features[int(rng.integers(rows))]), repeat))
+    removals = iter(rng.permutation(rows)[:repeat].tolist())
+    report("delete", timed(lambda: matrix.remove(next(removals) + 1), repeat))
+
+
+def synthetic_snapshot_rows(rows: int, seed: int = 0) -> list[tuple]:
+    """Return ``rows`` random listings as :data:`~.services.snapshot.SNAPSHOT_COLUMNS` tuples."""
+
+    rng = np.random.default_rng(seed)
+    types = list(PropertyType)
+    statuses = list(PropertyStatus)
+    prices = rng.lognormal(mean=17, sigma=1, size=rows)
+    bedrooms = rng.integers(0, 7, size=rows)
+    bathrooms = rng.integers(0, 4, size=rows)
+    minutes = rng.integers(0, 525_600, size=rows)
+    featured = rng.random(rows) < 0.1
+    start = datetime(2025, 1, 1)
+    return [
+        (
+            index + 1,
+            float(prices[index]),
+            int(bedrooms[index]),
+            int(bathrooms[index]),
+            types[index % len(types)],
+            statuses[index % len(statuses)],
+            CITY_KEYS[index % len(CITY_KEYS)],
+            bool(featured[index]),
+            start + timedelta(minutes=int(minutes[index])),
+            start,
+        )
+        for index in range(rows)
+    ]
+
+
+def benchmark_snapshot(args: argparse.Namespace) -> None:
+    """Time loading the listing snapshot and answering typical listing filters."""
+
+    rows, repeat = args.rows, args.repeat
+    snapshot = ListingSnapshot(enabled=True)
+    data = synthetic_snapshot_rows(rows)
+    report(f"load {rows} rows", timed(lambda: snapshot.load(data), 1))
+    searches = {
+        "no filter": PropertyFilters(),
+        "available": PropertyFilters(status=PropertyStatus.AVAILABLE),
+        "city prefix + price": PropertyFilters(
+            city="lo", locality_match=LocalityMatch.PREFIX, max_price=30_000_000
+        ),
+        "type + status + bedrooms": PropertyFilters(
+            property_type=PropertyType.HOUSE, status=PropertyStatus.AVAILABLE, bedrooms=3
+        ),
+        "featured, offset 500": PropertyFilters(is_featured=True),
+    }
+    for label, filters in searches.items():
+        offset = 500 if "offset" in label else 0
+        report(label, timed(lambda: snapshot.search(filters, 20, offset=offset), repeat))
+
+
+async def _concurrent_logins(hasher: PasswordHasher, hashed: str, logins: int, concurrency: int) -> None:
+    """Verify ``logins`` passwords ``concurrency`` at a time while timing the event loop."""
+
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        # How late a 10 ms sleep wakes up: what any other request would wait.
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - started) * 1000 - 10)
+
+    gate = asyncio.Semaphore(concurrency)
+
+    async def login() -> float:
+        async with gate:
+            started = time.perf_counter()
+            valid, _ = await hasher.verify("DemoPass123!", hashed)
+            assert valid
+            return (time.perf_counter() - started) * 1000
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    label = f"workers={hasher.workers}" if hasher.workers else "thread pool"
+    print(f"{label:<28} {logins / elapsed:8.1f} logins/s")
+    report("  login latency", durations)
+    report("  event loop lag", lags or [0.0])
+
+
+def benchmark_login(args: argparse.Namespace) -> None:
+    """Compare login throughput and event loop lag with and without the hashing pool."""
+
+    hashed = get_password_hash("DemoPass123!")
+    for workers in (0, 1, 2, 4):
+        hasher = PasswordHasher(workers=workers, max_pending=args.concurrency)
+        try:
+            asyncio.run(_concurrent_logins(hasher, hashed, args.repeat, args.concurrency))
+        finally:
+            hasher.close()
+
+
+def load_test_app(latency_ms: float) -> FastAPI:
+    """Return an app serving one property detail through the sync stack and the async one.
+
+    ``/sync`` is the former endpoint shape, a ``def`` route on ``SessionLocal``
+    run in Starlette's thread pool; ``/async`` is the current one. Both keep
+    their connection for ``latency_ms`` more, standing for the round trip to
+    a remote database: the sync route holds a thread meanwhile, the async
+    one does not.
+    """
+
+    from fastapi import Depends, FastAPI, HTTPException
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session, selectinload
+
+    from .dependencies import async_db_session, db_session
+    from .models import Property
+    from .schemas import PropertyRead
+
+    app = FastAPI()
+    latency = latency_ms / 1000
+
+    def statement(property_id: int):
+        return select(Property).options(selectinload(Property.images)).where(Property.id == property_id)
+
+    @app.get("/sync/{property_id}", response_model=PropertyRead)
+    def sync_property(property_id: int, db: Session = Depends(db_session)) -> Property:
+        listing = db.scalar(statement(property_id))
+        time.sleep(latency)
+        if listing is None:
+            raise HTTPException(status_code=404)
+        return listing
+
+    @app.get("/async/{property_id}", response_model=PropertyRead)
+    async def async_property(property_id: int, db: AsyncSession = Depends(async_db_session)) -> Property:
+        listing = await db.scalar(statement(property_id))
+        await asyncio.sleep(latency)
+        if listing is None:
+            raise HTTPException(status_code=404)
+        return listing
+
+    return app
+
+
+async def _load(base_url: str, stack: str, ids: list[int], requests: int, concurrency: int) -> None:
+    """Send ``requests`` detail requests to one stack, ``concurrency`` at a time."""
+
+    import httpx
+
+    durations: list[float] = []
+    failures = 0
+    gate = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def fetch(property_id: int) -> None:
+            nonlocal failures
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f"/{stack}/{property_id}")
+                    failed = response.status_code != 200
+                except httpx.HTTPError:
+                    failed = True
+                durations.append((time.perf_counter() - started) * 1000)
+                failures += failed
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch(random.choice(ids)) for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{stack:<28} {requests / elapsed:8.1f} req/s   {failures} failed")
+    report("  latency", durations)
+
+
+def serve_load_test_app(port: int, latency_ms: float) -> None:
+    import uvicorn
+
+    # Failures are counted by the client; keep tracebacks off the report.
+    uvicorn.run(load_test_app(latency_ms), port=port, log_level="critical", access_log=False)
+
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def benchmark_load(args: argparse.Namespace) -> None:
+    """Compare the throughput of the sync and async database stacks under concurrent load.
+
+    Each stack is served by a fresh server process, so that the client does
+    not compete with it for the GIL and the sync run leaves nothing behind.
+    """
+
+    from sqlalchemy import select
+
+    from .database import SessionLocal, engine
+    from .models import Property, init_db
+
+    init_db(engine)
+    with SessionLocal() as db:
+        ids = list(db.scalars(select(Property.id).limit(1000)))
+    if not ids:
+        sys.exit("The load test needs listings: run python -m app.seed or import some first")
+
+    print(f"{args.concurrency} clients, {args.latency_ms:g} ms of database latency")
+    for stack in ("sync", "async"):
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve_load_test_app, args=(args.port, args.latency_ms), daemon=True
+        )
+        server.start()
+        try:
+            _wait_for_port(args.port)
+            asyncio.run(_load(f"http://127.0.0.1:{args.port}", stack, ids, args.repeat, args.concurrency))
+        finally:
+            server.terminate()
+            server.join()
+
+
+BENCHMARKS = {
+    "load": benchmark_load,
+    "login": benchmark_login,
+    "similar": benchmark_similar,
+    "snapshot": benchmark_snapshot,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic catalog size")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per operation (requests per stack for load)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Simultaneous logins or load clients")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Simulated database round trip per load request"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port of the load test server")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,11 @@
 from functools import lru_cache
 from typing import Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
+
+# Public placeholder: tokens signed with it can be forged by anyone.
+DEFAULT_SECRET_KEY = "change-me-in-production"
+
 
 class Settings(BaseSettings):
     """Environment-driven settings for the FastAPI application."""
@@ -36,6 +40,39 @@ class Settings(BaseSettings):
         description="Full database connection URL (overrides individual MySQL settings).",
     )
     
+    secret_key: str = Field(
+        default=DEFAULT_SECRET_KEY,
+        description="Key signing access tokens; required outside development.",
+    )
+    bcrypt_rounds: int = Field(
+        default=12,
+        ge=4,
+        le=31,
+        description="bcrypt cost factor; existing hashes are upgraded at the next login.",
+    )
+    password_hash_workers: int = Field(
+        default=2,
+        ge=0,
+        description="Processes dedicated to password hashing (0 hashes in the thread pool).",
+    )
+    password_hash_max_pending: int = Field(
+        default=32, ge=1, description="Password hashes queued for the pool before callers wait."
+    )
+    access_token_ttl_seconds: int = Field(
+        default=43200, description="Lifetime of an access token issued at login, in seconds."
+    )
+    demo_user_fallback: bool = Field(
+        default=False,
+        description="Treat requests without a token as the first active non-superuser (demo frontend).",
+    )
+    user_cache_max_entries: int = Field(
+        default=1024, description="Maximum number of user records cached for authentication."
+    )
+    user_cache_ttl_seconds: float = Field(
+        default=60.0,
+        description="Lifetime of a cached user record; bounds how long another worker may accept a deactivated user.",
+    )
+
     # CHANGEMENT ICI : Union[str, list[str]] pour accepter les deux formats
     cors_allowed_origins: Union[str, list[str]] = Field(
         default="http://localhost:3000,http://localhost:5173",
@@ -50,6 +87,90 @@ class Settings(BaseSettings):
         default="llama3.3",
         description="Name of the model to use for natural language search assistance.",
     )
+    ollama_embedding_model: str = Field(
+        default="nomic-embed-text",
+        description="Name of the Ollama model used to embed listings for semantic search.",
+    )
+    ollama_keep_alive: str = Field(
+        default="30m",
+        description="How long Ollama keeps the model loaded after a request (e.g. 5m, 1h, -1 for ever).",
+    )
+    ollama_warm_up: bool = Field(
+        default=True, description="Preload the Ollama model when the API starts."
+    )
+    ollama_max_connections: int = Field(
+        default=10, description="Maximum number of concurrent connections to Ollama."
+    )
+    ollama_max_keepalive_connections: int = Field(
+        default=5, description="Maximum number of idle connections kept open to Ollama."
+    )
+    ollama_keepalive_expiry_seconds: float = Field(
+        default=60.0, description="Idle time after which a pooled Ollama connection is closed."
+    )
+    ollama_connect_timeout_seconds: float = Field(
+        default=5.0, description="Timeout for opening a connection to Ollama, in seconds."
+    )
+    ollama_read_timeout_seconds: float = Field(
+        default=120.0, description="Timeout for Ollama requests (read, write, pool), in seconds."
+    )
+
+    ai_max_in_flight: int = Field(
+        default=2, description="Maximum number of concurrent generations sent to Ollama."
+    )
+    ai_max_queue: int = Field(
+        default=8, description="Maximum number of AI requests waiting for a free slot."
+    )
+    ai_queue_timeout_seconds: float = Field(
+        default=15.0, description="Longest time an AI request may wait for a slot, in seconds."
+    )
+
+    semantic_search_enabled: bool = Field(
+        default=True, description="Maintain the listing embedding index used by semantic search."
+    )
+    semantic_index_dir: str = Field(
+        default="semantic_index", description="Directory of the memory-mapped embedding index."
+    )
+
+    ai_cache_enabled: bool = Field(
+        default=True, description="Cache AI agent answers by normalized prompt."
+    )
+    ai_cache_backend: str = Field(
+        default="memory", description="Storage backend of the AI answer cache (memory or disk)."
+    )
+    ai_cache_path: str = Field(
+        default="ai_cache.sqlite3", description="File used by the disk AI answer cache."
+    )
+    ai_cache_max_entries: int = Field(
+        default=1024, description="Maximum number of cached AI answers."
+    )
+    ai_cache_ttl_seconds: float = Field(
+        default=3600.0, description="Lifetime of a cached AI answer, in seconds."
+    )
+
+    listing_cache_enabled: bool = Field(
+        default=True, description="Cache serialized property listing pages."
+    )
+    listing_cache_backend: str = Field(
+        default="memory", description="Storage backend of the listing cache (memory only)."
+    )
+    listing_cache_max_entries: int = Field(
+        default=512, description="Maximum number of cached listing pages."
+    )
+    listing_cache_ttl_seconds: float = Field(
+        default=60.0, description="Lifetime of a cached listing page, in seconds."
+    )
+    listing_engine: str = Field(
+        default="sql",
+        description="Execution of simple listing filters: sql, or snapshot for in-memory column arrays.",
+    )
+    listing_snapshot_max_age_seconds: float = Field(
+        default=5.0,
+        description="How stale the listing snapshot may get before catching up with the database.",
+    )
+    bulk_import_batch_size: int = Field(
+        default=500,
+        description="Listings written per INSERT and per transaction by bulk imports (at most 1000).",
+    )
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -73,6 +194,23 @@ class Settings(BaseSettings):
         
         return ["http://localhost:3000"]
 
+    @field_validator("listing_cache_backend")
+    @classmethod
+    def require_memory_listing_cache(cls, value: str) -> str:
+        """Cached listing pages hold bytes and filter objects, which only the memory backend stores."""
+        if value != "memory":
+            raise ValueError(f"Unsupported listing cache backend {value!r}: only 'memory' is available")
+        return value
+
+    @model_validator(mode="after")
+    def require_secret_key(self) -> "Settings":
+        """Refuse to run outside development with the public default secret key."""
+        if self.environment.lower() != "development" and self.secret_key == DEFAULT_SECRET_KEY:
+            raise ValueError(
+                f"SECRET_KEY must be set to a private random value in the {self.environment!r} environment"
+            )
+        return self
+
     # AJOUTEZ CETTE MÉTHODE ICI
     def get_cors_origins_list(self) -> list[str]:
         """Return CORS origins as a list."""
@@ -1,10 +1,13 @@
 """Database session and engine configuration."""
 
-from collections.abc import Generator
-from sqlalchemy import create_engine
+from collections.abc import AsyncGenerator, Generator
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from .config import get_settings
+from .geo import haversine_km
 
 settings = get_settings()
 
@@ -30,8 +33,50 @@ engine = create_engine(
     future=True,
 )
 
+
+def register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    """Expose Python helpers that SQLite lacks as SQL functions."""
+
+    dbapi_connection.create_function("haversine_km", 4, haversine_km, deterministic=True)
+
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", register_sqlite_functions)
+
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
 
+# Pilotes asynchrones utilisés par les endpoints : aiomysql pour MySQL,
+# aiosqlite pour les exécutions locales.
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """Return ``url`` rewritten to use the asynchronous driver of its backend."""
+
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=settings.environment == "development",
+)
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", register_sqlite_functions)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, expire_on_commit=False, autoflush=False
+)
+
 
 def get_db() -> Generator:
     """Yield a SQLAlchemy session, ensuring proper cleanup."""
@@ -40,3 +85,9 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield an asynchronous SQLAlchemy session, ensuring proper cleanup."""
+    async with AsyncSessionLocal() as db:
+        yield db
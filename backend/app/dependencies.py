@@ -1,10 +1,22 @@
 """Shared FastAPI dependencies."""
 
-from fastapi import Depends, HTTPException, status
+from collections.abc import AsyncGenerator
+
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .database import get_db
-from .models import User
+from . import schemas
+from .config import get_settings
+from .database import get_async_db, get_db
+from .geo import BoundingBox, parse_point
+from .models import PropertyStatus, PropertyType, User
+from .security import InvalidToken, decode_access_token
+from .services.user_cache import user_cache
+
+
+settings = get_settings()
 
 
 def db_session() -> Session:
@@ -13,18 +25,119 @@ def db_session() -> Session:
     yield from get_db()
 
 
-def get_current_user(db: Session = Depends(db_session)) -> User:
-    """Placeholder dependency for authenticated user.
+async def async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Provide an asynchronous SQLAlchemy session."""
+
+    async for db in get_async_db():
+        yield db
+
+
+def property_filters(
+    q: str | None = Query(
+        default=None, description="Keywords searched in titles and descriptions"
+    ),
+    city: str | None = Query(default=None, description="Filter by city name"),
+    district: str | None = Query(default=None, description="Filter by district name"),
+    locality_match: schemas.LocalityMatch = Query(
+        default=schemas.LocalityMatch.CONTAINS,
+        description=(
+            "How city/district are matched, ignoring accents and case: 'contains' "
+            "(substring, the default) scans, 'exact' and 'prefix' use an index"
+        ),
+    ),
+    property_type: PropertyType | None = Query(default=None),
+    property_status: PropertyStatus | None = Query(default=None, alias="status"),
+    min_price: float | None = Query(default=None),
+    max_price: float | None = Query(default=None),
+    bedrooms: int | None = Query(default=None),
+    bathrooms: int | None = Query(default=None),
+    is_featured: bool | None = Query(default=None),
+    near: str | None = Query(
+        default=None, description="Centre of a radius search, as 'lat,lon'"
+    ),
+    radius_km: float = Query(default=5, gt=0, le=200, description="Radius around 'near'"),
+    bbox: str | None = Query(
+        default=None,
+        description="Map viewport as 'min_lon,min_lat,max_lon,max_lat'",
+    ),
+) -> schemas.PropertyFilters:
+    """Collect the property search criteria from the query string."""
+
+    try:
+        point = parse_point(near) if near else None
+        box = BoundingBox.parse(bbox) if bbox else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    return schemas.PropertyFilters(
+        q=q,
+        city=city,
+        district=district,
+        locality_match=locality_match,
+        property_type=property_type,
+        status=property_status,
+        min_price=min_price,
+        max_price=max_price,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        is_featured=is_featured,
+        near=point,
+        radius_km=radius_km if point else None,
+        bbox=box,
+    )
+
+
+bearer_scheme = HTTPBearer(auto_error=False, description="Access token returned by /users/login")
+
 
-    In a production system, this would verify tokens. Here, we fetch the first
-    user in the database or raise an error, providing a simplified approach for
-    demo purposes.
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User:
+    """Resolve the authenticated user from the ``Authorization: Bearer`` token.
+
+    The token signature and expiry are checked without the database and the
+    user record comes from the user cache, so the common case runs no query.
+    Without a token, demo deployments (``DEMO_USER_FALLBACK``) act as the
+    first active user that is not a superuser.
+    """
+
+    if credentials is None:
+        if not settings.demo_user_fallback:
+            raise _unauthorized("Not authenticated")
+        user = await user_cache.demo_user()
+        if not user:
+            raise _unauthorized("No active non-superuser available for demo requests. Please seed the database.")
+        return user
+    return await _token_user(credentials)
+
+
+async def get_token_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User:
+    """Resolve the user of the bearer token, never falling back to the demo user.
+
+    For admin and export routes, which must not be reachable anonymously.
     """
 
-    user = db.query(User).filter(User.is_active.is_(True)).first()
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    return await _token_user(credentials)
+
+
+async def _token_user(credentials: HTTPAuthorizationCredentials) -> User:
+    try:
+        user_id = decode_access_token(credentials.credentials)
+    except InvalidToken as exc:
+        raise _unauthorized(str(exc)) from exc
+    user = await user_cache.get(user_id)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No active user available. Please seed the database with a user.",
-        )
+        raise _unauthorized("Inactive or unknown user")
     return user
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
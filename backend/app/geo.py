@@ -0,0 +1,141 @@
+"""Geographic helpers: geohash encoding, bounding boxes and distances."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_PRECISION = 12
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    """Latitude/longitude rectangle, in degrees."""
+
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+    @classmethod
+    def parse(cls, value: str) -> BoundingBox:
+        """Parse ``"min_lon,min_lat,max_lon,max_lat"`` (west, south, east, north).
+
+        Raises ``ValueError`` when the value is malformed or out of range.
+        """
+
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+        except ValueError as exc:
+            raise ValueError("bbox must be 'min_lon,min_lat,max_lon,max_lat'") from exc
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+            raise ValueError("bbox is out of range or not ordered west,south,east,north")
+        return cls(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
+
+    @classmethod
+    def around(cls, lat: float, lon: float, radius_km: float) -> BoundingBox:
+        """Return the smallest box containing the circle of ``radius_km`` around a point."""
+
+        delta_lat = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(lat))
+        delta_lon = 180.0 if cos_lat < 1e-6 else min(180.0, delta_lat / cos_lat)
+        return cls(
+            min_lat=max(-90.0, lat - delta_lat),
+            min_lon=max(-180.0, lon - delta_lon),
+            max_lat=min(90.0, lat + delta_lat),
+            max_lon=min(180.0, lon + delta_lon),
+        )
+
+
+def parse_point(value: str) -> tuple[float, float]:
+    """Parse ``"lat,lon"``; raises ``ValueError`` when malformed or out of range."""
+
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError as exc:
+        raise ValueError("near must be 'lat,lon'") from exc
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("near is out of range")
+    return lat, lon
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Return the geohash of a point.
+
+    Geohashes sharing a prefix lie in the same cell, so a cell is a contiguous
+    range of an ordinary B-tree index on the geohash column.
+    """
+
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Return the ``(height, width)`` in degrees of a geohash cell."""
+
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def covering_geohashes(box: BoundingBox, max_cells: int = 16) -> list[str]:
+    """Return the geohash cells covering ``box``, as fine as ``max_cells`` allows.
+
+    An empty list means the box is too large for any precision, in which case
+    callers should rely on plain latitude/longitude bounds.
+    """
+
+    best: tuple[int, int, int, int, int] | None = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = geohash_cell_size(precision)
+        first_row = math.floor((box.min_lat + 90) / height)
+        last_row = min(math.floor((box.max_lat + 90) / height), 2 ** (5 * precision // 2) - 1)
+        first_col = math.floor((box.min_lon + 180) / width)
+        last_col = min(math.floor((box.max_lon + 180) / width), 2 ** ((5 * precision + 1) // 2) - 1)
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > max_cells:
+            break
+        best = (precision, first_row, last_row, first_col, last_col)
+
+    if best is None:
+        return []
+    precision, first_row, last_row, first_col, last_col = best
+    height, width = geohash_cell_size(precision)
+    return sorted(
+        {
+            encode_geohash(
+                (row + 0.5) * height - 90, (col + 0.5) * width - 180, precision
+            )
+            for row in range(first_row, last_row + 1)
+            for col in range(first_col, last_col + 1)
+        }
+    )
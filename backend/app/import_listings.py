@@ -0,0 +1,90 @@
+"""Import listings in bulk from a CSV or JSON Lines file.
+
+    python -m app.import_listings annonces.csv --owner demo@smartimmo.tg
+    python -m app.import_listings annonces.jsonl --owner demo@smartimmo.tg --batch-size 1000
+    cat annonces.jsonl | python -m app.import_listings - --format jsonl --owner demo@smartimmo.tg
+
+Embeddings of the imported listings are computed by the API's synchronization
+at its next start.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import BinaryIO
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal, async_engine
+from .models import User
+from .schemas import ListingFormat
+from .services import ListingImporter
+
+
+CHUNK_SIZE = 64 * 1024
+FORMATS_BY_SUFFIX = {
+    ".csv": ListingFormat.CSV,
+    ".jsonl": ListingFormat.JSONL,
+    ".ndjson": ListingFormat.JSONL,
+}
+
+
+async def read_chunks(stream: BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := stream.read(CHUNK_SIZE):
+        yield chunk
+
+
+async def import_file(
+    stream: BinaryIO, import_format: ListingFormat, owner_email: str, batch_size: int | None
+) -> int:
+    """Import the listings of ``stream`` for the user ``owner_email`` and print a report."""
+
+    async with AsyncSessionLocal() as db:
+        owner_id = await db.scalar(select(User.id).where(User.email == owner_email))
+        if owner_id is None:
+            print(f"Unknown user: {owner_email}", file=sys.stderr)
+            return 1
+        importer = ListingImporter(db, owner_id, import_format, batch_size)
+        report = await importer.run(read_chunks(stream))
+    await async_engine.dispose()
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.message}", file=sys.stderr)
+    if report.failed > len(report.errors):
+        print(f"... and {report.failed - len(report.errors)} more rejected rows", file=sys.stderr)
+    print(
+        f"{report.imported} of {report.rows} rows imported, {report.failed} rejected, "
+        f"in {report.elapsed_seconds:.2f} s ({report.rows_per_second:.0f} rows/s)"
+    )
+    return 1 if report.failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV or JSON Lines file, or - for standard input")
+    parser.add_argument("--owner", required=True, help="Email of the user owning the listings")
+    parser.add_argument(
+        "--format",
+        choices=[import_format.value for import_format in ListingFormat],
+        help="Input format; guessed from the file extension by default",
+    )
+    parser.add_argument("--batch-size", type=int, help="Listings per transaction (BULK_IMPORT_BATCH_SIZE)")
+    args = parser.parse_args(argv)
+
+    import_format = (
+        ListingFormat(args.format) if args.format else FORMATS_BY_SUFFIX.get(Path(args.path).suffix.lower())
+    )
+    if import_format is None:
+        parser.error("cannot guess the format of the input, use --format")
+    if args.path == "-":
+        return asyncio.run(import_file(sys.stdin.buffer, import_format, args.owner, args.batch_size))
+    with open(args.path, "rb") as stream:
+        return asyncio.run(import_file(stream, import_format, args.owner, args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ from .api import api_router
 from .config import get_settings
 from .database import engine
 from .models import init_db
+from .security import password_hasher
+from .services.ai_agent import ollama_client
+from .services.embeddings import start_embedding_sync, stop_embedding_sync
 
 
 settings = get_settings()
@@ -22,6 +25,7 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
     )
 
     app.include_router(api_router)
@@ -30,6 +34,24 @@ def create_application() -> FastAPI:
     def on_startup() -> None:
         init_db(engine)
 
+    @app.on_event("startup")
+    async def open_ollama_client() -> None:
+        await ollama_client.start()
+        await start_embedding_sync()
+
+    @app.on_event("shutdown")
+    async def close_ollama_client() -> None:
+        await stop_embedding_sync()
+        await ollama_client.close()
+
+    @app.on_event("startup")
+    def start_password_hasher() -> None:
+        password_hasher.start()
+
+    @app.on_event("shutdown")
+    def stop_password_hasher() -> None:
+        password_hasher.close()
+
     @app.get("/health", tags=["health"])
     def health_check() -> dict[str, str]:
         return {"status": "ok", "environment": settings.environment}
@@ -0,0 +1,74 @@
+"""Alembic environment for the Togo Real Estate schema."""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.models import Base
+
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Full-text structures are created by hand in migration 0004 and have no ORM
+# counterpart; autogenerate must not try to drop them.
+UNMANAGED_PREFIXES = ("properties_fts", "ft_properties_")
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Skip database objects that are intentionally absent from the metadata."""
+
+    return not (reflected and compare_to is None and name.startswith(UNMANAGED_PREFIXES))
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to the database."""
+
+    from app.database import DATABASE_URL
+
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_with(connection) -> None:
+    """Run the pending migrations on an open connection."""
+
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations on the connection handed over by ``init_db``, or on the app engine."""
+
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_with(connection)
+        return
+
+    from app.database import engine
+
+    with engine.connect() as connection:
+        run_migrations_with(connection)
+        connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,55 @@
+"""Indexes for the listing filters and a unique favorite per user/property.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+PROPERTY_INDEXES = {
+    "ix_properties_created_at_id": ["created_at", "id"],
+    "ix_properties_status_created_at": ["status", "created_at", "id"],
+    "ix_properties_type_created_at": ["property_type", "created_at", "id"],
+    "ix_properties_featured_created_at": ["is_featured", "created_at", "id"],
+    "ix_properties_city_created_at": ["city", "created_at", "id"],
+    "ix_properties_price": ["price"],
+    "ix_properties_bedrooms": ["bedrooms"],
+    "ix_properties_owner_id": ["owner_id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in PROPERTY_INDEXES.items():
+        op.create_index(name, "properties", columns)
+    op.create_index("ix_property_images_property_id", "property_images", ["property_id"])
+
+    # Keep the oldest favorite of any duplicated pair before enforcing uniqueness.
+    op.execute(
+        "DELETE FROM favorites WHERE id NOT IN ("
+        " SELECT keep_id FROM ("
+        "  SELECT MIN(id) AS keep_id FROM favorites GROUP BY user_id, property_id"
+        " ) AS kept"
+        ")"
+    )
+    op.create_index(
+        "uq_favorites_user_property", "favorites", ["user_id", "property_id"], unique=True
+    )
+    op.create_index("ix_favorites_user_created_at", "favorites", ["user_id", "created_at"])
+    op.create_index("ix_favorites_property_id", "favorites", ["property_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_favorites_property_id", table_name="favorites")
+    op.drop_index("ix_favorites_user_created_at", table_name="favorites")
+    op.drop_index("uq_favorites_user_property", table_name="favorites")
+    op.drop_index("ix_property_images_property_id", table_name="property_images")
+    for name in reversed(list(PROPERTY_INDEXES)):
+        op.drop_index(name, table_name="properties")
@@ -0,0 +1,55 @@
+"""Accent-folded city/district keys for indexed locality search.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.normalization import fold_text
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("properties", sa.Column("city_key", sa.String(length=120), nullable=True))
+    op.add_column("properties", sa.Column("district_key", sa.String(length=120), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, city, district FROM properties")).all()
+    if rows:
+        connection.execute(
+            sa.text(
+                "UPDATE properties SET city_key = :city_key, district_key = :district_key"
+                " WHERE id = :id"
+            ),
+            [
+                {"id": row.id, "city_key": fold_text(row.city), "district_key": fold_text(row.district)}
+                for row in rows
+            ],
+        )
+
+    with op.batch_alter_table("properties") as batch_op:
+        batch_op.alter_column("city_key", existing_type=sa.String(length=120), nullable=False)
+        batch_op.drop_index("ix_properties_city_created_at")
+        batch_op.create_index(
+            "ix_properties_city_key_created_at", ["city_key", "created_at", "id"]
+        )
+        batch_op.create_index(
+            "ix_properties_district_key_created_at", ["district_key", "created_at", "id"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("properties") as batch_op:
+        batch_op.drop_index("ix_properties_district_key_created_at")
+        batch_op.drop_index("ix_properties_city_key_created_at")
+        batch_op.create_index("ix_properties_city_created_at", ["city", "created_at", "id"])
+        batch_op.drop_column("district_key")
+        batch_op.drop_column("city_key")
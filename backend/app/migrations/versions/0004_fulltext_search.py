@@ -0,0 +1,80 @@
+"""Full-text index over property titles and descriptions.
+
+SQLite gets an external-content FTS5 table kept in sync by triggers; MySQL
+gets an InnoDB FULLTEXT index, which the server maintains on every write.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE properties_fts USING fts5(
+        title, description,
+        content='properties', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER properties_fts_insert AFTER INSERT ON properties BEGIN
+        INSERT INTO properties_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER properties_fts_delete AFTER DELETE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER properties_fts_update AFTER UPDATE OF title, description ON properties
+    BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO properties_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO properties_fts(properties_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS properties_fts_update",
+    "DROP TRIGGER IF EXISTS properties_fts_delete",
+    "DROP TRIGGER IF EXISTS properties_fts_insert",
+    "DROP TABLE IF EXISTS properties_fts",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == "mysql":
+        op.create_index(
+            "ft_properties_title_description",
+            "properties",
+            ["title", "description"],
+            mysql_prefix="FULLTEXT",
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == "mysql":
+        op.drop_index("ft_properties_title_description", table_name="properties")
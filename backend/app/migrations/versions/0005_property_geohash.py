@@ -0,0 +1,45 @@
+"""Geohash column backing radius and bounding-box searches.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.geo import encode_geohash
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("properties", sa.Column("geohash", sa.String(length=12), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, latitude, longitude FROM properties"
+            " WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+    ).all()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE properties SET geohash = :geohash WHERE id = :id"),
+            [
+                {"id": row.id, "geohash": encode_geohash(row.latitude, row.longitude)}
+                for row in rows
+            ],
+        )
+
+    op.create_index("ix_properties_geohash", "properties", ["geohash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_properties_geohash", table_name="properties")
+    with op.batch_alter_table("properties") as batch_op:
+        batch_op.drop_column("geohash")
@@ -0,0 +1,45 @@
+"""Pre-aggregated map clusters per geohash cell.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+CLUSTER_PRECISIONS = range(1, 9)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "property_clusters",
+        sa.Column("cell_precision", sa.Integer(), nullable=False),
+        sa.Column("cell", sa.String(length=12), nullable=False),
+        sa.Column("listing_count", sa.Integer(), nullable=False),
+        sa.Column("latitude_sum", sa.Float(), nullable=False),
+        sa.Column("longitude_sum", sa.Float(), nullable=False),
+        sa.Column("min_price", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("max_price", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint("cell_precision", "cell"),
+    )
+    for precision in CLUSTER_PRECISIONS:
+        op.execute(
+            "INSERT INTO property_clusters"
+            " (cell_precision, cell, listing_count, latitude_sum, longitude_sum, min_price, max_price)"
+            f" SELECT {precision}, SUBSTR(geohash, 1, {precision}), COUNT(*),"
+            " SUM(latitude), SUM(longitude), MIN(price), MAX(price)"
+            " FROM properties WHERE geohash IS NOT NULL"
+            f" GROUP BY SUBSTR(geohash, 1, {precision})"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("property_clusters")
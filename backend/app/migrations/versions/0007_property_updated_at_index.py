@@ -0,0 +1,22 @@
+"""Index on properties.updated_at for the listing snapshot watermark.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_properties_updated_at", "properties", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_properties_updated_at", table_name="properties")
@@ -2,18 +2,24 @@
 
 from datetime import datetime
 from enum import Enum
+from pathlib import Path
 from sqlalchemy import (
     Boolean,
     DateTime,
     Enum as SAEnum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
+    inspect,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, validates
+
+from .geo import encode_geohash
+from .normalization import fold_text
 
 
 class Base(DeclarativeBase):
@@ -69,6 +75,21 @@ class Property(Base):
     """Real estate property that can be sold or rented."""
 
     __tablename__ = "properties"
+    # Composite indexes follow the list_properties filters, each ending with
+    # the (created_at, id) listing order so filtered pages are read in order.
+    __table_args__ = (
+        Index("ix_properties_created_at_id", "created_at", "id"),
+        Index("ix_properties_status_created_at", "status", "created_at", "id"),
+        Index("ix_properties_type_created_at", "property_type", "created_at", "id"),
+        Index("ix_properties_featured_created_at", "is_featured", "created_at", "id"),
+        Index("ix_properties_city_key_created_at", "city_key", "created_at", "id"),
+        Index("ix_properties_district_key_created_at", "district_key", "created_at", "id"),
+        Index("ix_properties_price", "price"),
+        Index("ix_properties_bedrooms", "bedrooms"),
+        Index("ix_properties_owner_id", "owner_id"),
+        Index("ix_properties_geohash", "geohash"),
+        Index("ix_properties_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -79,9 +100,14 @@ class Property(Base):
     bathrooms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     city: Mapped[str] = mapped_column(String(120), nullable=False)
     district: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    # Accent-folded copies of city/district, kept in sync by ``_fold_locality``.
+    city_key: Mapped[str] = mapped_column(String(120), nullable=False)
+    district_key: Mapped[str | None] = mapped_column(String(120), nullable=True)
     address: Mapped[str | None] = mapped_column(String(255), nullable=True)
     latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
     longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Spatial index key derived from latitude/longitude by ``_encode_location``.
+    geohash: Mapped[str | None] = mapped_column(String(12), nullable=True)
     property_type: Mapped[PropertyType] = mapped_column(
         SAEnum(PropertyType), nullable=False
     )
@@ -105,11 +131,31 @@ class Property(Base):
         cascade="all, delete-orphan",
     )
 
+    @validates("city", "district")
+    def _fold_locality(self, key: str, value: str | None) -> str | None:
+        """Refresh the searchable key whenever the city or district changes."""
+
+        setattr(self, f"{key}_key", fold_text(value))
+        return value
+
+    @validates("latitude", "longitude")
+    def _encode_location(self, key: str, value: float | None) -> float | None:
+        """Refresh the geohash whenever the coordinates change."""
+
+        latitude = value if key == "latitude" else self.latitude
+        longitude = value if key == "longitude" else self.longitude
+        if latitude is None or longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = encode_geohash(latitude, longitude)
+        return value
+
 
 class PropertyImage(Base):
     """Supplementary images associated with a property."""
 
     __tablename__ = "property_images"
+    __table_args__ = (Index("ix_property_images_property_id", "property_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     property_id: Mapped[int] = mapped_column(
@@ -125,6 +171,11 @@ class Favorite(Base):
     """Mapping between users and their favorite properties."""
 
     __tablename__ = "favorites"
+    __table_args__ = (
+        Index("uq_favorites_user_property", "user_id", "property_id", unique=True),
+        Index("ix_favorites_user_created_at", "user_id", "created_at"),
+        Index("ix_favorites_property_id", "property_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
@@ -139,7 +190,46 @@ class Favorite(Base):
     property: Mapped[Property] = relationship(back_populates="favorites")
 
 
-def init_db(engine) -> None:
-    """Create database tables based on the ORM metadata."""
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
 
-    Base.metadata.create_all(bind=engine)
+# Revision matching the schema that ``Base.metadata.create_all`` used to build.
+BASELINE_REVISION = "0001"
+
+
+class PropertyCluster(Base):
+    """Aggregate of the geolocated properties inside one geohash cell.
+
+    One row exists per cell and per precision, so a map viewport at any zoom
+    level is answered from a handful of rows instead of every listing.
+    """
+
+    __tablename__ = "property_clusters"
+
+    cell_precision: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cell: Mapped[str] = mapped_column(String(12), primary_key=True)
+    listing_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    latitude_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    longitude_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    min_price: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    max_price: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+
+
+def init_db(engine) -> None:
+    """Upgrade the database schema to the latest Alembic revision.
+
+    Databases created before migrations were introduced are stamped at the
+    baseline revision first, so their existing tables are adopted rather than
+    recreated.
+    """
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "properties" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -0,0 +1,47 @@
+"""Text normalization helpers used to build searchable keys."""
+
+import re
+import unicodedata
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _strip_accents(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def fold_text(value: str | None) -> str | None:
+    """Return an accent- and case-insensitive key for ``value``.
+
+    Diacritics are stripped, letters are case-folded and any run of
+    punctuation or whitespace collapses to a single space, so "Agoè-Nyivé",
+    "agoe nyive" and "AGOE NYIVE" share the key ``"agoe nyive"``.
+    """
+
+    if value is None:
+        return None
+    return _NON_ALNUM.sub(" ", _strip_accents(value)).strip()
+
+
+def fold_case(value: str) -> str:
+    """Return ``value`` case-folded and without accents, punctuation kept.
+
+    Unlike :func:`fold_text`, digits, operators and punctuation survive and
+    only runs of whitespace collapse, so "Maison à Lomé < 5M" becomes
+    ``"maison a lome < 5m"``. Typographic apostrophes become ``'``.
+    """
+
+    return _WHITESPACE.sub(" ", _strip_accents(value).replace("’", "'"))
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with ``prefix``.
+
+    ``key >= prefix AND key < prefix_upper_bound(prefix)`` is an index-friendly
+    equivalent of ``key LIKE 'prefix%'``.
+    """
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
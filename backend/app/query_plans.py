@@ -0,0 +1,125 @@
+"""Check that every listing filter shape is served by an index search.
+
+Runs ``EXPLAIN`` (SQLite or MySQL) on the statement built for each filter
+combination accepted by ``GET /api/v1/properties`` and exits with a non-zero
+status if one of them reads the properties table or a whole index instead of
+searching an index::
+
+    python -m app.query_plans
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import Connection, Select
+
+from . import schemas
+from .database import engine
+from .geo import BoundingBox
+from .models import PropertyStatus, PropertyType, init_db
+from .services.listings import apply_cursor, build_listing_query, encode_cursor
+
+
+FILTER_SHAPES: dict[str, schemas.PropertyFilters] = {
+    "default": schemas.PropertyFilters(),
+    "status": schemas.PropertyFilters(status=PropertyStatus.AVAILABLE),
+    "property_type": schemas.PropertyFilters(property_type=PropertyType.HOUSE),
+    "is_featured": schemas.PropertyFilters(is_featured=True),
+    "city": schemas.PropertyFilters(city="Lomé", locality_match=schemas.LocalityMatch.PREFIX),
+    "city_exact": schemas.PropertyFilters(
+        city="lome", locality_match=schemas.LocalityMatch.EXACT
+    ),
+    "district": schemas.PropertyFilters(
+        district="Agoè", locality_match=schemas.LocalityMatch.PREFIX
+    ),
+    "price_range": schemas.PropertyFilters(min_price=100000, max_price=500000),
+    "bedrooms": schemas.PropertyFilters(bedrooms=3),
+    "keywords": schemas.PropertyFilters(q="villa piscine"),
+    "near": schemas.PropertyFilters(near=(6.1375, 1.2123), radius_km=5),
+    "bbox": schemas.PropertyFilters(bbox=BoundingBox.parse("1.15,6.10,1.30,6.25")),
+    "status_type_price": schemas.PropertyFilters(
+        status=PropertyStatus.AVAILABLE,
+        property_type=PropertyType.APARTMENT,
+        max_price=500000,
+    ),
+}
+
+
+# Shapes without filters walk the ordering index and stop at the page limit:
+# a scan is the expected plan for them. So is it for a minimum number of
+# bedrooms: most listings have at least that many, and the walk finds a page
+# of them long before a search of ix_properties_bedrooms, then sorting every
+# match, would.
+ORDERED_SCAN_SHAPES = {"default", "bedrooms"}
+MYSQL_SEARCH_TYPES = {"const", "eq_ref", "ref", "ref_or_null", "range", "index_merge", "fulltext"}
+
+
+def listing_statements(dialect: str) -> dict[str, Select]:
+    """Return the first-page statement of every filter shape, plus a cursor page."""
+
+    statements = {
+        name: build_listing_query(filters, dialect=dialect).limit(50)
+        for name, filters in FILTER_SHAPES.items()
+    }
+    statements["cursor"] = apply_cursor(
+        build_listing_query(schemas.PropertyFilters(), dialect=dialect),
+        encode_cursor(datetime.utcnow(), 1),
+    ).limit(50)
+    return statements
+
+
+def explain(connection: Connection, statement: Select) -> list[str]:
+    """Return the query plan of ``statement`` as human-readable lines."""
+
+    sql = str(
+        statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    )
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").mappings()
+        return [row["detail"] for row in rows]
+
+    rows = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings()
+    return [
+        f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}"
+        for row in rows
+    ]
+
+
+def uses_index(plan: list[str], dialect: str, ordered_scan: bool = False) -> bool:
+    """Tell whether every step of ``plan`` on the properties table is an index search.
+
+    A scan of a whole index (``SCAN ... USING INDEX`` on SQLite, ``type=index``
+    on MySQL) only passes with ``ordered_scan``; a table scan never does.
+    """
+
+    for line in plan:
+        if dialect == "sqlite":
+            if line.split()[:2] == ["SCAN", "properties"] and not (ordered_scan and "USING INDEX" in line):
+                return False
+        elif line.startswith("properties:"):
+            access = line.split()[1].removeprefix("type=")
+            if "key=None" in line or not (
+                access in MYSQL_SEARCH_TYPES or (ordered_scan and access == "index")
+            ):
+                return False
+    return True
+
+
+def main() -> int:
+    init_db(engine)
+    failures = 0
+    with engine.connect() as connection:
+        for name, statement in listing_statements(connection.dialect.name).items():
+            plan = explain(connection, statement)
+            ok = uses_index(plan, connection.dialect.name, ordered_scan=name in ORDERED_SCAN_SHAPES)
+            failures += not ok
+            print(f"[{'ok' if ok else 'SCAN'}] {name}")
+            for line in plan:
+                print(f"    {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,11 @@
 """Pydantic schemas for request and response validation."""
 
 from datetime import datetime
+from enum import Enum
 from typing import Annotated
 from pydantic import BaseModel, EmailStr, Field
 
+from .geo import BoundingBox
 from .models import PropertyStatus, PropertyType
 
 
@@ -33,6 +35,12 @@ class UserRead(UserBase):
         from_attributes = True
 
 
+class UserToken(UserRead):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
 class PropertyImageBase(BaseModel):
     url: str
     is_primary: bool = False
@@ -99,6 +107,98 @@ class PropertyRead(PropertyBase):
         from_attributes = True
 
 
+class PropertyCard(BaseModel):
+    id: int
+    title: str
+    price: float
+    area: float | None = None
+    bedrooms: int | None = None
+    bathrooms: int | None = None
+    city: str
+    district: str | None = None
+    property_type: PropertyType
+    status: PropertyStatus
+    is_featured: bool
+    created_at: datetime
+    images: list[PropertyImageRead] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
+
+
+class ScoredPropertyCard(PropertyCard):
+    score: float
+
+
+class PropertyView(str, Enum):
+    FULL = "full"
+    CARD = "card"
+
+
+class PropertyClusterRead(BaseModel):
+    cell: str
+    count: int
+    latitude: float
+    longitude: float
+    min_price: float
+    max_price: float
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min_price: float
+    max_price: float
+    count: int
+
+
+class PriceStats(BaseModel):
+    min: float | None = None
+    median: float | None = None
+    max: float | None = None
+
+
+class PropertyFacets(BaseModel):
+    total: int
+    cities: list[FacetCount]
+    property_types: list[FacetCount]
+    statuses: list[FacetCount]
+    bedrooms: list[FacetCount]
+    price: PriceStats
+    price_histogram: list[PriceBucket]
+
+
+class ListingSort(str, Enum):
+    NEWEST = "newest"
+    DISTANCE = "distance"
+
+
+class LocalityMatch(str, Enum):
+    EXACT = "exact"
+    PREFIX = "prefix"
+    CONTAINS = "contains"
+
+
+class PropertyFilters(BaseModel):
+    q: str | None = None
+    city: str | None = None
+    district: str | None = None
+    locality_match: LocalityMatch = LocalityMatch.CONTAINS
+    property_type: PropertyType | None = None
+    status: PropertyStatus | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    bedrooms: int | None = None
+    bathrooms: int | None = None
+    is_featured: bool | None = None
+    near: tuple[float, float] | None = None
+    radius_km: float | None = None
+    bbox: BoundingBox | None = None
+
+
 class FavoriteRead(BaseModel):
     id: int
     property: PropertyRead
@@ -106,3 +206,30 @@ class FavoriteRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class FavoriteLookup(BaseModel):
+    property_ids: list[int] = Field(max_length=500)
+
+
+class FavoriteLookupResult(BaseModel):
+    favorited: list[int]
+
+
+class ListingFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class ImportRowError(BaseModel):
+    line: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    rows: int
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    elapsed_seconds: float
+    rows_per_second: float
@@ -1,9 +1,37 @@
-"""Security helpers for password hashing and verification."""
+"""Security helpers for password hashing, verification and access tokens."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
 
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_settings
+
+
+# Hashes made with another cost are reported by ``needs_update`` and
+# upgraded at the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=get_settings().bcrypt_rounds
+)
+
 
+# Forking a process that already runs threads (the event loop's thread pool,
+# database drivers) can deadlock the child on a lock held by another thread:
+# hashing workers start from a clean forkserver process instead, or are
+# spawned where forkserver is unavailable.
+HASHING_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+class InvalidToken(ValueError):
+    """Raised when an access token is malformed, forged or expired."""
 
 
 def get_password_hash(password: str) -> str:
@@ -16,3 +44,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Check whether the provided password matches the hash."""
 
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Check a password and return a new hash when the stored one uses an outdated cost."""
+
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated, size-limited process pool.
+
+    bcrypt costs 100-300 ms of CPU per call; in the event loop's thread pool
+    a burst of logins would hold the threads every other blocking call
+    needs. Here at most ``workers`` hashes run at once, in other processes,
+    and at most ``max_pending`` calls wait for them; further callers wait in
+    the event loop without holding anything. With ``workers=0`` hashing
+    falls back to the thread pool.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def start(self) -> None:
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(HASHING_START_METHOD)
+            )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Return whether the password matches, and a rehash if its cost changed."""
+
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    async def _run(self, function, *args):
+        if not self.workers:
+            return await run_in_threadpool(function, *args)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        self.start()
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(payload: str, secret: str) -> str:
+    return _b64encode(hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest())
+
+
+def create_access_token(user_id: int, *, ttl_seconds: int | None = None, now: float | None = None) -> str:
+    """Return a signed token identifying ``user_id`` until it expires.
+
+    The token is ``payload.signature``: a base64url JSON payload with the
+    subject and expiry, and its HMAC-SHA256 under the configured secret key.
+    """
+
+    settings = get_settings()
+    issued_at = int(now if now is not None else time.time())
+    expires_at = issued_at + (ttl_seconds if ttl_seconds is not None else settings.access_token_ttl_seconds)
+    payload = _b64encode(
+        json.dumps({"sub": user_id, "iat": issued_at, "exp": expires_at}, separators=(",", ":")).encode()
+    )
+    return f"{payload}.{_signature(payload, settings.secret_key)}"
+
+
+def decode_access_token(token: str, *, now: float | None = None) -> int:
+    """Return the user id of a valid token, without touching the database.
+
+    Raises :class:`InvalidToken` when the token is malformed, its signature
+    does not match or it has expired.
+    """
+
+    payload, _, signature = token.partition(".")
+    if not payload or not signature:
+        raise InvalidToken("Malformed token")
+    if not hmac.compare_digest(signature, _signature(payload, get_settings().secret_key)):
+        raise InvalidToken("Invalid token signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+        user_id, expires_at = int(claims["sub"]), float(claims["exp"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidToken("Malformed token") from exc
+    if expires_at <= (now if now is not None else time.time()):
+        raise InvalidToken("Token expired")
+    return user_id
+
+
+password_hasher = PasswordHasher(
+    workers=get_settings().password_hash_workers,
+    max_pending=get_settings().password_hash_max_pending,
+)
@@ -16,23 +16,29 @@ def seed() -> None:
 
         user = User(
             email="demo@smartimmo.tg",
-            full_name="Agent D?mo",
+            full_name="Agent Démo",
             phone_number="+22890000000",
             hashed_password=get_password_hash("DemoPass123!"),
+        )
+        # A separate administrator: token-less demo requests never act as a superuser.
+        admin = User(
+            email="admin@smartimmo.tg",
+            full_name="Administrateur",
+            hashed_password=get_password_hash("AdminPass123!"),
             is_superuser=True,
         )
-        db.add(user)
+        db.add_all([user, admin])
         db.flush()
 
         properties = [
             Property(
-                title="Appartement moderne ? Lom?",
-                description="Appartement de 3 chambres climatis?es, proche du centre-ville.",
+                title="Appartement moderne à Lomé",
+                description="Appartement de 3 chambres climatisées, proche du centre-ville.",
                 price=350000,
                 area=120,
                 bedrooms=3,
                 bathrooms=2,
-                city="Lom?",
+                city="Lomé",
                 district="Tokoin",
                 property_type=PropertyType.APARTMENT,
                 status=PropertyStatus.AVAILABLE,
@@ -51,8 +57,8 @@ def seed() -> None:
                 area=420,
                 bedrooms=5,
                 bathrooms=4,
-                city="Lom?",
-                district="Ago?",
+                city="Lomé",
+                district="Agoè",
                 property_type=PropertyType.HOUSE,
                 status=PropertyStatus.AVAILABLE,
                 owner_id=user.id,
@@ -64,11 +70,11 @@ def seed() -> None:
                 ],
             ),
             Property(
-                title="Terrain constructible ? Kpalim?",
-                description="Terrain viabilis? de 800 m? id?al pour un projet r?sidentiel.",
+                title="Terrain constructible à Kpalimé",
+                description="Terrain viabilisé de 800 m² idéal pour un projet résidentiel.",
                 price=18000000,
                 area=800,
-                city="Kpalim?",
+                city="Kpalimé",
                 property_type=PropertyType.LAND,
                 status=PropertyStatus.AVAILABLE,
                 owner_id=user.id,
@@ -1,5 +1,83 @@
 """Service layer utilities."""
 
-from .ai_agent import query_smart_agent
+from .ai_agent import (
+    AIOverloaded,
+    ai_admission,
+    extract_property_filters,
+    ollama_client,
+    query_smart_agent,
+    stream_smart_agent,
+    stream_stats,
+)
+from .ai_cache import prompt_cache
+from .bulk_import import ListingImporter
+from .clusters import clusters_in_box, rebuild_clusters
+from .conditional import is_not_modified, make_etag, validator_headers
+from .embeddings import refresh_embeddings, semantic_index, semantic_search, sync_embeddings
+from .export import export_listings, gzip_chunks
+from .facets import compute_facets
+from .listing_cache import listing_cache
+from .listings import (
+    apply_cursor,
+    apply_property_filters,
+    build_listing_query,
+    cards_query,
+    decode_cursor,
+    listing_rows_query,
+    listing_schema,
+    next_cursor,
+    property_matches,
+    property_snapshot,
+    property_version_query,
+    supports_cursor,
+)
+from .query_parser import ParsedQuery, parse_property_query
+from .similarity import FeatureRow, feature_query, similarity_index, similarity_score
+from .snapshot import listing_snapshot, snapshot_row
+from .user_cache import user_cache
 
-__all__ = ["query_smart_agent"]
+__all__ = [
+    "AIOverloaded",
+    "FeatureRow",
+    "ListingImporter",
+    "ParsedQuery",
+    "ai_admission",
+    "apply_cursor",
+    "apply_property_filters",
+    "build_listing_query",
+    "cards_query",
+    "clusters_in_box",
+    "compute_facets",
+    "decode_cursor",
+    "export_listings",
+    "extract_property_filters",
+    "feature_query",
+    "gzip_chunks",
+    "is_not_modified",
+    "listing_cache",
+    "listing_rows_query",
+    "listing_schema",
+    "listing_snapshot",
+    "make_etag",
+    "next_cursor",
+    "ollama_client",
+    "parse_property_query",
+    "prompt_cache",
+    "property_matches",
+    "property_snapshot",
+    "property_version_query",
+    "query_smart_agent",
+    "rebuild_clusters",
+    "refresh_embeddings",
+    "semantic_index",
+    "semantic_search",
+    "similarity_index",
+    "similarity_score",
+    "snapshot_row",
+    "stream_smart_agent",
+    "stream_stats",
+    "supports_cursor",
+    "sync_embeddings",
+    "user_cache",
+    "validator_headers",
+]
@@ -2,38 +2,453 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
 from typing import Any
 import httpx
 
-from ..config import get_settings
+from .. import schemas
+from ..config import Settings, get_settings
+from .ai_cache import prompt_cache
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
-async def query_smart_agent(prompt: str) -> dict[str, Any]:
+@dataclass
+class StreamStats:
+    """Counters describing streamed generations and their first-token latency."""
+
+    streams: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    last_ttft_ms: int = 0
+    avg_ttft_ms: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class StreamRecorder:
+    """Thread-safe accumulator of :class:`StreamStats`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = StreamStats()
+        self._ttft_total = 0.0
+        self._ttft_count = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self._stats.streams += 1
+
+    def first_token(self, ttft_ms: float) -> None:
+        with self._lock:
+            self._ttft_total += ttft_ms
+            self._ttft_count += 1
+            self._stats.last_ttft_ms = round(ttft_ms)
+            self._stats.avg_ttft_ms = round(self._ttft_total / self._ttft_count)
+
+    def finished(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self._stats, outcome, getattr(self._stats, outcome) + 1)
+
+    def stats(self) -> StreamStats:
+        with self._lock:
+            return StreamStats(**asdict(self._stats))
+
+
+class AIOverloaded(Exception):
+    """Raised when an AI request cannot be admitted.
+
+    ``status_code`` is 429 when the wait queue is full and 503 when the
+    request waited longer than the queue deadline; ``retry_after`` is a
+    hint in seconds for the client.
+    """
+
+    def __init__(self, status_code: int, retry_after: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+@dataclass
+class AdmissionStats:
+    """Occupancy and wait-time counters of the AI admission controller."""
+
+    in_flight: int = 0
+    queue_depth: int = 0
+    max_in_flight: int = 0
+    max_queue: int = 0
+    admitted: int = 0
+    queued: int = 0
+    rejected_queue_full: int = 0
+    rejected_timeout: int = 0
+    avg_wait_ms: int = 0
+    max_wait_ms: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class AdmissionController:
+    """Concurrency limiter in front of the Ollama instance.
+
+    At most ``max_in_flight`` generations run at once. Further requests wait
+    in a FIFO queue of at most ``max_queue`` entries for ``queue_timeout``
+    seconds; beyond that they are rejected immediately with
+    :class:`AIOverloaded` instead of piling up until the HTTP timeout.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._stats = AdmissionStats(max_in_flight=max_in_flight, max_queue=max_queue)
+        self._wait_total_ms = 0.0
+        self._service_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one generation slot for the duration of the block."""
+
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release()
+            elapsed = time.perf_counter() - started
+            # Moving average of generation time, used for Retry-After hints.
+            self._service_seconds = elapsed if not self._service_seconds else (
+                0.8 * self._service_seconds + 0.2 * elapsed
+            )
+
+    def retry_after(self) -> int:
+        """Estimate in seconds until the current queue has drained."""
+
+        pending = len(self._waiters) + self._in_flight
+        return max(1, math.ceil(self._service_seconds * pending / self.max_in_flight))
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._record_wait(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._stats.rejected_queue_full += 1
+            raise AIOverloaded(429, self.retry_after(), "AI assistant is busy, retry later")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats.rejected_timeout += 1
+            raise AIOverloaded(
+                503, self.retry_after(), "AI assistant did not become available in time"
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away.
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._record_wait(time.perf_counter() - started)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter, keeping FIFO order.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _record_wait(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        self._stats.admitted += 1
+        self._wait_total_ms += wait_ms
+        self._stats.avg_wait_ms = round(self._wait_total_ms / self._stats.admitted)
+        self._stats.max_wait_ms = max(self._stats.max_wait_ms, round(wait_ms))
+
+    def stats(self) -> AdmissionStats:
+        return AdmissionStats(
+            **{**asdict(self._stats), "in_flight": self._in_flight, "queue_depth": len(self._waiters)}
+        )
+
+
+class OllamaClient:
+    """Application-scoped HTTP client for the Ollama inference server.
+
+    A single ``httpx.AsyncClient`` is shared by every AI request so that
+    connections to Ollama are pooled and kept alive between calls. The
+    client is opened on application startup and closed on shutdown; it is
+    also created lazily if used outside the application lifecycle.
+    """
+
+    def __init__(self, config: Settings) -> None:
+        self.settings = config
+        self._client: httpx.AsyncClient | None = None
+        self._warm_up_task: asyncio.Task[None] | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the pooled client, opening it on first use."""
+
+        return self.open()
+
+    def open(self) -> httpx.AsyncClient:
+        """Create the pooled client unless it is already open."""
+
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.settings.ollama_host,
+                limits=httpx.Limits(
+                    max_connections=self.settings.ollama_max_connections,
+                    max_keepalive_connections=self.settings.ollama_max_keepalive_connections,
+                    keepalive_expiry=self.settings.ollama_keepalive_expiry_seconds,
+                ),
+                timeout=httpx.Timeout(
+                    self.settings.ollama_read_timeout_seconds,
+                    connect=self.settings.ollama_connect_timeout_seconds,
+                ),
+            )
+        return self._client
+
+    async def start(self) -> None:
+        """Open the connection pool and schedule the model warm-up."""
+
+        self.open()
+        if self.settings.ollama_warm_up and self._warm_up_task is None:
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def close(self) -> None:
+        """Cancel a pending warm-up and release pooled connections."""
+
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            try:
+                await self._warm_up_task
+            except asyncio.CancelledError:
+                pass
+            self._warm_up_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def warm_up(self) -> None:
+        """Ask Ollama to load the configured model into memory.
+
+        A generate call without a prompt only loads the model, so the first
+        user request does not pay for it. Failures are logged and ignored:
+        the API must start even when Ollama is not reachable yet.
+        """
+
+        try:
+            await self.generate("")
+        except httpx.HTTPError as exc:
+            logger.warning("Ollama warm-up of %s failed: %s", self.settings.ollama_model, exc)
+
+    def payload(self, prompt: str, **options: Any) -> dict[str, Any]:
+        """Build a ``/api/generate`` request body for the configured model."""
+
+        payload: dict[str, Any] = {
+            "model": self.settings.ollama_model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.settings.ollama_keep_alive,
+        }
+        payload.update(options)
+        return payload
+
+    async def generate(self, prompt: str, **options: Any) -> dict[str, Any]:
+        """Run a non-streaming generation and return Ollama's JSON body."""
+
+        response = await self.client.post("/api/generate", json=self.payload(prompt, **options))
+        response.raise_for_status()
+        return response.json()
+
+    async def embed(self, text: str) -> list[float]:
+        """Return the embedding of ``text`` computed by the embedding model."""
+
+        response = await self.client.post(
+            "/api/embeddings",
+            json={
+                "model": self.settings.ollama_embedding_model,
+                "prompt": text,
+                "keep_alive": self.settings.ollama_keep_alive,
+            },
+        )
+        response.raise_for_status()
+        return response.json()["embedding"]
+
+    async def stream(self, prompt: str, **options: Any) -> AsyncIterator[dict[str, Any]]:
+        """Run a streaming generation and yield Ollama's NDJSON chunks.
+
+        Closing the iterator closes the upstream connection, which makes
+        Ollama abort the generation.
+        """
+
+        payload = self.payload(prompt, **options)
+        payload["stream"] = True
+        async with self.client.stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+ollama_client = OllamaClient(settings)
+stream_stats = StreamRecorder()
+ai_admission = AdmissionController(
+    max_in_flight=settings.ai_max_in_flight,
+    max_queue=settings.ai_max_queue,
+    queue_timeout=settings.ai_queue_timeout_seconds,
+)
+
+
+FILTER_EXTRACTION_SYSTEM = """You convert real estate search requests (French or English) made in Togo
+into JSON search filters. Reply with a single JSON object using only these keys,
+omitting any you cannot infer:
+city (string), district (string),
+property_type ("apartment", "house", "land" or "commercial"),
+status ("available", "pending", "sold" or "rented"),
+min_price (number, FCFA), max_price (number, FCFA),
+bedrooms (minimum number), bathrooms (minimum number),
+q (remaining keywords such as amenities, as a short string)."""
+
+FILTER_FIELDS = frozenset(
+    {"city", "district", "property_type", "status", "min_price", "max_price", "bedrooms", "bathrooms", "q"}
+)
+
+
+async def _generate_cached(
+    prompt: str, cache_options: dict[str, Any] | None = None, **generate_options: Any
+) -> dict[str, Any]:
+    """Run a generation through the prompt cache and the admission controller."""
+
+    async def generate() -> dict[str, Any]:
+        async with ai_admission.slot():
+            data = await ollama_client.generate(prompt, **generate_options)
+        return {"model": settings.ollama_model, "response": data.get("response", "")}
+
+    key = prompt_cache.key(prompt, settings.ollama_model, cache_options)
+    return await prompt_cache.get_or_generate(key, generate)
+
+
+async def query_smart_agent(prompt: str, options: dict[str, Any] | None = None) -> dict[str, Any]:
     """Send a natural language request to the Ollama model and return the response.
 
+    Answers are served from the prompt cache when an equivalent prompt was
+    already answered, and concurrent identical prompts share one generation.
+    Generations go through :data:`ai_admission` and may raise
+    :class:`AIOverloaded`.
+
     Parameters
     ----------
     prompt:
         User-provided natural language query regarding real estate needs.
+    options:
+        Optional Ollama generation options (temperature, seed…).
     """
 
-    payload = {
-        "model": settings.ollama_model,
+    generate_options = {"options": options} if options else {}
+    result = await _generate_cached(prompt, options, **generate_options)
+
+    return {
+        "model": result["model"],
         "prompt": prompt,
-        "stream": False,
+        "response": result["response"],
     }
 
-    async with httpx.AsyncClient(base_url=settings.ollama_host, timeout=60) as client:
-        response = await client.post("/api/generate", content=json.dumps(payload))
-        response.raise_for_status()
-        data = response.json()
 
-    return {
-        "model": payload["model"],
-        "prompt": prompt,
-        "response": data.get("response", ""),
+async def extract_property_filters(prompt: str) -> schemas.PropertyFilters:
+    """Ask the model, in JSON mode, for the listing filters described by ``prompt``.
+
+    Raises ``ValueError`` when the model does not answer with usable filters,
+    in addition to the errors of :func:`query_smart_agent`.
+    """
+
+    result = await _generate_cached(
+        prompt,
+        {"task": "filters", "format": "json"},
+        system=FILTER_EXTRACTION_SYSTEM,
+        format="json",
+        options={"temperature": 0},
+    )
+    try:
+        data = json.loads(result["response"])
+    except json.JSONDecodeError as exc:
+        raise ValueError("The model did not return JSON filters") from exc
+    if not isinstance(data, dict):
+        raise ValueError("The model did not return a JSON object")
+
+    values = {
+        name: value
+        for name, value in data.items()
+        if name in FILTER_FIELDS and value not in (None, "", [], {})
     }
+    if isinstance(values.get("property_type"), str):
+        values["property_type"] = values["property_type"].lower()
+    if isinstance(values.get("status"), str):
+        values["status"] = values["status"].lower()
+    return schemas.PropertyFilters.model_validate(values)
+
+
+async def stream_smart_agent(prompt: str) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Stream the model's answer as ``(event, data)`` pairs.
+
+    ``token`` events carry the generated text as it arrives; a final
+    ``done`` event reports the time to first token (``ttft_ms``), the total
+    duration and the number of generated tokens. If the consumer stops
+    iterating (client disconnect), the upstream request is closed and the
+    stream is counted as cancelled. The stream holds an admission slot until
+    it ends; the time to first token includes the wait for that slot.
+    """
+
+    stream_stats.started()
+    started = time.perf_counter()
+    ttft_ms: float | None = None
+    outcome = "failed"
+    try:
+        async with ai_admission.slot():
+            async for chunk in ollama_client.stream(prompt):
+                text = chunk.get("response", "")
+                if text and ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                    stream_stats.first_token(ttft_ms)
+                if text:
+                    yield "token", {"response": text}
+                if chunk.get("done"):
+                    outcome = "completed"
+                    yield "done", {
+                        "model": chunk.get("model", settings.ollama_model),
+                        "ttft_ms": round(ttft_ms) if ttft_ms is not None else None,
+                        "total_ms": round((time.perf_counter() - started) * 1000),
+                        "tokens": chunk.get("eval_count"),
+                    }
+                    return
+    except (asyncio.CancelledError, GeneratorExit):
+        if outcome != "completed":
+            outcome = "cancelled"
+        raise
+    finally:
+        stream_stats.finished(outcome)
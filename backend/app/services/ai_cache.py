@@ -0,0 +1,115 @@
+"""Cache of AI agent answers with coalescing of concurrent identical prompts.
+
+Visitors ask the assistant the same few questions ("maison à Lomé 3
+chambres"), so answers are cached under the normalized prompt, the model and
+the generation options. While a prompt is being generated, identical prompts
+wait for that generation instead of starting their own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from ..config import get_settings
+from ..normalization import fold_case
+from .cache import CacheBackend, CacheStats, create_cache_backend
+
+
+@dataclass
+class PromptCacheStats(CacheStats):
+    """Cache counters plus the number of requests served by an in-flight generation."""
+
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+class PromptCache:
+    """Answer cache keyed by normalized prompt, model and options."""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True) -> None:
+        self.backend = backend
+        self.enabled = enabled
+        self._in_flight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    @staticmethod
+    def key(prompt: str, model: str, options: dict[str, Any] | None = None) -> str:
+        """Return a key identical for prompts differing only by case, accents or spacing.
+
+        Digits and punctuation are kept: "maison < 5M" and "maison > 5M", or
+        "3-4 chambres" and "34 chambres", are different questions.
+        """
+
+        return json.dumps(
+            {"prompt": fold_case(prompt).strip(), "model": model, "options": options or {}},
+            sort_keys=True,
+            default=str,
+        )
+
+    async def get_or_generate(
+        self, key: str, generate: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        """Return the cached answer for ``key`` or run ``generate`` once for all callers.
+
+        The generation runs in its own task: a caller that goes away does not
+        cancel it for the others. Failures are not cached and are raised to
+        every waiter.
+        """
+
+        if not self.enabled:
+            return await generate()
+
+        cached = self.backend.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            with self._lock:
+                self._coalesced += 1
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(self._generate(key, generate))
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _generate(
+        self, key: str, generate: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        try:
+            result = await generate()
+            self.backend.set(key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> PromptCacheStats:
+        with self._lock:
+            coalesced = self._coalesced
+        return PromptCacheStats(
+            **asdict(self.backend.stats()), coalesced=coalesced, in_flight=len(self._in_flight)
+        )
+
+
+def _create_prompt_cache() -> PromptCache:
+    settings = get_settings()
+    options: dict[str, Any] = {
+        "max_entries": settings.ai_cache_max_entries,
+        "ttl_seconds": settings.ai_cache_ttl_seconds,
+    }
+    if settings.ai_cache_backend == "disk":
+        options["path"] = settings.ai_cache_path
+    backend = create_cache_backend(settings.ai_cache_backend, **options)
+    return PromptCache(backend, enabled=settings.ai_cache_enabled)
+
+
+prompt_cache = _create_prompt_cache()
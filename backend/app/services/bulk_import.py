@@ -0,0 +1,317 @@
+"""Bulk import of listings from CSV or JSON Lines.
+
+The input is read as it arrives and every row is validated with
+:class:`~app.schemas.PropertyCreate`. Valid rows are written in batches, each
+in a transaction of its own: the properties (one prepared statement on SQLite,
+one ``INSERT`` per row on MySQL), one ``INSERT`` for their images and three
+statements for the map clusters. A batch the database rejects is split in
+halves until the offending rows are isolated, so that only they fail.
+
+CSV files have a header row naming :class:`~app.schemas.PropertyCreate`
+fields; empty cells are left unset and the ``images`` column lists image URLs
+separated by ``|``, the first one being the primary image. JSON Lines files
+hold one ``PropertyCreate`` object per line.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import time
+from collections.abc import AsyncIterable
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..config import get_settings
+from ..geo import encode_geohash
+from ..models import Property, PropertyImage
+from ..normalization import fold_text
+from .clusters import add_to_clusters
+from .listing_cache import listing_cache
+from .similarity import NUMERIC_FEATURES, FeatureRow, similarity_index
+from .snapshot import SNAPSHOT_COLUMNS, listing_snapshot
+
+
+CSV_IMAGE_SEPARATOR = "|"
+# Bounds the listings held in memory and the length of a batch's transaction.
+MAX_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+class MalformedInput(ValueError):
+    """Input that cannot be read any further, e.g. bytes that are not UTF-8."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(message)
+        self.line = line
+
+
+class RecordReader:
+    """Split CSV or JSON Lines input, fed in chunks of any size, into records.
+
+    Records are ``(line, text)`` pairs where ``line`` is the 1-based line the
+    record starts on. A quoted CSV field may span lines: a CSV record ends at
+    the first line end outside quotes. The CSV header is kept in ``header``.
+    """
+
+    def __init__(self, import_format: schemas.ListingFormat) -> None:
+        self.format = import_format
+        self.header: list[str] | None = None
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._tail = ""
+        self._line = 0
+        self._start = 0
+        self._pending: list[str] = []
+        self._quotes = 0
+
+    def feed(self, chunk: bytes) -> list[tuple[int, str]]:
+        """Return the records completed by ``chunk``."""
+
+        lines = (self._tail + self._decode(chunk, final=False)).split("\n")
+        self._tail = lines.pop()
+        return self._records(lines)
+
+    def close(self) -> list[tuple[int, str]]:
+        """Return the records left at the end of the input."""
+
+        lines = (self._tail + self._decode(b"", final=True)).split("\n")
+        self._tail = ""
+        records = self._records(lines)
+        if self._pending:
+            # An unterminated quoted field; parsing it reports the error.
+            records.append((self._start, "".join(self._pending)))
+            self._pending = []
+        return records
+
+    def _decode(self, chunk: bytes, final: bool) -> str:
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError as exc:
+            line = self._line + 1 + chunk[: exc.start].count(b"\n")
+            raise MalformedInput(line, "Input is not valid UTF-8 text") from exc
+
+    def _records(self, lines: list[str]) -> list[tuple[int, str]]:
+        records = []
+        for line in lines:
+            self._line += 1
+            if self.format is schemas.ListingFormat.JSONL:
+                if line.strip():
+                    records.append((self._line, line))
+                continue
+            if not self._pending:
+                if not line.strip():
+                    continue
+                self._start = self._line
+            self._pending.append(line + "\n")
+            self._quotes += line.count('"')
+            if self._quotes % 2:
+                continue
+            text = "".join(self._pending)
+            self._pending, self._quotes = [], 0
+            if self.header is None:
+                self.header = [name.strip() for name in next(csv.reader([text]))]
+            else:
+                records.append((self._start, text))
+        return records
+
+
+def parse_listing(
+    text: str, import_format: schemas.ListingFormat, header: list[str] | None = None
+) -> schemas.PropertyCreate:
+    """Validate one record of an import file.
+
+    Raises ``ValueError`` (including pydantic's ``ValidationError``) or
+    ``csv.Error`` when the record is not a valid listing.
+    """
+
+    if import_format is schemas.ListingFormat.JSONL:
+        return schemas.PropertyCreate.model_validate_json(text)
+    fields = next(csv.reader([text], strict=True))
+    if len(fields) > len(header or ()):
+        raise ValueError(f"{len(fields)} fields for {len(header or ())} columns in the header")
+    record: dict = {name: value.strip() for name, value in zip(header, fields) if value.strip()}
+    images = record.pop("images", None)
+    if images:
+        urls = [url.strip() for url in images.split(CSV_IMAGE_SEPARATOR) if url.strip()]
+        record["images"] = [{"url": url, "is_primary": index == 0} for index, url in enumerate(urls)]
+    return schemas.PropertyCreate.model_validate(record)
+
+
+async def insert_properties(db: AsyncSession, rows: list[dict]) -> list[int]:
+    """Insert property rows and return their ids, in the order of ``rows``.
+
+    On SQLite, whose writers are serialized, one prepared statement is
+    executed for all the rows and they get consecutive ids ending at the
+    last one reported. MySQL's interleaved auto-increment locking
+    (``innodb_autoinc_lock_mode=2``, the default of MySQL 8) gives no such
+    guarantee while other inserts run, so every row is inserted on its own
+    and its id read back; the rows still share the caller's transaction.
+    """
+
+    dialect = db.bind.dialect.name
+    if dialect == "mysql":
+        return [(await db.execute(insert(Property).values(row))).lastrowid for row in rows]
+    if dialect == "sqlite":
+        # render_nulls keeps rows with different NULL columns in one executemany.
+        await db.execute(insert(Property).execution_options(render_nulls=True), rows)
+        last = await db.scalar(select(func.last_insert_rowid()))
+        return list(range(last - len(rows) + 1, last + 1))
+    raise ValueError(f"Unsupported database dialect: {dialect}")
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    if isinstance(exc, DBAPIError):
+        return str(exc.orig)
+    return str(exc)
+
+
+class ListingImporter:
+    """Validate listings from an import file and write them in batches.
+
+    Every committed batch is also applied to this worker's listing cache,
+    similarity index and listing snapshot. Embeddings are left to the caller:
+    ``property_ids`` holds the ids of the imported listings.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        owner_id: int,
+        import_format: schemas.ListingFormat,
+        batch_size: int | None = None,
+    ) -> None:
+        self.db = db
+        self.owner_id = owner_id
+        self.format = import_format
+        batch_size = batch_size or get_settings().bulk_import_batch_size
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.property_ids: list[int] = []
+        self.rows = 0
+        self.failed = 0
+        self.errors: list[schemas.ImportRowError] = []
+        self._batch: list[tuple[int, schemas.PropertyCreate]] = []
+
+    async def run(self, chunks: AsyncIterable[bytes]) -> schemas.ImportReport:
+        """Import the listings read from ``chunks`` and report the outcome.
+
+        Batches are committed as they fill up; rejected rows are skipped and
+        reported. Input that is not UTF-8 text stops the import.
+        """
+
+        started = time.perf_counter()
+        reader = RecordReader(self.format)
+        try:
+            async for chunk in chunks:
+                await self._add_records(reader, reader.feed(chunk))
+            await self._add_records(reader, reader.close())
+        except MalformedInput as exc:
+            self._fail(exc.line, exc)
+        await self._flush()
+
+        elapsed = time.perf_counter() - started
+        return schemas.ImportReport(
+            rows=self.rows,
+            imported=len(self.property_ids),
+            failed=self.failed,
+            errors=self.errors,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(self.rows / elapsed, 1) if elapsed else 0.0,
+        )
+
+    async def _add_records(self, reader: RecordReader, records: list[tuple[int, str]]) -> None:
+        for line, text in records:
+            self.rows += 1
+            try:
+                listing = parse_listing(text, self.format, reader.header)
+            except (ValueError, csv.Error) as exc:
+                self._fail(line, exc)
+                continue
+            self._batch.append((line, listing))
+            if len(self._batch) >= self.batch_size:
+                await self._flush()
+
+    def _fail(self, line: int, exc: Exception) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(schemas.ImportRowError(line=line, message=_error_message(exc)))
+
+    async def _flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if batch:
+            await self._write_or_split(batch)
+
+    async def _write_or_split(self, batch: list[tuple[int, schemas.PropertyCreate]]) -> None:
+        try:
+            await self._write(batch)
+        except DBAPIError as exc:
+            await self.db.rollback()
+            if len(batch) == 1:
+                self._fail(batch[0][0], exc)
+                return
+            # Bisect down to the rows the database rejects; the others are
+            # still written in (smaller) batches.
+            middle = len(batch) // 2
+            await self._write_or_split(batch[:middle])
+            await self._write_or_split(batch[middle:])
+
+    async def _write(self, batch: list[tuple[int, schemas.PropertyCreate]]) -> None:
+        now = datetime.utcnow()
+        rows = [self._property_values(listing, now) for _, listing in batch]
+        ids = await insert_properties(self.db, rows)
+
+        images = [
+            {"property_id": property_id, **image.model_dump()}
+            for property_id, (_, listing) in zip(ids, batch)
+            for image in listing.images or []
+        ]
+        if images:
+            await self.db.execute(insert(PropertyImage), images)
+        locations = [
+            (row["geohash"], row["latitude"], row["longitude"], row["price"])
+            for row in rows
+            if row["geohash"]
+        ]
+        if locations:
+            await self.db.run_sync(lambda session: add_to_clusters(session.connection(), locations))
+        await self.db.commit()
+
+        self.property_ids.extend(ids)
+        listing_cache.clear()
+        for property_id, row in zip(ids, rows):
+            values = {**row, "id": property_id}
+            if similarity_index.loaded:
+                similarity_index.upsert(
+                    FeatureRow.from_values(
+                        property_id,
+                        *(values[name] for name in NUMERIC_FEATURES),
+                        values["property_type"],
+                        values["city_key"],
+                        values["status"],
+                    )
+                )
+            if listing_snapshot.loaded:
+                listing_snapshot.upsert(tuple(values[column.key] for column in SNAPSHOT_COLUMNS))
+
+    def _property_values(self, listing: schemas.PropertyCreate, now: datetime) -> dict:
+        # Bulk inserts bypass the model validators: derive their columns here.
+        values = listing.model_dump(exclude={"images"})
+        latitude, longitude = values["latitude"], values["longitude"]
+        values.update(
+            city_key=fold_text(values["city"]),
+            district_key=fold_text(values["district"]),
+            geohash=None if latitude is None or longitude is None else encode_geohash(latitude, longitude),
+            owner_id=self.owner_id,
+            created_at=now,
+            updated_at=now,
+        )
+        return values
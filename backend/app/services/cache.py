@@ -0,0 +1,223 @@
+"""Pluggable key/value caches with LRU and TTL eviction."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a cache has been used."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+    max_entries: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class CacheBackend(ABC):
+    """Storage used by the application caches.
+
+    The in-process :class:`MemoryCache` is the default; a shared store (Redis,
+    memcached…) only needs to implement these methods, storing values it
+    cannot hold natively in a serialized form.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Return the live value stored under ``key``, or ``None``."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key``."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove ``key``; return whether it was present."""
+
+    @abstractmethod
+    def items(self) -> Iterator[tuple[str, Any]]:
+        """Iterate over the live entries."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the usage counters."""
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl_seconds``."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats(max_entries=max_entries)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._stats.invalidations += 1
+            return True
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+        return iter(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "size": len(self._entries)})
+
+
+class DiskCache(CacheBackend):
+    """LRU cache with expiring entries persisted in a local SQLite file.
+
+    Entries survive process restarts. Values are stored as JSON, so only
+    JSON-serializable values (dicts, lists, strings, numbers) can be cached.
+    """
+
+    def __init__(self, path: str, max_entries: int = 512, ttl_seconds: float = 60.0) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = CacheStats(max_entries=max_entries)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at)"
+        )
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._stats.hits += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_seconds, now),
+            )
+            overflow = self._size() - self.max_entries
+            if overflow > 0:
+                self._connection.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._stats.evictions += overflow
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM cache_entries WHERE key = ?", (key,)
+            ).rowcount
+            self._stats.invalidations += deleted
+            return bool(deleted)
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, value FROM cache_entries WHERE expires_at > ?", (time.time(),)
+            ).fetchall()
+        return ((key, json.loads(value)) for key, value in rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.invalidations += self._connection.execute(
+                "DELETE FROM cache_entries"
+            ).rowcount
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "size": self._size()})
+
+    def _size(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+CACHE_BACKENDS: dict[str, type[CacheBackend]] = {"disk": DiskCache, "memory": MemoryCache}
+
+
+def create_cache_backend(name: str, **options: Any) -> CacheBackend:
+    """Instantiate the cache backend registered under ``name``."""
+
+    try:
+        backend_class = CACHE_BACKENDS[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown cache backend {name!r}") from exc
+    return backend_class(**options)
@@ -0,0 +1,347 @@
+"""Map clusters of geolocated properties, maintained incrementally.
+
+``property_clusters`` holds, for every geohash cell at precisions 1 to 8, the
+number of listings, the sums needed for their centroid and their price range.
+A ``before_flush``/``after_flush`` listener applies each property insert,
+update or delete as a delta to the cells it touches. A flush costs at most one
+upsert for the added listings and four statements for the removed ones,
+whatever their number, and reads never aggregate raw listings.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import (
+    Connection,
+    Float,
+    and_,
+    bindparam,
+    case,
+    delete,
+    event,
+    func,
+    inspect,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from ..geo import BoundingBox, covering_geohashes
+from ..models import Property, PropertyCluster
+from ..normalization import prefix_upper_bound
+
+
+CLUSTER_PRECISIONS = range(1, 9)
+
+# Geohash precision giving a few dozen cells across a typical viewport, by zoom.
+ZOOM_PRECISIONS = (1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 6, 7, 7)
+
+
+def precision_for_zoom(zoom: int) -> int:
+    """Return the cluster precision used at a web-map zoom level."""
+
+    if zoom >= len(ZOOM_PRECISIONS):
+        return CLUSTER_PRECISIONS[-1]
+    return ZOOM_PRECISIONS[max(zoom, 0)]
+
+
+def clusters_in_box(box: BoundingBox, zoom: int):
+    """Return the select statement of the clusters shown in ``box`` at ``zoom``."""
+
+    precision = precision_for_zoom(zoom)
+    prefixes = sorted({cell[:precision] for cell in covering_geohashes(box)})
+    statement = select(PropertyCluster).where(PropertyCluster.cell_precision == precision)
+    if prefixes:
+        statement = statement.where(
+            or_(
+                *(
+                    and_(PropertyCluster.cell >= prefix, PropertyCluster.cell < prefix_upper_bound(prefix))
+                    for prefix in prefixes
+                )
+            )
+        )
+    latitude = PropertyCluster.latitude_sum / PropertyCluster.listing_count
+    longitude = PropertyCluster.longitude_sum / PropertyCluster.listing_count
+    return statement.where(
+        latitude.between(box.min_lat, box.max_lat),
+        longitude.between(box.min_lon, box.max_lon),
+    ).order_by(PropertyCluster.cell)
+
+
+def rebuild_clusters(connection: Connection) -> None:
+    """Recompute every cluster from the properties table."""
+
+    connection.execute(delete(PropertyCluster))
+    for precision in CLUSTER_PRECISIONS:
+        cell = func.substr(Property.geohash, 1, precision)
+        connection.execute(
+            insert(PropertyCluster).from_select(
+                [
+                    "cell_precision",
+                    "cell",
+                    "listing_count",
+                    "latitude_sum",
+                    "longitude_sum",
+                    "min_price",
+                    "max_price",
+                ],
+                select(
+                    precision,
+                    cell,
+                    func.count(),
+                    func.sum(Property.latitude),
+                    func.sum(Property.longitude),
+                    func.min(Property.price),
+                    func.max(Property.price),
+                )
+                .where(Property.geohash.is_not(None))
+                .group_by(cell),
+            )
+        )
+
+
+@dataclass(frozen=True)
+class _Contribution:
+    """What one property adds to the clusters containing it."""
+
+    geohash: str
+    latitude: float
+    longitude: float
+    price: Decimal
+
+
+def _current(obj: Property) -> _Contribution | None:
+    if not obj.geohash:
+        return None
+    return _Contribution(obj.geohash, obj.latitude, obj.longitude, Decimal(obj.price))
+
+
+def _committed(obj: Property) -> _Contribution | None:
+    """Return the contribution of ``obj`` as last stored in the database."""
+
+    state = inspect(obj)
+    values = {}
+    for name in ("geohash", "latitude", "longitude", "price"):
+        history = state.attrs[name].history
+        previous = history.deleted or history.unchanged
+        values[name] = previous[0] if previous else None
+    if not values["geohash"]:
+        return None
+    return _Contribution(
+        values["geohash"], values["latitude"], values["longitude"], Decimal(values["price"])
+    )
+
+
+# Cells looked up per statement when removing listings (two parameters each).
+CELL_LOOKUP_CHUNK = 400
+
+
+def _cell_deltas(items: list[_Contribution]) -> dict[tuple[int, str], list]:
+    """Sum ``items`` per cell: count, latitude and longitude sums, price range."""
+
+    deltas: dict[tuple[int, str], list] = {}
+    for item in items:
+        for precision in CLUSTER_PRECISIONS:
+            delta = deltas.get((precision, item.geohash[:precision]))
+            if delta is None:
+                deltas[(precision, item.geohash[:precision])] = [
+                    1, item.latitude, item.longitude, item.price, item.price
+                ]
+            else:
+                delta[0] += 1
+                delta[1] += item.latitude
+                delta[2] += item.longitude
+                delta[3] = min(delta[3], item.price)
+                delta[4] = max(delta[4], item.price)
+    return deltas
+
+
+def _upsert_cells(dialect: str):
+    """Return the statement adding a delta to a cell, creating the cell if needed."""
+
+    if dialect == "sqlite":
+        statement = sqlite.insert(PropertyCluster)
+        added = statement.excluded
+    elif dialect == "mysql":
+        statement = mysql.insert(PropertyCluster)
+        added = statement.inserted
+    else:
+        raise ValueError(f"Unsupported database dialect: {dialect}")
+    values = {
+        "listing_count": PropertyCluster.listing_count + added.listing_count,
+        "latitude_sum": PropertyCluster.latitude_sum + added.latitude_sum,
+        "longitude_sum": PropertyCluster.longitude_sum + added.longitude_sum,
+        "min_price": case(
+            (PropertyCluster.min_price > added.min_price, added.min_price),
+            else_=PropertyCluster.min_price,
+        ),
+        "max_price": case(
+            (PropertyCluster.max_price < added.max_price, added.max_price),
+            else_=PropertyCluster.max_price,
+        ),
+    }
+    if dialect == "sqlite":
+        return statement.on_conflict_do_update(
+            index_elements=[PropertyCluster.cell_precision, PropertyCluster.cell], set_=values
+        )
+    return statement.on_duplicate_key_update(values)
+
+
+def _add(connection: Connection, items: list[_Contribution]) -> None:
+    # Listings sharing a cell are added together, and all the cells touched
+    # take one upsert: concurrent writes creating the same cell add up
+    # instead of colliding on its primary key.
+    rows = [
+        {
+            "cell_precision": precision,
+            "cell": cell,
+            "listing_count": count,
+            "latitude_sum": latitude,
+            "longitude_sum": longitude,
+            "min_price": low,
+            "max_price": high,
+        }
+        for (precision, cell), (count, latitude, longitude, low, high) in _cell_deltas(items).items()
+    ]
+    if rows:
+        connection.execute(_upsert_cells(connection.dialect.name), rows)
+
+
+def add_to_clusters(
+    connection: Connection, locations: Iterable[tuple[str, float, float, float | Decimal]]
+) -> None:
+    """Add new listings, given as ``(geohash, latitude, longitude, price)``, to their clusters.
+
+    For writes made without the ORM session, whose flush listener keeps the
+    clusters up to date otherwise.
+    """
+
+    _add(
+        connection,
+        [
+            _Contribution(geohash, latitude, longitude, Decimal(price))
+            for geohash, latitude, longitude, price in locations
+        ],
+    )
+
+
+_CELL_KEY = and_(
+    PropertyCluster.cell_precision == bindparam("key_precision"),
+    PropertyCluster.cell == bindparam("key_cell"),
+)
+
+# Subtracts the delta of one cell; executed once for all the cells of a write.
+_SUBTRACT_FROM_CELL = (
+    update(PropertyCluster)
+    .where(_CELL_KEY)
+    .values(
+        listing_count=PropertyCluster.listing_count - bindparam("delta_count"),
+        latitude_sum=PropertyCluster.latitude_sum - bindparam("delta_latitude", type_=Float),
+        longitude_sum=PropertyCluster.longitude_sum - bindparam("delta_longitude", type_=Float),
+    )
+)
+
+# Recomputes the price range of one cell from its listings.
+_IN_CELL = and_(Property.geohash >= bindparam("key_cell"), Property.geohash < bindparam("cell_end"))
+_RESCAN_CELL = (
+    update(PropertyCluster)
+    .where(_CELL_KEY)
+    .values(
+        min_price=select(func.min(Property.price)).where(_IN_CELL).scalar_subquery(),
+        max_price=select(func.max(Property.price)).where(_IN_CELL).scalar_subquery(),
+    )
+)
+
+
+def _remove(connection: Connection, items: list[_Contribution]) -> None:
+    # Listings sharing a cell are removed together, and all the cells touched
+    # take four statements: one update executed for each of them, one delete
+    # of the emptied ones, a lookup of the remaining price ranges and one
+    # rescan executed for the cells whose range may have lost a bound.
+    deltas = _cell_deltas(items)
+    connection.execute(
+        _SUBTRACT_FROM_CELL,
+        [
+            {
+                "key_precision": precision,
+                "key_cell": cell,
+                "delta_count": count,
+                "delta_latitude": latitude,
+                "delta_longitude": longitude,
+            }
+            for (precision, cell), (count, latitude, longitude, _, _) in deltas.items()
+        ],
+    )
+
+    keys = list(deltas)
+    rescans = []
+    for start in range(0, len(keys), CELL_LOOKUP_CHUNK):
+        in_chunk = tuple_(PropertyCluster.cell_precision, PropertyCluster.cell).in_(
+            keys[start : start + CELL_LOOKUP_CHUNK]
+        )
+        connection.execute(delete(PropertyCluster).where(in_chunk, PropertyCluster.listing_count <= 0))
+        bounds = connection.execute(
+            select(
+                PropertyCluster.cell_precision,
+                PropertyCluster.cell,
+                PropertyCluster.min_price,
+                PropertyCluster.max_price,
+            ).where(in_chunk)
+        )
+        # The price range cannot be decremented; rescan a cell only when a
+        # removed listing may have been one of its bounds.
+        for precision, cell, min_price, max_price in bounds:
+            _, _, _, low, high = deltas[(precision, cell)]
+            if low <= min_price or high >= max_price:
+                rescans.append(
+                    {"key_precision": precision, "key_cell": cell, "cell_end": prefix_upper_bound(cell)}
+                )
+    if rescans:
+        connection.execute(_RESCAN_CELL, rescans)
+
+
+_TRACKED = ("geohash", "latitude", "longitude", "price")
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_cluster_changes(session: Session, flush_context, instances) -> None:
+    """Record how the pending property writes change the clusters."""
+
+    removed, added = session.info.setdefault("cluster_changes", ([], []))
+    for obj in session.new:
+        if isinstance(obj, Property) and (item := _current(obj)):
+            added.append(item)
+    for obj in session.deleted:
+        if isinstance(obj, Property) and (item := _committed(obj)):
+            removed.append(item)
+    for obj in session.dirty:
+        if not isinstance(obj, Property):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in _TRACKED):
+            continue
+        if item := _committed(obj):
+            removed.append(item)
+        if item := _current(obj):
+            added.append(item)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_cluster_changes(session: Session, flush_context) -> None:
+    """Apply the recorded cluster changes in the flush's transaction."""
+
+    removed, added = session.info.pop("cluster_changes", ([], []))
+    if not removed and not added:
+        return
+    connection = session.connection()
+    if removed:
+        _remove(connection, removed)
+    if added:
+        _add(connection, added)
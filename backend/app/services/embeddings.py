@@ -0,0 +1,433 @@
+"""Semantic search over listings with a local embedding index.
+
+Titles and descriptions are embedded through Ollama and stored, L2-normalized,
+in a float32 matrix memory-mapped from disk, so cosine similarity is a single
+matrix-vector product. Each row remembers a digest of the text it was computed
+from: synchronizing the index only embeds listings whose text changed.
+
+Every worker process maps the same files. Writers take an exclusive file lock
+and first reload whatever another worker wrote; readers reopen the files when
+``meta.json`` changes on disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker, nothing to lock against.
+    fcntl = None
+
+import httpx
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..config import get_settings
+from ..database import AsyncSessionLocal
+from ..models import Property
+from .ai_agent import AIOverloaded, ai_admission, ollama_client
+from .ai_cache import prompt_cache
+from .listings import apply_property_filters, cards_query
+
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MIN_CAPACITY = 64
+# Embedded listings written to the index per lock acquisition.
+SYNC_BATCH_SIZE = 32
+LOCK_FILE = ".lock"
+
+
+class VectorIndex:
+    """Growable, memory-mapped matrix of unit vectors keyed by property id.
+
+    The directory holds ``vectors.f32`` (``capacity x dimensions`` float32),
+    ``ids.i64`` and ``digests.u64`` (one entry per row) and ``meta.json``.
+    Only the first ``size`` rows are live; removing a row moves the last one
+    into its place so live rows stay contiguous. Changes must be made inside
+    :meth:`write_lock`, which serializes them across processes.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], model: str) -> None:
+        self.directory = Path(directory)
+        self.model = model
+        self.dimensions = 0
+        self.capacity = 0
+        self.size = 0
+        self._vectors: np.memmap | None = None
+        self._ids: np.memmap | None = None
+        self._digests: np.memmap | None = None
+        self._rows: dict[int, int] = {}
+        # Identity of the meta.json last read; a writer replaces the file.
+        self._stamp: tuple[int, int] | None = None
+
+    def load(self) -> None:
+        """Open the files on disk, again if another process has changed them.
+
+        A missing index or a model change starts empty.
+        """
+
+        if self._meta_stamp() != self._stamp:
+            with self._lock(exclusive=False):
+                self._read()
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the index exclusively across processes while changing it.
+
+        The latest state on disk is loaded on entry and the changes are
+        flushed before the lock is released.
+        """
+
+        with self._lock(exclusive=True):
+            if self._meta_stamp() != self._stamp:
+                self._read()
+            try:
+                yield
+            finally:
+                self.flush()
+
+    def __len__(self) -> int:
+        self.load()
+        return self.size
+
+    def ids(self) -> np.ndarray:
+        self.load()
+        return np.array(self._ids[: self.size]) if self.size else np.empty(0, dtype=np.int64)
+
+    def digest(self, property_id: int) -> int | None:
+        """Return the digest of the text the stored vector was computed from."""
+
+        self.load()
+        row = self._rows.get(property_id)
+        return None if row is None else int(self._digests[row])
+
+    def upsert(self, property_id: int, vector: list[float] | np.ndarray, digest: int) -> None:
+        """Store the normalized ``vector`` of a property, replacing any previous one."""
+
+        self.load()
+        values = np.asarray(vector, dtype=np.float32)
+        if not self.dimensions:
+            self.dimensions = values.shape[0]
+        if values.shape != (self.dimensions,):
+            raise ValueError(f"Expected a vector of {self.dimensions} dimensions, got {values.shape}")
+        norm = float(np.linalg.norm(values))
+        if norm:
+            values = values / norm
+
+        row = self._rows.get(property_id)
+        if row is None:
+            if self.size == self.capacity:
+                self._grow(max(MIN_CAPACITY, self.capacity * 2))
+            row = self.size
+            self.size += 1
+            self._rows[property_id] = row
+            self._ids[row] = property_id
+        self._vectors[row] = values
+        self._digests[row] = digest
+
+    def remove(self, property_id: int) -> bool:
+        self.load()
+        row = self._rows.pop(property_id, None)
+        if row is None:
+            return False
+        last = self.size - 1
+        if row != last:
+            moved_id = int(self._ids[last])
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = moved_id
+            self._digests[row] = self._digests[last]
+            self._rows[moved_id] = row
+        self.size = last
+        return True
+
+    def search(
+        self, vector: list[float] | np.ndarray, k: int, candidates: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """Return the ``k`` ``(property_id, cosine)`` pairs closest to ``vector``.
+
+        ``candidates`` restricts the search to the given property ids.
+        """
+
+        self.load()
+        if not self.size or k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape != (self.dimensions,):
+            raise ValueError(f"Expected a vector of {self.dimensions} dimensions, got {query.shape}")
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+
+        ids = self._ids[: self.size]
+        vectors = self._vectors[: self.size]
+        if candidates is not None:
+            rows = np.flatnonzero(np.isin(ids, candidates))
+            ids, vectors = ids[rows], vectors[rows]
+            if not len(rows):
+                return []
+        scores = vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[row]), float(scores[row])) for row in top]
+
+    def flush(self) -> None:
+        """Write pending changes and the metadata to disk."""
+
+        if self._vectors is None:
+            return
+        for array in (self._vectors, self._ids, self._digests):
+            array.flush()
+        meta = {
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "capacity": self.capacity,
+            "size": self.size,
+        }
+        tmp_path = self.directory / "meta.json.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.directory / "meta.json")
+        self._stamp = self._meta_stamp()
+
+    def _meta_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.directory / "meta.json")
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    @contextmanager
+    def _lock(self, exclusive: bool) -> Iterator[None]:
+        # flock locks belong to the open file: closing it releases the lock.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / LOCK_FILE, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _read(self) -> None:
+        self.dimensions = self.capacity = self.size = 0
+        self._vectors = self._ids = self._digests = None
+        self._rows = {}
+        self._stamp = self._meta_stamp()
+        if self._stamp is None:
+            return
+        meta = json.loads((self.directory / "meta.json").read_text())
+        if meta["model"] != self.model or not meta["capacity"]:
+            return
+        self.dimensions, self.capacity, self.size = meta["dimensions"], meta["capacity"], meta["size"]
+        self._open("r+")
+        self._rows = {int(property_id): row for row, property_id in enumerate(self._ids[: self.size])}
+
+    def _open(self, mode: str, suffix: str = "") -> tuple[np.memmap, np.memmap, np.memmap]:
+        arrays = (
+            np.memmap(
+                self.directory / f"vectors.f32{suffix}",
+                dtype=np.float32,
+                mode=mode,
+                shape=(self.capacity, self.dimensions),
+            ),
+            np.memmap(self.directory / f"ids.i64{suffix}", dtype=np.int64, mode=mode, shape=(self.capacity,)),
+            np.memmap(self.directory / f"digests.u64{suffix}", dtype=np.uint64, mode=mode, shape=(self.capacity,)),
+        )
+        if not suffix:
+            self._vectors, self._ids, self._digests = arrays
+        return arrays
+
+    def _grow(self, capacity: int) -> None:
+        # Copy the live rows into larger files, then swap them in.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        previous = (self._vectors, self._ids, self._digests)
+        self.capacity = capacity
+        grown = self._open("w+", suffix=".tmp")
+        if previous[0] is not None:
+            for target, source in zip(grown, previous):
+                target[: self.size] = source[: self.size]
+        for array in grown:
+            array.flush()
+        for name in ("vectors.f32", "ids.i64", "digests.u64"):
+            os.replace(self.directory / f"{name}.tmp", self.directory / name)
+        self._open("r+")
+        self.flush()
+
+
+@dataclass
+class SyncReport:
+    """Outcome of an embedding index synchronization."""
+
+    embedded: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def embedding_text(title: str, description: str | None) -> str:
+    """Return the text embedded for a listing."""
+
+    return f"{title}\n{description or ''}".strip()
+
+
+def content_digest(text: str) -> int:
+    """Return a 64-bit digest of ``text`` and the embedding model."""
+
+    digest = hashlib.blake2b(f"{settings.ollama_embedding_model}\n{text}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+async def sync_embeddings(db: AsyncSession, property_ids: list[int] | None = None) -> SyncReport:
+    """Bring the index up to date with the listings.
+
+    Only listings whose title or description changed since they were last
+    embedded are sent to Ollama. With ``property_ids`` only those listings
+    are checked; otherwise the whole catalog is, and rows of deleted
+    listings are dropped. Listings that fail to embed are left for the next
+    synchronization.
+    """
+
+    async with _sync_lock:
+        return await _sync_embeddings(db, property_ids)
+
+
+async def _sync_embeddings(db: AsyncSession, property_ids: list[int] | None) -> SyncReport:
+    report = SyncReport()
+    query = select(Property.id, Property.title, Property.description)
+    if property_ids is not None:
+        query = query.where(Property.id.in_(property_ids))
+    seen: set[int] = set()
+    pending: list[tuple[int, list[float], int]] = []
+    try:
+        for property_id, title, description in await db.execute(query):
+            seen.add(property_id)
+            text = embedding_text(title, description)
+            digest = content_digest(text)
+            if semantic_index.digest(property_id) == digest:
+                report.unchanged += 1
+                continue
+            try:
+                # Background embeddings queue with the interactive requests
+                # instead of competing with them for Ollama.
+                async with ai_admission.slot():
+                    vector = await ollama_client.embed(text)
+            except (httpx.HTTPError, AIOverloaded) as exc:
+                logger.warning("Embedding of property %s failed: %s", property_id, exc)
+                report.failed += 1
+                continue
+            pending.append((property_id, vector, digest))
+            report.embedded += 1
+            if len(pending) >= SYNC_BATCH_SIZE:
+                _store_vectors(pending)
+
+        if property_ids is not None:
+            stale = [property_id for property_id in property_ids if property_id not in seen]
+        else:
+            stale = [int(property_id) for property_id in semantic_index.ids() if int(property_id) not in seen]
+            if stale:
+                # Another worker may have indexed a listing created since the
+                # catalog was read.
+                created = set(await db.scalars(select(Property.id).where(Property.id.in_(stale))))
+                stale = [property_id for property_id in stale if property_id not in created]
+        if stale:
+            with semantic_index.write_lock():
+                report.removed = sum(semantic_index.remove(property_id) for property_id in stale)
+    finally:
+        _store_vectors(pending)
+    return report
+
+
+def _store_vectors(pending: list[tuple[int, list[float], int]]) -> None:
+    """Write the embedded listings to the index and empty ``pending``."""
+
+    batch = pending[:]
+    pending.clear()
+    if batch:
+        with semantic_index.write_lock():
+            for property_id, vector, digest in batch:
+                semantic_index.upsert(property_id, vector, digest)
+
+
+async def refresh_embeddings(property_ids: list[int] | None = None) -> SyncReport | None:
+    """Synchronize the index in a session of its own (startup and after writes)."""
+
+    if not settings.semantic_search_enabled:
+        return None
+    async with AsyncSessionLocal() as db:
+        return await sync_embeddings(db, property_ids)
+
+
+async def start_embedding_sync() -> None:
+    """Schedule a full synchronization of the index in the background."""
+
+    global _startup_sync
+    if settings.semantic_search_enabled and _startup_sync is None:
+        _startup_sync = asyncio.create_task(refresh_embeddings())
+
+
+async def stop_embedding_sync() -> None:
+    """Cancel an unfinished startup synchronization."""
+
+    global _startup_sync
+    if _startup_sync is not None:
+        _startup_sync.cancel()
+        try:
+            await _startup_sync
+        except asyncio.CancelledError:
+            pass
+        _startup_sync = None
+
+
+async def embed_query(text: str) -> list[float]:
+    """Embed a search text, through the prompt cache and the admission controller."""
+
+    async def generate() -> dict[str, Any]:
+        async with ai_admission.slot():
+            return {"embedding": await ollama_client.embed(text)}
+
+    key = prompt_cache.key(text, settings.ollama_embedding_model, {"task": "embedding"})
+    return (await prompt_cache.get_or_generate(key, generate))["embedding"]
+
+
+async def semantic_search(
+    db: AsyncSession, text: str, filters: schemas.PropertyFilters, limit: int
+) -> list[tuple[Property, float]]:
+    """Return the listings matching ``filters`` closest in meaning to ``text``.
+
+    Raises :class:`~.ai_agent.AIOverloaded` or ``httpx.HTTPError`` when the
+    query cannot be embedded.
+    """
+
+    vector = await embed_query(text)
+    candidates = None
+    if filters.model_dump(exclude_none=True, exclude={"locality_match", "radius_km"}):
+        id_query = apply_property_filters(select(Property.id), filters, dialect=db.bind.dialect.name)
+        candidates = np.fromiter(await db.scalars(id_query), dtype=np.int64)
+    hits = semantic_index.search(vector, limit, candidates)
+    if not hits:
+        return []
+
+    rows = await db.scalars(cards_query([property_id for property_id, _ in hits]))
+    by_id = {row.id: row for row in rows}
+    return [(by_id[property_id], score) for property_id, score in hits if property_id in by_id]
+
+
+semantic_index = VectorIndex(settings.semantic_index_dir, settings.ollama_embedding_model)
+# Synchronizations interleave at every await; serializing them keeps a full
+# pass of this worker from dropping a row that a concurrent write has just added.
+_sync_lock = asyncio.Lock()
+_startup_sync: asyncio.Task[SyncReport | None] | None = None
@@ -0,0 +1,119 @@
+"""Streaming export of the listing catalog as NDJSON or CSV.
+
+Listings are read through a server-side cursor in batches; the images of a
+batch are fetched with one ``IN`` query and the batch is encoded and sent
+before the next one is read, so memory does not grow with the catalog.
+
+NDJSON lines are :class:`~app.schemas.PropertyRead` objects. CSV rows hold
+the same fields, with the image URLs joined by ``|`` in the ``images``
+column, primary image first: both files can be fed back to the bulk import.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+from itertools import groupby
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..database import AsyncSessionLocal
+from ..models import Property, PropertyImage
+from .bulk_import import CSV_IMAGE_SEPARATOR
+from .listings import apply_property_filters
+
+
+EXPORT_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.description,
+    Property.price,
+    Property.area,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.city,
+    Property.district,
+    Property.address,
+    Property.latitude,
+    Property.longitude,
+    Property.property_type,
+    Property.status,
+    Property.is_featured,
+    Property.owner_id,
+    Property.created_at,
+    Property.updated_at,
+)
+CSV_FIELDS = [column.key for column in EXPORT_COLUMNS] + ["images"]
+EXPORT_BATCH_SIZE = 1000
+
+
+async def _images_by_property(db: AsyncSession, property_ids: list[int]) -> dict[int, list[dict]]:
+    rows = await db.execute(
+        select(PropertyImage.property_id, PropertyImage.id, PropertyImage.url, PropertyImage.is_primary)
+        .where(PropertyImage.property_id.in_(property_ids))
+        .order_by(PropertyImage.property_id, PropertyImage.id)
+    )
+    return {
+        property_id: [{"id": image.id, "url": image.url, "is_primary": image.is_primary} for image in images]
+        for property_id, images in groupby(rows, key=lambda row: row.property_id)
+    }
+
+
+def _encode_jsonl(listings: list[schemas.PropertyRead]) -> bytes:
+    return b"".join(listing.model_dump_json().encode() + b"\n" for listing in listings)
+
+
+def _encode_csv(listings: list[schemas.PropertyRead]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator="\n")
+    for listing in listings:
+        record = listing.model_dump(mode="json", exclude={"images"})
+        images = sorted(listing.images, key=lambda image: not image.is_primary)
+        record["images"] = CSV_IMAGE_SEPARATOR.join(image.url for image in images)
+        writer.writerow(record)
+    return buffer.getvalue().encode()
+
+
+async def export_listings(
+    filters: schemas.PropertyFilters,
+    export_format: schemas.ListingFormat,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield the listings matching ``filters``, with their images, in ``export_format``.
+
+    Listings come in id order, one chunk per batch of ``batch_size``.
+    """
+
+    encode = _encode_csv if export_format is schemas.ListingFormat.CSV else _encode_jsonl
+    if export_format is schemas.ListingFormat.CSV:
+        yield (",".join(CSV_FIELDS) + "\n").encode()
+
+    # The export outlives the request's session, and a connection streaming
+    # a server-side cursor cannot run other queries (MySQL): the listings and
+    # their images are read through two sessions of their own.
+    async with AsyncSessionLocal() as db, AsyncSessionLocal() as image_db:
+        statement = apply_property_filters(select(*EXPORT_COLUMNS), filters, dialect=db.bind.dialect.name)
+        result = await db.stream(statement.order_by(Property.id).execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            images = await _images_by_property(image_db, [row.id for row in rows])
+            yield encode(
+                [
+                    schemas.PropertyRead.model_validate({**row._mapping, "images": images.get(row.id, [])})
+                    for row in rows
+                ]
+            )
+
+
+async def gzip_chunks(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a stream of chunks into a gzip file, chunk by chunk."""
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
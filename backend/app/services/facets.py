@@ -0,0 +1,124 @@
+"""Facet counts and price statistics of a filtered listing search.
+
+Every figure is an aggregate computed by the database over the rows matching
+the listing filters, so the response size does not grow with the catalog.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..models import Property
+from .listings import apply_property_filters
+
+
+# Listings with at least this many bedrooms share the last bedroom facet.
+MAX_BEDROOM_FACET = 5
+
+
+def histogram_edges(low: float, high: float, buckets: int) -> list[float]:
+    """Return ``buckets + 1`` evenly spaced edges from ``low`` to ``high``."""
+
+    if high <= low:
+        return [low, high]
+    width = (high - low) / buckets
+    return [low + width * index for index in range(buckets)] + [high]
+
+
+async def compute_facets(
+    db: AsyncSession, filters: schemas.PropertyFilters, buckets: int = 10
+) -> schemas.PropertyFacets:
+    """Return the facets of the listings matching ``filters``.
+
+    The price histogram has ``buckets`` equal-width buckets between the
+    lowest and highest matching price; each bucket includes its lower edge
+    and the last one also includes the highest price.
+    """
+
+    filtered = apply_property_filters(
+        select(
+            Property.city,
+            Property.city_key,
+            Property.property_type,
+            Property.status,
+            Property.bedrooms,
+            Property.price,
+        ),
+        filters,
+        dialect=db.bind.dialect.name,
+    ).subquery()
+    price = filtered.c.price
+
+    total, low, high = (
+        await db.execute(select(func.count(), func.min(price), func.max(price)).select_from(filtered))
+    ).one()
+    if not total:
+        return schemas.PropertyFacets(
+            total=0,
+            cities=[],
+            property_types=[],
+            statuses=[],
+            bedrooms=[],
+            price=schemas.PriceStats(),
+            price_histogram=[],
+        )
+
+    cities = await db.execute(
+        select(func.min(filtered.c.city), func.count())
+        .group_by(filtered.c.city_key)
+        .order_by(func.count().desc(), func.min(filtered.c.city))
+    )
+    property_types = await db.execute(
+        select(filtered.c.property_type, func.count()).group_by(filtered.c.property_type)
+    )
+    statuses = await db.execute(select(filtered.c.status, func.count()).group_by(filtered.c.status))
+    bedrooms = await db.execute(
+        select(filtered.c.bedrooms, func.count())
+        .where(filtered.c.bedrooms.is_not(None))
+        .group_by(filtered.c.bedrooms)
+    )
+    bedroom_counts: dict[str, int] = {}
+    for value, count in sorted(bedrooms.all()):
+        label = f"{MAX_BEDROOM_FACET}+" if value >= MAX_BEDROOM_FACET else str(value)
+        bedroom_counts[label] = bedroom_counts.get(label, 0) + count
+
+    # Median without percentile functions (absent from SQLite and MySQL):
+    # read the one or two middle prices through the price index.
+    middle = await db.scalars(
+        select(price).order_by(price).offset((total - 1) // 2).limit(2 - total % 2)
+    )
+    middle_prices = [float(value) for value in middle]
+
+    low, high = float(low), float(high)
+    edges = histogram_edges(low, high, buckets)
+    if len(edges) > 2:
+        bucket = case(
+            *((price < edge, index) for index, edge in enumerate(edges[1:-1])),
+            else_=len(edges) - 2,
+        )
+        histogram = dict(
+            (await db.execute(select(bucket, func.count()).select_from(filtered).group_by(bucket))).all()
+        )
+    else:
+        histogram = {0: total}
+
+    return schemas.PropertyFacets(
+        total=total,
+        cities=[schemas.FacetCount(value=city, count=count) for city, count in cities],
+        property_types=[
+            schemas.FacetCount(value=property_type.value, count=count)
+            for property_type, count in sorted(property_types, key=lambda row: -row[1])
+        ],
+        statuses=[
+            schemas.FacetCount(value=property_status.value, count=count)
+            for property_status, count in sorted(statuses, key=lambda row: -row[1])
+        ],
+        bedrooms=[schemas.FacetCount(value=label, count=count) for label, count in bedroom_counts.items()],
+        price=schemas.PriceStats(min=low, median=sum(middle_prices) / len(middle_prices), max=high),
+        price_histogram=[
+            schemas.PriceBucket(min_price=edges[index], max_price=edges[index + 1], count=histogram.get(index, 0))
+            for index in range(len(edges) - 1)
+        ],
+    )
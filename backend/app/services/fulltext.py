@@ -0,0 +1,136 @@
+"""Keyword search over property titles and descriptions.
+
+Each database gets its own inverted index, hidden behind :class:`FullTextIndex`:
+
+* SQLite uses an external-content FTS5 table (``properties_fts``) kept in sync
+  by triggers and ranked with BM25;
+* MySQL uses an InnoDB ``FULLTEXT`` index queried in boolean mode;
+* any other database falls back to ``LIKE`` scans.
+
+Queries are tokenized the same way for every backend: accents and case are
+folded, French and English stop words dropped and the remaining words lightly
+stemmed, so "climatisée" also finds "climatisées" and "climatisation".
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import (
+    ColumnElement,
+    UnaryExpression,
+    and_,
+    column,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy.dialects.mysql import match
+
+from ..models import Property
+from ..normalization import fold_text
+
+
+STOP_WORDS = frozenset(
+    """
+    a au aux avec ce ces dans de des du en et la le les leur mais ou par pas
+    pour sur un une tres plus
+    an and at for in of on or the to with
+    """.split()
+)
+
+# Longest suffixes first; only plural/feminine/adverbial endings are removed so
+# the stem stays a safe prefix of every inflected form.
+SUFFIXES = ("ements", "ement", "ees", "es", "ee", "s", "x", "e")
+
+MIN_STEM_LENGTH = 3
+
+fts_table = table("properties_fts", column("rowid"), column("title"), column("description"))
+
+
+def search_terms(query: str) -> list[str]:
+    """Return the stemmed, accent-folded search terms of a user query."""
+
+    terms: list[str] = []
+    for word in (fold_text(query) or "").split():
+        if word in STOP_WORDS or len(word) < MIN_STEM_LENGTH:
+            continue
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+                word = word[: -len(suffix)]
+                break
+        if word not in terms:
+            terms.append(word)
+    return terms
+
+
+class FullTextIndex:
+    """Fallback implementation answering keyword queries with ``LIKE`` scans."""
+
+    def condition(self, terms: list[str]) -> ColumnElement[bool]:
+        """Return a predicate selecting the properties containing every term."""
+
+        return and_(
+            *(
+                or_(
+                    func.lower(Property.title).contains(term, autoescape=True),
+                    func.lower(Property.description).contains(term, autoescape=True),
+                )
+                for term in terms
+            )
+        )
+
+    def relevance(self, terms: list[str]) -> UnaryExpression | None:
+        """Return an ORDER BY clause putting the best matches first, if supported."""
+
+        return None
+
+
+class SQLiteFullTextIndex(FullTextIndex):
+    """FTS5 index maintained by the triggers created in migration 0004."""
+
+    weights = (literal(10.0), literal(1.0))  # title, description
+
+    @staticmethod
+    def _match(terms: list[str]) -> ColumnElement[bool]:
+        expression = " ".join(f'"{term}"*' for term in terms)
+        return literal_column("properties_fts").op("MATCH")(expression)
+
+    def condition(self, terms: list[str]) -> ColumnElement[bool]:
+        return Property.id.in_(select(fts_table.c.rowid).where(self._match(terms)))
+
+    def relevance(self, terms: list[str]) -> UnaryExpression:
+        score = (
+            select(func.bm25(literal_column("properties_fts"), *self.weights))
+            .where(self._match(terms), fts_table.c.rowid == Property.id)
+            .scalar_subquery()
+        )
+        return score.asc()
+
+
+class MySQLFullTextIndex(FullTextIndex):
+    """InnoDB ``FULLTEXT`` index on ``(title, description)``."""
+
+    @staticmethod
+    def _score(terms: list[str]) -> ColumnElement[float]:
+        expression = " ".join(f"+{term}*" for term in terms)
+        return match(Property.title, Property.description, against=expression).in_boolean_mode()
+
+    def condition(self, terms: list[str]) -> ColumnElement[bool]:
+        return self._score(terms) > 0
+
+    def relevance(self, terms: list[str]) -> UnaryExpression:
+        return self._score(terms).desc()
+
+
+_INDEXES: dict[str, FullTextIndex] = {
+    "sqlite": SQLiteFullTextIndex(),
+    "mysql": MySQLFullTextIndex(),
+}
+
+
+def get_fulltext_index(dialect: str) -> FullTextIndex:
+    """Return the full-text index implementation for a SQLAlchemy dialect name."""
+
+    return _INDEXES.get(dialect, FullTextIndex())
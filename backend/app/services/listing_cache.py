@@ -0,0 +1,103 @@
+"""Cache of serialized property listing pages.
+
+Home-page traffic mostly repeats a few searches, so each rendered page is
+kept as JSON bytes keyed by its normalized parameters. Every entry remembers
+its filters: when a property is written, only the pages whose filters match
+the property before or after the write are dropped.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+
+from .. import schemas
+from ..config import get_settings
+from ..normalization import fold_text
+from .cache import CacheBackend, CacheStats, create_cache_backend
+from .listings import property_matches
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """A rendered listing page and the filters it was computed for."""
+
+    filters: schemas.PropertyFilters
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class ListingCache:
+    """Listing page cache with filter-aware invalidation."""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True) -> None:
+        self.backend = backend
+        self.enabled = enabled
+
+    @staticmethod
+    def key(filters: schemas.PropertyFilters, **params) -> str:
+        """Return a cache key that is identical for equivalent requests."""
+
+        normalized = filters.model_dump(mode="json", exclude_none=True)
+        for name in ("city", "district"):
+            if name in normalized:
+                normalized[name] = fold_text(normalized[name])
+        if "q" in normalized:
+            normalized["q"] = fold_text(normalized["q"])
+        params = {name: value for name, value in params.items() if value is not None}
+        return json.dumps({"filters": normalized, **params}, sort_keys=True, default=str)
+
+    def get(self, key: str) -> CachedPage | None:
+        if not self.enabled:
+            return None
+        return self.backend.get(key)
+
+    def put(
+        self,
+        key: str,
+        filters: schemas.PropertyFilters,
+        body: bytes,
+        headers: dict[str, str] | None = None,
+    ) -> CachedPage:
+        page = CachedPage(filters=filters, body=body, headers=headers or {})
+        if self.enabled:
+            self.backend.set(key, page)
+        return page
+
+    def invalidate_property(self, before: dict | None, after: dict | None) -> int:
+        """Drop the pages a property write may have changed.
+
+        ``before`` and ``after`` are :func:`~.listings.property_snapshot` values
+        of the property around the write (``None`` on create or delete). A page
+        is dropped whatever its offset or cursor, since the write can shift the
+        following rows.
+        """
+
+        states = [state for state in (before, after) if state is not None]
+        stale = [
+            key
+            for key, page in self.backend.items()
+            if any(property_matches(page.filters, state) for state in states)
+        ]
+        for key in stale:
+            self.backend.delete(key)
+        return len(stale)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+
+def _create_listing_cache() -> ListingCache:
+    settings = get_settings()
+    backend = create_cache_backend(
+        settings.listing_cache_backend,
+        max_entries=settings.listing_cache_max_entries,
+        ttl_seconds=settings.listing_cache_ttl_seconds,
+    )
+    return ListingCache(backend, enabled=settings.listing_cache_enabled)
+
+
+listing_cache = _create_listing_cache()
@@ -0,0 +1,357 @@
+"""Read-optimized query building for property listings."""
+
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, Select, and_, func, or_, select
+from sqlalchemy.orm import InstrumentedAttribute, load_only, selectinload
+
+from .. import schemas
+from ..geo import EARTH_RADIUS_KM, BoundingBox, covering_geohashes, haversine_km
+from ..models import Property, PropertyImage
+from ..normalization import fold_text, prefix_upper_bound
+from .fulltext import get_fulltext_index, search_terms
+
+
+# Columns needed to render a listing card; heavy text fields are left out.
+CARD_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.price,
+    Property.area,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.city,
+    Property.district,
+    Property.property_type,
+    Property.status,
+    Property.is_featured,
+    Property.created_at,
+)
+
+
+def locality_clause(
+    column: InstrumentedAttribute, value: str, match: schemas.LocalityMatch
+) -> ColumnElement[bool]:
+    """Match a folded locality key column against user input.
+
+    Exact and prefix matches are expressed as equality and range predicates so
+    they can use the ``*_key`` indexes; ``contains`` keeps substring semantics
+    at the cost of a scan.
+    """
+
+    key = fold_text(value)
+    if not key:
+        return column.is_not(None)
+    if match is schemas.LocalityMatch.EXACT:
+        return column == key
+    if match is schemas.LocalityMatch.CONTAINS:
+        return column.contains(key, autoescape=True)
+    return and_(column >= key, column < prefix_upper_bound(key))
+
+
+def within_box(box: BoundingBox) -> ColumnElement[bool]:
+    """Select the properties located inside ``box``.
+
+    The geohash cells covering the box become index range scans on the
+    geohash column; the exact latitude/longitude bounds then trim the cells'
+    overhang.
+    """
+
+    cells = [
+        and_(Property.geohash >= cell, Property.geohash < prefix_upper_bound(cell))
+        for cell in covering_geohashes(box)
+    ]
+    bounds = and_(
+        Property.latitude.between(box.min_lat, box.max_lat),
+        Property.longitude.between(box.min_lon, box.max_lon),
+    )
+    return and_(or_(*cells), bounds) if cells else bounds
+
+
+def distance_km(lat: float, lon: float, *, dialect: str) -> ColumnElement[float]:
+    """Return the great-circle distance between each property and a point.
+
+    SQLite uses the ``haversine_km`` function registered on its connections;
+    other databases evaluate the haversine formula with their math functions.
+    """
+
+    if dialect == "sqlite":
+        return func.haversine_km(Property.latitude, Property.longitude, lat, lon)
+
+    half_d_lat = func.radians(Property.latitude - lat) / 2
+    half_d_lon = func.radians(Property.longitude - lon) / 2
+    a = func.pow(func.sin(half_d_lat), 2) + func.cos(func.radians(lat)) * func.cos(
+        func.radians(Property.latitude)
+    ) * func.pow(func.sin(half_d_lon), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+def apply_property_filters(
+    statement: Select, filters: schemas.PropertyFilters, *, dialect: str
+) -> Select:
+    """Restrict a ``Property`` select statement to rows matching ``filters``.
+
+    ``dialect`` is the SQLAlchemy dialect name of the target database; it picks
+    the full-text index used for keyword queries.
+    """
+
+    terms = search_terms(filters.q) if filters.q else []
+    if terms:
+        statement = statement.where(get_fulltext_index(dialect).condition(terms))
+    if filters.city:
+        statement = statement.where(
+            locality_clause(Property.city_key, filters.city, filters.locality_match)
+        )
+    if filters.district:
+        statement = statement.where(
+            locality_clause(Property.district_key, filters.district, filters.locality_match)
+        )
+    if filters.property_type:
+        statement = statement.where(Property.property_type == filters.property_type)
+    if filters.status:
+        statement = statement.where(Property.status == filters.status)
+    if filters.min_price is not None:
+        statement = statement.where(Property.price >= filters.min_price)
+    if filters.max_price is not None:
+        statement = statement.where(Property.price <= filters.max_price)
+    if filters.bedrooms is not None:
+        statement = statement.where(Property.bedrooms >= filters.bedrooms)
+    if filters.bathrooms is not None:
+        statement = statement.where(Property.bathrooms >= filters.bathrooms)
+    if filters.is_featured is not None:
+        statement = statement.where(Property.is_featured.is_(filters.is_featured))
+    if filters.bbox:
+        statement = statement.where(within_box(filters.bbox))
+    if filters.near:
+        lat, lon = filters.near
+        radius_km = filters.radius_km or 0
+        statement = statement.where(
+            within_box(BoundingBox.around(lat, lon, radius_km)),
+            distance_km(lat, lon, dialect=dialect) <= radius_km,
+        )
+    return statement
+
+
+def property_snapshot(property_obj: Property) -> dict:
+    """Capture the fields that the listing filters look at."""
+
+    return {
+        name: getattr(property_obj, name)
+        for name in (
+            "title",
+            "description",
+            "price",
+            "bedrooms",
+            "bathrooms",
+            "city_key",
+            "district_key",
+            "latitude",
+            "longitude",
+            "property_type",
+            "status",
+            "is_featured",
+        )
+    }
+
+
+def _locality_matches(key: str | None, value: str, match: schemas.LocalityMatch) -> bool:
+    wanted = fold_text(value)
+    if not wanted:
+        return key is not None
+    if key is None:
+        return False
+    if match is schemas.LocalityMatch.EXACT:
+        return key == wanted
+    if match is schemas.LocalityMatch.CONTAINS:
+        return wanted in key
+    return key.startswith(wanted)
+
+
+def property_matches(filters: schemas.PropertyFilters, snapshot: dict) -> bool:
+    """Evaluate ``filters`` in Python against a :func:`property_snapshot`.
+
+    This mirrors :func:`apply_property_filters` (keywords are matched as word
+    prefixes, like the full-text index) and lets callers decide whether a
+    write can affect a given search without querying the database.
+    """
+
+    def at_least(value, bound) -> bool:
+        return value is not None and value >= bound
+
+    if filters.q:
+        words = (fold_text(f"{snapshot['title']} {snapshot['description']}") or "").split()
+        if not all(any(word.startswith(term) for word in words) for term in search_terms(filters.q)):
+            return False
+    if filters.city and not _locality_matches(snapshot["city_key"], filters.city, filters.locality_match):
+        return False
+    if filters.district and not _locality_matches(
+        snapshot["district_key"], filters.district, filters.locality_match
+    ):
+        return False
+    if filters.property_type and snapshot["property_type"] != filters.property_type:
+        return False
+    if filters.status and snapshot["status"] != filters.status:
+        return False
+    if filters.min_price is not None and not at_least(snapshot["price"], filters.min_price):
+        return False
+    if filters.max_price is not None and not (
+        snapshot["price"] is not None and snapshot["price"] <= filters.max_price
+    ):
+        return False
+    if filters.bedrooms is not None and not at_least(snapshot["bedrooms"], filters.bedrooms):
+        return False
+    if filters.bathrooms is not None and not at_least(snapshot["bathrooms"], filters.bathrooms):
+        return False
+    if filters.is_featured is not None and bool(snapshot["is_featured"]) is not filters.is_featured:
+        return False
+
+    lat, lon = snapshot["latitude"], snapshot["longitude"]
+    if filters.bbox or filters.near:
+        if lat is None or lon is None:
+            return False
+    if filters.bbox and not (
+        filters.bbox.min_lat <= lat <= filters.bbox.max_lat
+        and filters.bbox.min_lon <= lon <= filters.bbox.max_lon
+    ):
+        return False
+    if filters.near and haversine_km(*filters.near, lat, lon) > (filters.radius_km or 0):
+        return False
+    return True
+
+
+def build_listing_query(
+    filters: schemas.PropertyFilters,
+    view: schemas.PropertyView = schemas.PropertyView.FULL,
+    *,
+    dialect: str,
+    sort: schemas.ListingSort = schemas.ListingSort.NEWEST,
+) -> Select:
+    """Return the select statement backing a page of property listings.
+
+    Rows are ordered newest first on ``(created_at, id)`` so that pages can be
+    walked either by offset or by a keyset cursor (see :func:`apply_cursor`).
+    Distance sorting (around ``filters.near``) or, failing that, keyword
+    relevance take precedence over that order.
+
+    Images are fetched for the whole page with a single ``IN`` query instead of
+    one lazy load per property, and the card view only loads the columns it
+    renders.
+    """
+
+    statement = apply_property_filters(select(Property), filters, dialect=dialect)
+    terms = search_terms(filters.q) if filters.q else []
+    relevance = get_fulltext_index(dialect).relevance(terms) if terms else None
+    if sort is schemas.ListingSort.DISTANCE and filters.near:
+        statement = statement.order_by(distance_km(*filters.near, dialect=dialect))
+    elif relevance is not None:
+        statement = statement.order_by(relevance)
+    statement = statement.order_by(Property.created_at.desc(), Property.id.desc())
+    return statement.options(*listing_options(view))
+
+
+def listing_options(view: schemas.PropertyView) -> list:
+    """Return the loader options rendering a listing view."""
+
+    options = [selectinload(Property.images)]
+    if view is schemas.PropertyView.CARD:
+        options.append(load_only(*CARD_COLUMNS))
+    return options
+
+
+def property_version_query(property_id: int) -> Select:
+    """Select what identifies the current version of a property.
+
+    The row's ``updated_at`` plus the count and highest id of its images change
+    whenever the rendered property does, and reading them is far cheaper than
+    loading and serializing the full listing.
+    """
+
+    return (
+        select(
+            Property.updated_at,
+            func.count(PropertyImage.id).label("image_count"),
+            func.max(PropertyImage.id).label("last_image_id"),
+        )
+        .outerjoin(PropertyImage, PropertyImage.property_id == Property.id)
+        .where(Property.id == property_id)
+        .group_by(Property.id, Property.updated_at)
+    )
+
+
+def cards_query(property_ids: list[int]) -> Select:
+    """Select the card columns and images of the given properties, in any order."""
+
+    return listing_rows_query(property_ids, schemas.PropertyView.CARD)
+
+
+def listing_rows_query(property_ids: list[int], view: schemas.PropertyView) -> Select:
+    """Select the given properties as rendered by ``view``, in any order."""
+
+    return select(Property).where(Property.id.in_(property_ids)).options(*listing_options(view))
+
+
+def listing_schema(view: schemas.PropertyView) -> type[schemas.PropertyRead] | type[schemas.PropertyCard]:
+    """Return the response schema matching a listing view."""
+
+    if view is schemas.PropertyView.CARD:
+        return schemas.PropertyCard
+    return schemas.PropertyRead
+
+
+def encode_cursor(created_at: datetime, property_id: int) -> str:
+    """Return an opaque cursor pointing just after the given listing."""
+
+    raw = f"{created_at.isoformat()}|{property_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises ``ValueError`` when the cursor is malformed.
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, property_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(property_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+
+
+def apply_cursor(statement: Select, cursor: str, entity=Property) -> Select:
+    """Continue a listing statement after the row identified by ``cursor``.
+
+    The seek predicate matches the ``(created_at, id)`` ordering, so the
+    database jumps straight to the next page instead of scanning and
+    discarding every row before it, and inserts do not shift later pages.
+    ``entity`` is the mapped class being listed (properties by default).
+    """
+
+    created_at, row_id = decode_cursor(cursor)
+    return statement.where(
+        or_(
+            entity.created_at < created_at,
+            and_(entity.created_at == created_at, entity.id < row_id),
+        )
+    )
+
+
+def supports_cursor(filters: schemas.PropertyFilters, sort: schemas.ListingSort) -> bool:
+    """Tell whether a listing is ordered on ``(created_at, id)`` alone."""
+
+    return sort is schemas.ListingSort.NEWEST and not filters.q
+
+
+def next_cursor(rows: list, limit: int) -> str | None:
+    """Return the cursor of the page following ``rows``, if there may be one."""
+
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
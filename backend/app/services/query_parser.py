@@ -0,0 +1,258 @@
+"""Rule-based parsing of natural language property searches.
+
+Most assistant prompts are short searches ("3 chambres à Lomé moins de
+500 000 FCFA", "apartment in Kara under 2M"). They are turned into the same
+:class:`~app.schemas.PropertyFilters` the listing endpoint accepts with a
+handful of precompiled French/English patterns, without calling the language
+model. Whatever the rules do not understand is kept as keywords for the
+full-text search.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from .. import schemas
+from ..models import PropertyStatus, PropertyType
+from ..normalization import fold_case, fold_text
+from .fulltext import STOP_WORDS
+
+
+NUMBER_WORDS = {
+    "un": 1, "une": 1, "one": 1,
+    "deux": 2, "two": 2,
+    "trois": 3, "three": 3,
+    "quatre": 4, "four": 4,
+    "cinq": 5, "five": 5,
+    "six": 6,
+    "sept": 7, "seven": 7,
+    "huit": 8, "eight": 8,
+}
+
+AMOUNT_UNITS = {
+    "k": 1_000, "mille": 1_000,
+    "m": 1_000_000, "mio": 1_000_000, "million": 1_000_000, "millions": 1_000_000,
+    "md": 1_000_000_000, "mds": 1_000_000_000,
+    "milliard": 1_000_000_000, "milliards": 1_000_000_000,
+}
+
+# Known localities, as displayed; matched accent- and case-insensitively.
+CITIES = (
+    "Lomé", "Kara", "Sokodé", "Kpalimé", "Atakpamé", "Dapaong", "Tsévié",
+    "Aného", "Bassar", "Notsé", "Mango", "Badou", "Vogan", "Tabligbo",
+    "Kévé", "Sotouboua", "Blitta", "Niamtougou", "Bafilo", "Amlamé",
+)
+DISTRICTS = (
+    "Adakpamé", "Adamavo", "Adidogomé", "Agbalépédogan", "Agoè", "Agoè-Nyivé",
+    "Akodésséwa", "Amoutivé", "Avédji", "Baguida", "Bè", "Bè-Kpota",
+    "Cacavéli", "Djidjolé", "Doumassessé", "Gbossimé", "Hanoukopé",
+    "Hédzranawoé", "Kagomé", "Kégué", "Kodjoviakopé", "Légbassito",
+    "Nyékonakpoè", "Tokoin", "Totsi", "Wuiti", "Zanguéra",
+)
+
+NUM = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+AMOUNT = (
+    r"(\d{1,3}(?:[ .,]\d{3})+|\d+(?:[.,]\d+)?)\s*"
+    r"(milliards?|millions?|mille|mio|mds?|md|k|m(?![2²]|\s*carr))?\b\s*"
+    r"(?:f\s?cfa|cfa|xof|francs?|f\b)?"
+)
+
+BEDROOMS = re.compile(
+    rf"\b(au moins |at least |min(?:imum)? |plus de |more than )?{NUM}\s*-?\s*"
+    r"(?:chambres?|ch|bedrooms?|beds?|br)\b"
+)
+BATHROOMS = re.compile(
+    rf"\b(au moins |at least |min(?:imum)? |plus de |more than )?{NUM}\s*-?\s*"
+    r"(?:salles? de bains?|salles? d'?\s?eau|sdb|bathrooms?|baths?)\b"
+)
+# Surfaces are not a listing filter, but their numbers must not pass for prices.
+AREA = re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:m2|m²|metres? carres?|square meters?|sq ?m|sqm)(?!\w)")
+PRICE_BETWEEN = re.compile(
+    rf"\b(?:entre|between|de|from)\s+{AMOUNT}\s*(?:et|and|a|to|-)\s*{AMOUNT}"
+)
+PRICE_MAX = re.compile(
+    r"(?:\bmoins de|\bmoins que|\bmax(?:imum)?|\bjusqu'?\s?a|\bpas plus de|\bau plus|"
+    r"\bbudget(?: max(?:imum)?)?(?: de)?|\bunder|\bbelow|\bless than|\bup to|\bat most|"
+    rf"\bno more than|<=?)\s*:?\s*{AMOUNT}"
+)
+PRICE_MIN = re.compile(
+    r"(?:\bplus de|\bau moins|\bmin(?:imum)?|\ba partir de|\bover|\babove|\bmore than|"
+    rf"\bat least|\bstarting at|\bfrom|>=?)\s*:?\s*{AMOUNT}"
+)
+PRICE_ALONE = re.compile(rf"\b{AMOUNT}")
+
+PROPERTY_TYPES = (
+    (PropertyType.COMMERCIAL, r"locaux commerciaux|local commercial|immeubles? commercia(?:l|ux)|"
+     r"bureaux?|boutiques?|magasins?|commerces?|entrepots?|offices?|shops?|stores?|"
+     r"warehouses?|commercial"),
+    (PropertyType.APARTMENT, r"appartements?|apparts?|studios?|duplex|apartments?|flats?|condos?"),
+    (PropertyType.HOUSE, r"maisons?|villas?|houses?|homes?|bungalows?"),
+    (PropertyType.LAND, r"terrains?|parcelles?|lots?|lands?|plots?"),
+)
+PROPERTY_TYPE_PATTERNS = [
+    (property_type, re.compile(rf"\b(?:{pattern})\b")) for property_type, pattern in PROPERTY_TYPES
+]
+STATUSES = (
+    (PropertyStatus.AVAILABLE, r"disponibles?|libres?|available"),
+    (PropertyStatus.PENDING, r"en attente|sous compromis|pending"),
+    (PropertyStatus.SOLD, r"vendu(?:e|s|es)?|sold"),
+    (PropertyStatus.RENTED, r"loue(?:e|s|es)?|rented"),
+)
+STATUS_PATTERNS = [
+    (property_status, re.compile(rf"\b(?:{pattern})\b")) for property_status, pattern in STATUSES
+]
+FEATURED = re.compile(r"\b(?:en vedette|coups? de coeur|mis en avant|featured)\b")
+
+# Transaction words carry no filter (a listing's status is its availability)
+# but must not end up as search keywords.
+FILLER = re.compile(
+    r"\b(?:a vendre|a louer|en location|en vente|for sale|for rent|to rent|to buy|"
+    r"je cherche|je recherche|je veux|je voudrais|j'?aimerais|je souhaite|"
+    r"i am looking for|i'?m looking for|looking for|i want|i need|show me|find me|"
+    r"montre moi|trouve moi|quelque chose|something|pas cher|bon marche|cheap|prix|price|budget|fcfa|cfa|"
+    r"quartier|ville|city|district|area|zone|neighbou?rhood)\b"
+)
+FILLER_WORDS = frozenset(
+    """
+    je j moi me cherche recherche veux voudrais trouver acheter louer vente location
+    vendre bien biens immobilier logement logements annonce annonces
+    belle beau bel beaux belles joli jolie grand grande grands grandes petit petite
+    i im want need looking search find show buy rent sale property properties
+    listing listings nice big small some any near pres proche vers
+    """.split()
+)
+LOCALITY_AFTER_PREPOSITION = re.compile(
+    r"\b(?:à|a|au|in|at|dans|vers|near|près de|pres de)\s+"
+    r"([A-ZÀ-Ý][\w'’-]+(?:[ -][A-ZÀ-Ý][\w'’-]+)*)"
+)
+
+
+class Gazetteer:
+    """Single-regex matcher of known locality names."""
+
+    def __init__(self, names: tuple[str, ...]) -> None:
+        self.names = {fold_text(name): name for name in names}
+        # Longest names first so "Agoè-Nyivé" wins over "Agoè".
+        alternatives = sorted(self.names, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"\b(?:" + "|".join(r"[ -]".join(map(re.escape, key.split())) for key in alternatives) + r")\b"
+        )
+
+    def name(self, match: re.Match[str]) -> str:
+        return self.names[fold_text(match.group(0))]
+
+
+CITY_GAZETTEER = Gazetteer(CITIES)
+DISTRICT_GAZETTEER = Gazetteer(DISTRICTS)
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Filters extracted from a prompt by the rules."""
+
+    filters: schemas.PropertyFilters
+    keywords: str | None = None
+
+    @property
+    def resolved(self) -> bool:
+        """Whether at least one structured filter (beyond keywords) was found."""
+
+        return bool(self.filters.model_dump(exclude_none=True, exclude={"q", "locality_match"}))
+
+
+def _count(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _amount(number: str, unit: str | None) -> float:
+    if re.fullmatch(r"\d{1,3}(?:[ .,]\d{3})+", number):
+        value = float(re.sub(r"[ .,]", "", number))
+    else:
+        value = float(number.replace(",", "."))
+    return value * AMOUNT_UNITS.get(unit or "", 1)
+
+
+def _is_vocabulary(words: str) -> bool:
+    """Whether capitalized ``words`` are search vocabulary rather than a place name."""
+
+    folded = fold_text(words)
+    patterns = [pattern for _, pattern in PROPERTY_TYPE_PATTERNS + STATUS_PATTERNS] + [FILLER]
+    return folded in FILLER_WORDS or any(pattern.search(folded) for pattern in patterns)
+
+
+class _Text:
+    """Simplified prompt whose matched spans are blanked out as rules consume them."""
+
+    def __init__(self, prompt: str) -> None:
+        self.value = fold_case(prompt)
+
+    def take(self, pattern: re.Pattern[str]) -> re.Match[str] | None:
+        match = pattern.search(self.value)
+        if match:
+            start, end = match.span()
+            self.value = self.value[:start] + " " * (end - start) + self.value[end:]
+        return match
+
+
+def parse_property_query(prompt: str) -> ParsedQuery:
+    """Extract listing filters from a French or English search prompt."""
+
+    text = _Text(prompt)
+    values: dict[str, object] = {}
+    text.take(AREA)
+
+    for field_name, pattern in (("bedrooms", BEDROOMS), ("bathrooms", BATHROOMS)):
+        match = text.take(pattern)
+        if match:
+            strictly_more = match.group(1) in ("plus de ", "more than ")
+            values[field_name] = _count(match.group(2)) + strictly_more
+
+    match = text.take(PRICE_BETWEEN)
+    if match:
+        low_number, low_unit, high_number, high_unit = match.groups()
+        values["min_price"] = _amount(low_number, low_unit or high_unit)
+        values["max_price"] = _amount(high_number, high_unit)
+    else:
+        match = text.take(PRICE_MAX)
+        if match:
+            values["max_price"] = _amount(*match.groups())
+        match = text.take(PRICE_MIN)
+        if match:
+            values["min_price"] = _amount(*match.groups())
+        if "min_price" not in values and "max_price" not in values:
+            match = text.take(PRICE_ALONE)
+            # A bare number is a budget only when it looks like money.
+            if match and (match.group(2) or "cfa" in match.group(0) or _amount(*match.groups()) >= 10_000):
+                values["max_price"] = _amount(*match.groups())
+
+    for property_type, pattern in PROPERTY_TYPE_PATTERNS:
+        if text.take(pattern):
+            values.setdefault("property_type", property_type)
+    for property_status, pattern in STATUS_PATTERNS:
+        if text.take(pattern):
+            values.setdefault("status", property_status)
+    if text.take(FEATURED):
+        values["is_featured"] = True
+
+    for field_name, gazetteer in (("district", DISTRICT_GAZETTEER), ("city", CITY_GAZETTEER)):
+        match = text.take(gazetteer.pattern)
+        if match:
+            values[field_name] = gazetteer.name(match)
+    if "city" not in values and "district" not in values:
+        match = LOCALITY_AFTER_PREPOSITION.search(prompt)
+        if match and not _is_vocabulary(match.group(1)):
+            values["city"] = match.group(1)
+            text.take(re.compile(rf"\b{re.escape(fold_case(match.group(1)))}\b"))
+
+    while text.take(FILLER):
+        pass
+    keywords = [
+        word
+        for word in (fold_text(text.value) or "").split()
+        if len(word) > 1 and not word.isdigit() and word not in STOP_WORDS and word not in FILLER_WORDS
+    ]
+    keyword_text = " ".join(keywords) or None
+    if keyword_text:
+        values["q"] = keyword_text
+    return ParsedQuery(filters=schemas.PropertyFilters(**values), keywords=keyword_text)
@@ -0,0 +1,260 @@
+"""Recommendations of similar properties by vectorized nearest-neighbour search.
+
+Every listing is described by a small feature vector (price, area, bedrooms,
+bathrooms, latitude, longitude, property type, city) kept in NumPy arrays in
+memory. Numeric features are standardized over the catalog at query time and
+compared with a weighted Euclidean distance; type and city add a fixed
+penalty when they differ. A query is a handful of array operations over the
+whole catalog, without a Python loop per listing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Property, PropertyStatus, PropertyType
+
+
+NUMERIC_FEATURES = ("price", "area", "bedrooms", "bathrooms", "latitude", "longitude")
+# Prices and surfaces are compared on a log scale: 10 vs 20 million differs
+# as much as 50 vs 100 million.
+LOG_FEATURES = frozenset({"price", "area"})
+FEATURE_WEIGHTS = np.array([3.0, 1.5, 1.5, 0.75, 1.0, 1.0])
+TYPE_PENALTY = 3.0
+CITY_PENALTY = 2.0
+# Distance added per feature missing on either side.
+MISSING_PENALTY = 1.0
+
+TYPE_CODES = {property_type: code for code, property_type in enumerate(PropertyType)}
+STATUS_CODES = {property_status: code for code, property_status in enumerate(PropertyStatus)}
+
+MIN_CAPACITY = 1024
+# Share of the rows that may change before the feature scales are recomputed.
+RESCALE_RATIO = 0.05
+
+
+@dataclass(frozen=True)
+class FeatureRow:
+    """Raw features of one listing."""
+
+    property_id: int
+    values: tuple[float, ...]
+    property_type: PropertyType
+    city_key: str
+    status: PropertyStatus
+
+    @classmethod
+    def from_values(
+        cls,
+        property_id: int,
+        price: float | None,
+        area: float | None,
+        bedrooms: int | None,
+        bathrooms: int | None,
+        latitude: float | None,
+        longitude: float | None,
+        property_type: PropertyType,
+        city_key: str,
+        status: PropertyStatus,
+    ) -> "FeatureRow":
+        raw = {
+            "price": price,
+            "area": area,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+        values = []
+        for name in NUMERIC_FEATURES:
+            value = raw[name]
+            if value is None or (name in LOG_FEATURES and float(value) <= 0):
+                values.append(np.nan)
+            else:
+                values.append(float(np.log(float(value))) if name in LOG_FEATURES else float(value))
+        return cls(property_id, tuple(values), PropertyType(property_type), city_key, PropertyStatus(status))
+
+    @classmethod
+    def from_property(cls, property_obj: Property) -> "FeatureRow":
+        return cls.from_values(
+            property_obj.id,
+            *(getattr(property_obj, name) for name in NUMERIC_FEATURES),
+            property_obj.property_type,
+            property_obj.city_key,
+            property_obj.status,
+        )
+
+
+FEATURE_COLUMNS = (
+    Property.id,
+    *(getattr(Property, name) for name in NUMERIC_FEATURES),
+    Property.property_type,
+    Property.city_key,
+    Property.status,
+)
+
+
+def feature_query(property_ids: list[int] | None = None) -> Select:
+    """Select the raw features of all properties, or of the given ones."""
+
+    statement = select(*FEATURE_COLUMNS)
+    if property_ids is not None:
+        statement = statement.where(Property.id.in_(property_ids))
+    return statement
+
+
+class FeatureMatrix:
+    """In-memory feature matrix of the catalog with incremental updates.
+
+    Rows ``[0, size)`` are live; deleting a row moves the last one into its
+    place. Arrays grow by doubling, so inserts are amortized O(1).
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.loaded = False
+        self._values = np.empty((0, len(NUMERIC_FEATURES)), dtype=np.float64)
+        self._types = np.empty(0, dtype=np.int8)
+        self._cities = np.empty(0, dtype=np.int32)
+        self._statuses = np.empty(0, dtype=np.int8)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        self._city_codes: dict[str, int] = {}
+        self._scale: np.ndarray | None = None
+        self._changes = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, property_id: int) -> bool:
+        return property_id in self._rows
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Build the matrix from the database on first use."""
+
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            result = await db.execute(feature_query())
+            self.load(FeatureRow.from_values(*row) for row in result)
+
+    def load(self, rows) -> None:
+        """Replace the matrix content with ``rows``."""
+
+        rows = list(rows)
+        self.size = 0
+        self._rows.clear()
+        self._reserve(max(MIN_CAPACITY, len(rows)))
+        for row in rows:
+            self.upsert(row)
+        self._scale = None
+        self.loaded = True
+
+    def upsert(self, row: FeatureRow) -> None:
+        position = self._rows.get(row.property_id)
+        if position is None:
+            self._reserve(self.size + 1)
+            position = self.size
+            self.size += 1
+            self._rows[row.property_id] = position
+            self._ids[position] = row.property_id
+        self._values[position] = row.values
+        self._types[position] = TYPE_CODES[row.property_type]
+        self._cities[position] = self._city_codes.setdefault(row.city_key, len(self._city_codes))
+        self._statuses[position] = STATUS_CODES[row.status]
+        self._changed()
+
+    def remove(self, property_id: int) -> bool:
+        position = self._rows.pop(property_id, None)
+        if position is None:
+            return False
+        last = self.size - 1
+        if position != last:
+            for array in (self._values, self._types, self._cities, self._statuses, self._ids):
+                array[position] = array[last]
+            self._rows[int(self._ids[position])] = position
+        self.size = last
+        self._changed()
+        return True
+
+    def nearest(
+        self, property_id: int, k: int, statuses: set[PropertyStatus] | None = None
+    ) -> list[tuple[int, float]]:
+        """Return up to ``k`` ``(property_id, distance)`` pairs closest to ``property_id``.
+
+        The listing itself is excluded; ``statuses`` restricts the candidates.
+        """
+
+        position = self._rows.get(property_id)
+        if position is None or k <= 0:
+            return []
+        values = self._values[: self.size]
+        deltas = (values - values[position]) / self.scale()
+        missing = np.isnan(deltas)
+        squared = np.where(missing, MISSING_PENALTY, deltas * deltas) @ FEATURE_WEIGHTS
+
+        distances = np.sqrt(squared)
+        distances += TYPE_PENALTY * (self._types[: self.size] != self._types[position])
+        distances += CITY_PENALTY * (self._cities[: self.size] != self._cities[position])
+        distances[position] = np.inf
+        if statuses is not None:
+            codes = [STATUS_CODES[value] for value in statuses]
+            distances[~np.isin(self._statuses[: self.size], codes)] = np.inf
+
+        k = min(k, self.size)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [
+            (int(self._ids[row]), float(distances[row])) for row in top if np.isfinite(distances[row])
+        ]
+
+    def scale(self) -> np.ndarray:
+        """Return the spread of each feature over the catalog.
+
+        Dividing by it keeps any single unit (francs, square meters, degrees)
+        from dominating the distance. It barely moves with a few writes, so it
+        is only recomputed once enough rows changed.
+        """
+
+        if self._scale is None:
+            values = self._values[: self.size]
+            with warnings.catch_warnings():
+                # A feature no listing has yet (e.g. no coordinates) yields NaN.
+                warnings.simplefilter("ignore", RuntimeWarning)
+                scale = np.nanstd(values, axis=0) if self.size > 1 else np.ones(values.shape[1])
+            self._scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+            self._changes = 0
+        return self._scale
+
+    def _changed(self) -> None:
+        self._changes += 1
+        if self._changes > max(1, self.size * RESCALE_RATIO):
+            self._scale = None
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self._ids):
+            return
+        capacity = max(capacity, 2 * len(self._ids))
+        for name in ("_values", "_types", "_cities", "_statuses", "_ids"):
+            current = getattr(self, name)
+            grown = np.empty((capacity, *current.shape[1:]), dtype=current.dtype)
+            grown[: self.size] = current[: self.size]
+            setattr(self, name, grown)
+
+
+def similarity_score(distance: float) -> float:
+    """Map a feature distance to a score in ``(0, 1]``, 1 meaning identical."""
+
+    return 1.0 / (1.0 + distance)
+
+
+similarity_index = FeatureMatrix()
@@ -0,0 +1,323 @@
+"""Columnar in-memory snapshot of the listing filters.
+
+The busiest listing requests combine a few equality and range filters (city,
+type, status, price, bedrooms…) and the newest-first order. With the
+``snapshot`` listing engine they are answered from NumPy column arrays held
+in memory: each filter is a vectorized boolean mask, the page is picked by
+``(created_at, id)`` and only its rows are then read from the database, by
+primary key.
+
+The snapshot follows the table through the ``updated_at`` watermark: a
+refresh re-reads the rows updated since the previous one, and a count check
+catches rows deleted or inserted behind the watermark by other workers.
+Writes made through this worker are applied immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import schemas
+from ..config import get_settings
+from ..models import Property
+from .listings import _locality_matches
+from .similarity import STATUS_CODES, TYPE_CODES
+
+
+LISTING_ENGINES = ("sql", "snapshot")
+
+SNAPSHOT_COLUMNS = (
+    Property.id,
+    Property.price,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.property_type,
+    Property.status,
+    Property.city_key,
+    Property.is_featured,
+    Property.created_at,
+    Property.updated_at,
+)
+
+# Rows committed by another worker can carry an ``updated_at`` slightly older
+# than the watermark (the timestamp is taken before the commit); re-reading a
+# short window behind it picks them up.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+MIN_CAPACITY = 1024
+
+
+def snapshot_row(property_obj: Property) -> tuple:
+    """Return the snapshot columns of a property, in :data:`SNAPSHOT_COLUMNS` order."""
+
+    return tuple(getattr(property_obj, column.key) for column in SNAPSHOT_COLUMNS)
+
+
+def _micros(value: datetime) -> int:
+    return int(np.datetime64(value, "us").astype(np.int64))
+
+
+@dataclass
+class SnapshotStats:
+    """Size and usage counters of the listing snapshot."""
+
+    rows: int = 0
+    served: int = 0
+    refreshes: int = 0
+    refreshed_rows: int = 0
+    last_refresh_ms: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class ListingSnapshot:
+    """Column arrays of the filterable listing fields, indexed by row position.
+
+    Rows ``[0, size)`` are live; deleting a row moves the last one into its
+    place and arrays grow by doubling.
+    """
+
+    def __init__(self, enabled: bool = False, max_age_seconds: float = 5.0) -> None:
+        self.enabled = enabled
+        self.max_age_seconds = max_age_seconds
+        self.size = 0
+        self.loaded = False
+        self.watermark: datetime | None = None
+        self._refreshed_at = 0.0
+        self._columns = {
+            "ids": np.empty(0, dtype=np.int64),
+            "prices": np.empty(0, dtype=np.float64),
+            "bedrooms": np.empty(0, dtype=np.float32),
+            "bathrooms": np.empty(0, dtype=np.float32),
+            "types": np.empty(0, dtype=np.int8),
+            "statuses": np.empty(0, dtype=np.int8),
+            "cities": np.empty(0, dtype=np.int32),
+            "featured": np.empty(0, dtype=np.bool_),
+            "created": np.empty(0, dtype=np.int64),
+        }
+        self._rows: dict[int, int] = {}
+        self._city_codes: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._stats = SnapshotStats()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, property_id: int) -> bool:
+        return property_id in self._rows
+
+    def supports(self, filters: schemas.PropertyFilters, sort: schemas.ListingSort) -> bool:
+        """Tell whether a listing request can be answered from the snapshot.
+
+        Keyword, district and geographic searches, and distance sorting, stay
+        on SQL.
+        """
+
+        return (
+            self.enabled
+            and sort is schemas.ListingSort.NEWEST
+            and not (filters.q or filters.district or filters.bbox or filters.near)
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Load the snapshot, or catch up with the table when it is older than its maximum age."""
+
+        if self.loaded and time.monotonic() - self._refreshed_at < self.max_age_seconds:
+            return
+        async with self._lock:
+            if self.loaded and time.monotonic() - self._refreshed_at < self.max_age_seconds:
+                return
+            started = time.perf_counter()
+            if not self.loaded:
+                rows = (await db.execute(select(*SNAPSHOT_COLUMNS))).all()
+                self.load(rows)
+            else:
+                rows = (await db.execute(self._changes_query())).all()
+                for row in rows:
+                    self.upsert(row)
+                await self._reconcile(db)
+            # Only rows read here move the watermark: a local write must not
+            # skip changes other workers made before it.
+            latest = max((row.updated_at for row in rows if row.updated_at is not None), default=None)
+            if latest is not None and (self.watermark is None or latest > self.watermark):
+                self.watermark = latest
+            self._refreshed_at = time.monotonic()
+            self._stats.refreshes += 1
+            self._stats.refreshed_rows += len(rows)
+            self._stats.last_refresh_ms = int((time.perf_counter() - started) * 1000)
+
+    def _changes_query(self) -> Select:
+        statement = select(*SNAPSHOT_COLUMNS)
+        if self.watermark is not None:
+            statement = statement.where(Property.updated_at >= self.watermark - WATERMARK_OVERLAP)
+        return statement
+
+    async def _reconcile(self, db: AsyncSession) -> None:
+        # Deletions leave no updated_at behind; compare the ids only when the
+        # row count says something was missed.
+        if await db.scalar(select(func.count(Property.id))) == self.size:
+            return
+        current = set(await db.scalars(select(Property.id)))
+        for property_id in [property_id for property_id in self._rows if property_id not in current]:
+            self.remove(property_id)
+        missing = [property_id for property_id in current if property_id not in self._rows]
+        if missing:
+            for row in await db.execute(select(*SNAPSHOT_COLUMNS).where(Property.id.in_(missing))):
+                self.upsert(row)
+
+    def load(self, rows) -> None:
+        """Replace the snapshot content with ``rows`` of :data:`SNAPSHOT_COLUMNS`."""
+
+        rows = list(rows)
+        size = len(rows)
+        (
+            ids, prices, bedrooms, bathrooms, property_types,
+            property_statuses, city_keys, featured, created, _updated,
+        ) = zip(*rows) if rows else ((),) * len(SNAPSHOT_COLUMNS)
+
+        def nullable(values) -> list[float]:
+            return [np.nan if value is None else float(value) for value in values]
+
+        # Build whole columns at once rather than row by row.
+        values = {
+            "ids": ids,
+            "prices": nullable(prices),
+            "bedrooms": nullable(bedrooms),
+            "bathrooms": nullable(bathrooms),
+            "types": [TYPE_CODES[value] for value in property_types],
+            "statuses": [STATUS_CODES[value] for value in property_statuses],
+            "cities": [self._city_codes.setdefault(key, len(self._city_codes)) for key in city_keys],
+            "featured": [bool(value) for value in featured],
+            "created": np.array(created, dtype="datetime64[us]").astype(np.int64),
+        }
+        capacity = max(MIN_CAPACITY, size)
+        for name, array in self._columns.items():
+            column = np.empty(capacity, dtype=array.dtype)
+            column[:size] = values[name]
+            self._columns[name] = column
+        self.size = size
+        self._rows = {int(property_id): position for position, property_id in enumerate(ids)}
+        self.watermark = None
+        self.loaded = True
+
+    def upsert(self, row) -> None:
+        (
+            property_id, price, bedrooms, bathrooms, property_type,
+            property_status, city_key, is_featured, created_at, _updated_at,
+        ) = row
+        position = self._rows.get(property_id)
+        if position is None:
+            self._reserve(self.size + 1)
+            position = self.size
+            self.size += 1
+            self._rows[property_id] = position
+        columns = self._columns
+        columns["ids"][position] = property_id
+        columns["prices"][position] = np.nan if price is None else float(price)
+        columns["bedrooms"][position] = np.nan if bedrooms is None else bedrooms
+        columns["bathrooms"][position] = np.nan if bathrooms is None else bathrooms
+        columns["types"][position] = TYPE_CODES[property_type]
+        columns["statuses"][position] = STATUS_CODES[property_status]
+        columns["cities"][position] = self._city_codes.setdefault(city_key, len(self._city_codes))
+        columns["featured"][position] = bool(is_featured)
+        columns["created"][position] = _micros(created_at)
+
+    def remove(self, property_id: int) -> bool:
+        position = self._rows.pop(property_id, None)
+        if position is None:
+            return False
+        last = self.size - 1
+        if position != last:
+            for array in self._columns.values():
+                array[position] = array[last]
+            self._rows[int(self._columns["ids"][position])] = position
+        self.size = last
+        return True
+
+    def search(
+        self,
+        filters: schemas.PropertyFilters,
+        limit: int,
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[int]:
+        """Return the ids of a page of listings matching ``filters``, newest first.
+
+        ``after`` is the ``(created_at, id)`` position of a keyset cursor.
+        """
+
+        size = self.size
+        columns = {name: array[:size] for name, array in self._columns.items()}
+        mask = np.ones(size, dtype=np.bool_)
+        if filters.city:
+            codes = [
+                code
+                for key, code in self._city_codes.items()
+                if _locality_matches(key, filters.city, filters.locality_match)
+            ]
+            mask &= np.isin(columns["cities"], codes)
+        if filters.property_type:
+            mask &= columns["types"] == TYPE_CODES[filters.property_type]
+        if filters.status:
+            mask &= columns["statuses"] == STATUS_CODES[filters.status]
+        if filters.min_price is not None:
+            mask &= columns["prices"] >= filters.min_price
+        if filters.max_price is not None:
+            mask &= columns["prices"] <= filters.max_price
+        if filters.bedrooms is not None:
+            mask &= columns["bedrooms"] >= filters.bedrooms
+        if filters.bathrooms is not None:
+            mask &= columns["bathrooms"] >= filters.bathrooms
+        if filters.is_featured is not None:
+            mask &= columns["featured"] == filters.is_featured
+        if after is not None:
+            created_at, property_id = _micros(after[0]), after[1]
+            created = columns["created"]
+            mask &= (created < created_at) | ((created == created_at) & (columns["ids"] < property_id))
+
+        rows = np.flatnonzero(mask)
+        wanted = offset + limit
+        if len(rows) > wanted:
+            # Only the newest rows can make the page: keep those at or above
+            # the wanted-th creation date before sorting.
+            created = columns["created"][rows]
+            threshold = np.partition(created, len(rows) - wanted)[len(rows) - wanted]
+            rows = rows[created >= threshold]
+        order = np.lexsort((-columns["ids"][rows], -columns["created"][rows]))
+        self._stats.served += 1
+        return columns["ids"][rows[order]][offset:wanted].tolist()
+
+    def stats(self) -> SnapshotStats:
+        return SnapshotStats(**{**asdict(self._stats), "rows": self.size})
+
+    def _reserve(self, capacity: int) -> None:
+        current = len(self._columns["ids"])
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current)
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[: self.size] = array[: self.size]
+            self._columns[name] = grown
+
+
+def _create_listing_snapshot() -> ListingSnapshot:
+    settings = get_settings()
+    if settings.listing_engine not in LISTING_ENGINES:
+        raise ValueError(
+            f"Unknown listing engine {settings.listing_engine!r}; expected one of {LISTING_ENGINES}"
+        )
+    return ListingSnapshot(
+        enabled=settings.listing_engine == "snapshot",
+        max_age_seconds=settings.listing_snapshot_max_age_seconds,
+    )
+
+
+listing_snapshot = _create_listing_snapshot()
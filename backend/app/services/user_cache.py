@@ -0,0 +1,91 @@
+"""Short-lived cache of the user records behind authenticated requests.
+
+Access tokens are verified without the database, and the caller's record is
+then read from this cache: an authenticated request normally costs no query
+for identity. Entries expire after a short TTL and are dropped as soon as
+the user is deactivated through this worker; other workers notice within
+the TTL.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from ..config import get_settings
+from ..database import AsyncSessionLocal
+from ..models import User
+from .cache import CacheBackend, CacheStats, create_cache_backend
+
+
+# Key of the user that requests without a token act as, in demo mode.
+DEMO_USER_KEY = "demo"
+
+
+class UserCache:
+    """Active user records keyed by id, loaded from the database on a miss."""
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    async def get(self, user_id: int) -> User | None:
+        """Return the active user ``user_id``, or ``None`` if unknown or inactive."""
+
+        cached = self.backend.get(str(user_id))
+        if cached is not None:
+            return cached
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, user_id)
+        return self.put(user) if user is not None and user.is_active else None
+
+    async def demo_user(self) -> User | None:
+        """Return the first active non-superuser, the identity of token-less demo requests.
+
+        Superusers are never used: an anonymous caller must not get admin rights.
+        """
+
+        cached = self.backend.get(DEMO_USER_KEY)
+        if cached is not None:
+            return cached
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(
+                select(User)
+                .where(User.is_active.is_(True), User.is_superuser.is_(False))
+                .order_by(User.id)
+                .limit(1)
+            )
+        if user is not None:
+            self.backend.set(DEMO_USER_KEY, user)
+        return user
+
+    def put(self, user: User) -> User:
+        """Cache a user record just read from the database (e.g. at login)."""
+
+        self.backend.set(str(user.id), user)
+        return user
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget a user, e.g. after deactivation."""
+
+        self.backend.delete(str(user_id))
+        demo = self.backend.get(DEMO_USER_KEY)
+        if demo is not None and demo.id == user_id:
+            self.backend.delete(DEMO_USER_KEY)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+
+def _create_user_cache() -> UserCache:
+    settings = get_settings()
+    backend = create_cache_backend(
+        "memory",
+        max_entries=settings.user_cache_max_entries,
+        ttl_seconds=settings.user_cache_ttl_seconds,
+    )
+    return UserCache(backend)
+
+
+user_cache = _create_user_cache()
@@ -0,0 +1,86 @@
+"""Shared fixtures: the API running against a throwaway SQLite database.
+
+Settings are read when the application is imported, so the environment is
+set up here, before any ``app`` import.
+"""
+
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_DATABASE_DIR = tempfile.mkdtemp(prefix="smartimmo-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_DATABASE_DIR}/test.db",
+    ENVIRONMENT="test",
+    DEBUG="false",
+    SECRET_KEY="test-secret-key",
+    # On, so that the tests can check which routes ignore it.
+    DEMO_USER_FALLBACK="true",
+    SEMANTIC_SEARCH_ENABLED="false",
+    OLLAMA_WARM_UP="false",
+    PASSWORD_HASH_WORKERS="0",
+    BCRYPT_ROUNDS="4",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import Engine, event  # noqa: E402
+
+from app.database import SessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+from app.security import get_password_hash  # noqa: E402
+
+
+PASSWORD = "TestPass123!"
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Entering the client runs the startup hooks, which migrate the database.
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def users(client) -> dict[str, User]:
+    """A regular user, the identity of token-less demo requests, and a superuser."""
+
+    with SessionLocal() as db:
+        regular = User(email="agent@example.com", full_name="Agent", hashed_password=get_password_hash(PASSWORD))
+        admin = User(
+            email="admin@example.com",
+            full_name="Admin",
+            hashed_password=get_password_hash(PASSWORD),
+            is_superuser=True,
+        )
+        db.add_all([regular, admin])
+        db.commit()
+        return {"regular": regular, "admin": admin}
+
+
+def auth_headers(client: TestClient, user: User) -> dict[str, str]:
+    response = client.post("/api/v1/users/login", json={"email": user.email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@contextmanager
+def count_queries(target: Engine | None = None) -> Iterator[list[str]]:
+    """Collect the SQL statements sent to the database meanwhile.
+
+    ``target`` defaults to the engine behind the API's async sessions.
+    """
+
+    statements: list[str] = []
+
+    def record(connection, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    target = target or async_engine.sync_engine
+    event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(target, "before_cursor_execute", record)
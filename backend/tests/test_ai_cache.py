@@ -0,0 +1,28 @@
+"""Keys of the AI answer cache."""
+
+import pytest
+
+from app.services.ai_cache import PromptCache
+
+
+@pytest.mark.parametrize(
+    ("first", "second"),
+    [
+        ("Maison à Lomé", "  maison a  LOME "),
+        ("villa\tpiscine", "Villa piscine"),
+    ],
+)
+def test_prompts_differing_by_case_accents_or_spacing_share_a_key(first, second):
+    assert PromptCache.key(first, "llama3") == PromptCache.key(second, "llama3")
+
+
+@pytest.mark.parametrize(
+    ("first", "second"),
+    [
+        ("maison < 5M", "maison > 5M"),
+        ("3-4 chambres", "34 chambres"),
+        ("appartement 2 chambres", "appartement 2. chambres ?"),
+    ],
+)
+def test_prompts_differing_by_digits_or_operators_do_not_share_a_key(first, second):
+    assert PromptCache.key(first, "llama3") != PromptCache.key(second, "llama3")
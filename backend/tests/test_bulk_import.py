@@ -0,0 +1,127 @@
+"""Bulk import of listings through the API and the command line."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app import import_listings
+from app.database import AsyncSessionLocal
+from app.models import Property
+from app.schemas import ListingFormat
+from app.services import ListingImporter
+from app.services.bulk_import import insert_properties
+
+from .conftest import auth_headers, count_queries
+
+
+CSV_INPUT = """title,description,price,city,property_type,bedrooms,images
+Villa Bè,"Grande villa
+avec piscine",450000,Lomé,house,4,https://example.com/a.jpg|https://example.com/b.jpg
+Studio Tokoin,Studio meublé,not a price,Lomé,apartment,,
+Terrain Agoè,Terrain viabilisé,90000,Lomé,land,,
+"""
+
+
+def jsonl(titles: list[str]) -> str:
+    return "".join(
+        json.dumps(
+            {"title": title, "description": "Import", "price": 100_000, "city": "Kpalimé", "property_type": "house"}
+        )
+        + "\n"
+        for title in titles
+    )
+
+
+async def chunks(text: str, size: int = 7):
+    data = text.encode()
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def test_csv_import_reports_rejected_rows_by_line(client, users):
+    response = client.post(
+        "/api/v1/properties/import",
+        content=CSV_INPUT.encode(),
+        headers={**auth_headers(client, users["regular"]), "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (3, 2, 1)
+    # The quoted description spans lines 2-3, so the bad row is on line 4.
+    assert [error["line"] for error in report["errors"]] == [4]
+    assert report["errors"][0]["message"].startswith("price:")
+
+    villas = client.get("/api/v1/properties", params={"q": "Villa Bè"}).json()
+    assert [villa["description"] for villa in villas] == ["Grande villa\navec piscine"]
+    assert villas[0]["owner_id"] == users["regular"].id
+    assert [(image["url"], image["is_primary"]) for image in villas[0]["images"]] == [
+        ("https://example.com/a.jpg", True),
+        ("https://example.com/b.jpg", False),
+    ]
+
+
+def test_import_format_comes_from_the_content_type(client, users):
+    headers = auth_headers(client, users["regular"])
+
+    imported = client.post(
+        "/api/v1/properties/import",
+        content=jsonl(["Maison Kpalimé"]).encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    unknown = client.post(
+        "/api/v1/properties/import", content=b"{}", headers={**headers, "Content-Type": "application/pdf"}
+    )
+
+    assert imported.status_code == 200 and imported.json()["imported"] == 1
+    assert unknown.status_code == 415
+
+
+def test_batches_get_the_ids_of_their_own_rows(users):
+    titles = [f"Lot {index}" for index in range(5)]
+
+    async def run() -> tuple[ListingImporter, dict[int, str]]:
+        async with AsyncSessionLocal() as db:
+            importer = ListingImporter(db, users["regular"].id, ListingFormat.JSONL, batch_size=2)
+            await importer.run(chunks(jsonl(titles)))
+            rows = await db.execute(select(Property.id, Property.title))
+            return importer, dict(rows.all())
+
+    with count_queries() as statements:
+        importer, stored = asyncio.run(run())
+
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO properties")]
+    assert len(inserts) == 3
+    assert [stored[property_id] for property_id in importer.property_ids] == titles
+
+
+def test_mysql_ids_are_read_back_row_by_row():
+    # Interleaved auto-increment: another insert took id 11 meanwhile.
+    ids = iter([10, 12, 13])
+
+    class Session:
+        bind = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+        statements = 0
+
+        async def execute(self, statement):
+            self.statements += 1
+            return SimpleNamespace(lastrowid=next(ids))
+
+    session = Session()
+    rows = [{"title": title} for title in "abc"]
+
+    assert asyncio.run(insert_properties(session, rows)) == [10, 12, 13]
+    assert session.statements == 3
+
+
+def test_cli_imports_a_file(tmp_path, users, capsys):
+    path = tmp_path / "annonces.jsonl"
+    path.write_text(jsonl(["Maison CLI 1", "Maison CLI 2"]))
+
+    assert import_listings.main([str(path), "--owner", users["regular"].email, "--batch-size", "1"]) == 0
+    assert capsys.readouterr().out.startswith("2 of 2 rows imported, 0 rejected")
+
+    assert import_listings.main([str(path), "--owner", "nobody@example.com"]) == 1
+    assert "Unknown user" in capsys.readouterr().err
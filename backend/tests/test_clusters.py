@@ -0,0 +1,97 @@
+"""Incremental upkeep of the map clusters."""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, sqlite
+
+from app.database import SessionLocal, engine
+from app.geo import encode_geohash
+from app.models import Property, PropertyCluster, PropertyType
+from app.services.clusters import _upsert_cells, add_to_clusters, rebuild_clusters
+
+from .conftest import count_queries
+
+
+def cluster_rows(db) -> dict[tuple[int, str], tuple]:
+    return {
+        (row.cell_precision, row.cell): (
+            row.listing_count,
+            pytest.approx(row.latitude_sum),
+            pytest.approx(row.longitude_sum),
+            float(row.min_price),
+            float(row.max_price),
+        )
+        for row in db.scalars(select(PropertyCluster))
+    }
+
+
+def listing(owner_id: int, latitude: float, longitude: float, price: int) -> Property:
+    return Property(
+        title="Maison géolocalisée",
+        description="Maison",
+        price=price,
+        city="Lomé",
+        latitude=latitude,
+        longitude=longitude,
+        property_type=PropertyType.HOUSE,
+        owner_id=owner_id,
+    )
+
+
+def test_incremental_clusters_match_a_rebuild(users):
+    with SessionLocal() as db:
+        listings = [
+            listing(users["regular"].id, 6.1375 + index / 1000, 1.2123 + index / 1000, 100_000 + index * 1000)
+            for index in range(6)
+        ]
+        db.add_all(listings)
+        db.commit()
+        listings[0].price = 500_000
+        listings[1].latitude, listings[1].longitude = 9.55, 1.19
+        db.delete(listings[5])
+        # The lowest and highest prices leave their cells.
+        db.delete(listings[2])
+        db.commit()
+
+        incremental = cluster_rows(db)
+        rebuild_clusters(db.connection())
+        assert cluster_rows(db) == incremental
+        db.rollback()
+
+
+def test_removing_listings_takes_a_fixed_number_of_statements(users):
+    with SessionLocal() as db:
+        listings = [listing(users["regular"].id, 6.2 + index, 1.3, 150_000) for index in range(4)]
+        db.add_all(listings)
+        db.commit()
+
+        for obj in listings:
+            db.delete(obj)
+        with count_queries(engine) as statements:
+            db.flush()
+        db.commit()
+
+    clusters = [statement for statement in statements if "property_clusters" in statement]
+    assert len(clusters) <= 4, clusters
+
+
+def test_adding_to_a_cell_created_meanwhile_adds_up():
+    geohash = encode_geohash(7.0, 1.0)
+    with SessionLocal() as db:
+        connection = db.connection()
+        add_to_clusters(connection, [(geohash, 7.0, 1.0, 100_000)])
+        add_to_clusters(connection, [(geohash, 7.0, 1.0, 300_000)])
+        cell = db.get(PropertyCluster, (8, geohash[:8]))
+        assert (cell.listing_count, float(cell.min_price), float(cell.max_price)) == (2, 100_000, 300_000)
+        db.rollback()
+
+
+@pytest.mark.parametrize(
+    ("dialect", "clause"),
+    [
+        (sqlite.dialect(), "ON CONFLICT (cell_precision, cell) DO UPDATE"),
+        (mysql.dialect(), "ON DUPLICATE KEY UPDATE"),
+    ],
+)
+def test_cells_are_upserted(dialect, clause):
+    assert clause in str(_upsert_cells(dialect.name).compile(dialect=dialect))
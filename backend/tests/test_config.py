@@ -0,0 +1,12 @@
+"""Validation of the settings."""
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+def test_listing_cache_only_accepts_the_memory_backend():
+    assert Settings(listing_cache_backend="memory").listing_cache_backend == "memory"
+    with pytest.raises(ValidationError, match="only 'memory'"):
+        Settings(listing_cache_backend="disk")
@@ -0,0 +1,96 @@
+"""Embedding index shared by several worker processes."""
+
+import asyncio
+import multiprocessing
+
+import numpy as np
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import Property, PropertyType
+from app.services import embeddings
+from app.services.ai_agent import ai_admission, ollama_client
+from app.services.embeddings import VectorIndex
+
+
+MODEL = "test-embedding"
+ROWS_PER_WORKER = 150
+
+
+def vector(property_id: int) -> list[float]:
+    return [float(property_id), 1.0, 0.0, 0.0]
+
+
+def write_rows(directory: str, first_id: int) -> None:
+    index = VectorIndex(directory, MODEL)
+    for property_id in range(first_id, first_id + ROWS_PER_WORKER):
+        with index.write_lock():
+            index.upsert(property_id, vector(property_id), property_id)
+
+
+def test_workers_writing_the_same_index_keep_each_others_rows(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=write_rows, args=(str(tmp_path), first_id))
+        for first_id in (1, 1 + ROWS_PER_WORKER)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    index = VectorIndex(tmp_path, MODEL)
+    assert sorted(index.ids().tolist()) == list(range(1, 1 + 2 * ROWS_PER_WORKER))
+    for property_id in (1, ROWS_PER_WORKER, 2 * ROWS_PER_WORKER):
+        assert index.digest(property_id) == property_id
+        [(found, score)] = index.search(vector(property_id), 1, np.array([property_id]))
+        assert found == property_id and np.isclose(score, 1.0)
+
+
+def test_reader_sees_rows_written_by_another_process(tmp_path):
+    reader = VectorIndex(tmp_path, MODEL)
+    assert len(reader) == 0
+
+    writer = VectorIndex(tmp_path, MODEL)
+    with writer.write_lock():
+        for property_id in range(1, 100):
+            writer.upsert(property_id, vector(property_id), property_id)
+
+    assert len(reader) == 99
+    assert reader.digest(99) == 99
+
+
+def test_background_sync_goes_through_admission(tmp_path, users, monkeypatch):
+    with SessionLocal() as db:
+        db.add(
+            Property(
+                title="Villa avec jardin",
+                description="Au calme",
+                price=250_000,
+                city="Lomé",
+                property_type=PropertyType.HOUSE,
+                owner_id=users["regular"].id,
+            )
+        )
+        db.commit()
+
+    in_flight = []
+
+    async def embed(text: str) -> list[float]:
+        in_flight.append(ai_admission.stats().in_flight)
+        return [1.0, 0.0, 0.0, 0.0]
+
+    monkeypatch.setattr(ollama_client, "embed", embed)
+    monkeypatch.setattr(embeddings, "semantic_index", VectorIndex(tmp_path, MODEL))
+
+    async def sync() -> embeddings.SyncReport:
+        async with AsyncSessionLocal() as db:
+            return await embeddings.sync_embeddings(db)
+
+    admitted = ai_admission.stats().admitted
+    report = asyncio.run(sync())
+
+    assert report.embedded >= 1 and report.failed == 0
+    assert ai_admission.stats().admitted - admitted == report.embedded
+    assert set(in_flight) == {1}
+    assert len(VectorIndex(tmp_path, MODEL)) == report.embedded
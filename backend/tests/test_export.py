@@ -0,0 +1,106 @@
+"""Streaming export of the listing catalog."""
+
+import asyncio
+import csv
+import gzip
+import io
+
+import pytest
+
+from app import schemas
+from app.database import SessionLocal
+from app.models import Property, PropertyImage, PropertyType
+from app.services import export_listings, gzip_chunks
+from app.services.bulk_import import parse_listing
+from app.services.export import CSV_FIELDS
+
+
+CITY = "Sokodé"
+
+
+@pytest.fixture(scope="module")
+def listings(users) -> list[int]:
+    with SessionLocal() as db:
+        listings = [
+            Property(
+                title=f"Maison {index}",
+                description="Maison à Sokodé",
+                price=100_000 * (index + 1),
+                city=CITY,
+                property_type=PropertyType.HOUSE,
+                owner_id=users["regular"].id,
+                # The primary image is not the first one stored.
+                images=[
+                    PropertyImage(url=f"https://example.com/{index}/side.jpg", is_primary=False),
+                    PropertyImage(url=f"https://example.com/{index}/front.jpg", is_primary=True),
+                ],
+            )
+            for index in range(5)
+        ]
+        db.add_all(listings)
+        db.commit()
+        return [listing.id for listing in listings]
+
+
+def export(client, **params) -> bytes:
+    response = client.get("/api/v1/properties/export", params={"city": CITY, **params})
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def test_export_applies_the_listing_filters(client, listings):
+    lines = export(client, min_price=300_000).decode().splitlines()
+
+    assert [schemas.PropertyRead.model_validate_json(line).id for line in lines] == listings[2:]
+
+
+def test_ndjson_lines_round_trip_through_property_read(client, listings):
+    lines = export(client).decode().splitlines()
+
+    assert len(lines) == len(listings)
+    for line in lines:
+        assert schemas.PropertyRead.model_validate_json(line).model_dump_json() == line
+
+
+def test_csv_joins_images_primary_first_and_can_be_reimported(client, listings):
+    text = export(client, format="csv").decode()
+    header, *records = text.splitlines()
+
+    assert header.split(",") == CSV_FIELDS
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [int(row["id"]) for row in rows] == listings
+    assert rows[0]["images"] == "https://example.com/0/front.jpg|https://example.com/0/side.jpg"
+
+    listing = parse_listing(records[0] + "\n", schemas.ListingFormat.CSV, CSV_FIELDS)
+    assert [(image.url, image.is_primary) for image in listing.images] == [
+        ("https://example.com/0/front.jpg", True),
+        ("https://example.com/0/side.jpg", False),
+    ]
+
+
+def test_gzip_export_decompresses_to_the_plain_export(client, listings):
+    assert gzip.decompress(export(client, format="csv", gzip="true")) == export(client, format="csv")
+
+
+def test_gzip_chunks_decompress_to_the_same_bytes():
+    chunks = [b"id,title\n", b"", b"1,Maison\n" * 1000]
+
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def compress() -> bytes:
+        return b"".join([chunk async for chunk in gzip_chunks(source())])
+
+    assert gzip.decompress(asyncio.run(compress())) == b"".join(chunks)
+
+
+def test_batches_stay_within_the_batch_size(listings):
+    filters = schemas.PropertyFilters(city=CITY)
+
+    async def collect() -> list[bytes]:
+        return [chunk async for chunk in export_listings(filters, schemas.ListingFormat.JSONL, batch_size=2)]
+
+    chunks = asyncio.run(collect())
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
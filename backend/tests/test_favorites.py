@@ -0,0 +1,57 @@
+"""Adding and removing favorites."""
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.api.v1.favorites import insert_favorite
+from app.database import SessionLocal
+from app.models import Property, PropertyType
+
+from .conftest import auth_headers
+
+
+@pytest.fixture(scope="module")
+def listing_id(users) -> int:
+    with SessionLocal() as db:
+        listing = Property(
+            title="Maison à Kara",
+            description="Maison avec jardin",
+            price=250_000,
+            city="Kara",
+            property_type=PropertyType.HOUSE,
+            owner_id=users["admin"].id,
+        )
+        db.add(listing)
+        db.commit()
+        return listing.id
+
+
+def test_adding_a_favorite_twice_creates_it_once(client, users, listing_id):
+    headers = auth_headers(client, users["regular"])
+
+    created = client.post(f"/api/v1/favorites/{listing_id}", headers=headers)
+    repeated = client.post(f"/api/v1/favorites/{listing_id}", headers=headers)
+
+    assert created.status_code == 201
+    assert repeated.status_code == 200
+    assert repeated.json()["id"] == created.json()["id"]
+    favorites = client.get("/api/v1/favorites", headers=headers).json()
+    assert [favorite["property"]["id"] for favorite in favorites].count(listing_id) == 1
+
+    assert client.delete(f"/api/v1/favorites/{listing_id}", headers=headers).status_code == 204
+    assert client.delete(f"/api/v1/favorites/{listing_id}", headers=headers).status_code == 204
+
+
+def test_adding_a_missing_property_is_not_found(client, users):
+    response = client.post("/api/v1/favorites/999999", headers=auth_headers(client, users["regular"]))
+
+    assert response.status_code == 404
+
+
+def test_mysql_duplicates_are_ignored_rather_than_updated():
+    # ON DUPLICATE KEY UPDATE reports a duplicate as one affected row under
+    # CLIENT_FOUND_ROWS, which aiomysql sets: the duplicate must insert nothing.
+    sql = str(insert_favorite(1, 2, dialect="mysql").compile(dialect=mysql.dialect()))
+
+    assert sql.startswith("INSERT IGNORE INTO favorites")
+    assert "ON DUPLICATE KEY" not in sql
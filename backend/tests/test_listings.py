@@ -0,0 +1,63 @@
+"""Number of queries behind a page of property listings."""
+
+import pytest
+
+from app.database import SessionLocal
+from app.models import Property, PropertyImage, PropertyType
+from app.services import listing_cache
+
+from .conftest import count_queries
+
+
+@pytest.fixture(scope="module")
+def listings(users) -> None:
+    with SessionLocal() as db:
+        db.add_all(
+            Property(
+                title=f"Appartement {index}",
+                description="Appartement meublé",
+                price=100_000 + index,
+                city="Lomé",
+                property_type=PropertyType.APARTMENT,
+                owner_id=users["regular"].id,
+                images=[
+                    PropertyImage(url=f"https://example.com/{index}/{n}.jpg", is_primary=n == 0)
+                    for n in range(2)
+                ],
+            )
+            for index in range(30)
+        )
+        db.commit()
+
+
+@pytest.mark.parametrize("view", ["full", "card"])
+def test_listing_page_queries_do_not_grow_with_the_page(client, listings, view):
+    counts = {}
+    for limit in (5, 30):
+        listing_cache.clear()
+        with count_queries() as statements:
+            response = client.get("/api/v1/properties", params={"limit": limit, "view": view})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        assert all(len(listing["images"]) == 2 for listing in response.json())
+        counts[limit] = statements
+
+    # One query for the page and one for the images of all its listings.
+    assert len(counts[5]) == len(counts[30]) == 2, counts[30]
+
+
+@pytest.mark.parametrize(
+    ("params", "found"),
+    [
+        ({"city": "ome"}, True),
+        ({"city": "LOME"}, True),
+        ({"city": "ome", "locality_match": "prefix"}, False),
+        ({"city": "lo", "locality_match": "prefix"}, True),
+        ({"city": "lom", "locality_match": "exact"}, False),
+    ],
+)
+def test_city_filter_matches_substrings_unless_asked_otherwise(client, listings, params, found):
+    response = client.get("/api/v1/properties", params=params)
+
+    assert response.status_code == 200
+    assert bool(response.json()) is found
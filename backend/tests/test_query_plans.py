@@ -0,0 +1,41 @@
+"""Index usage of the listing filter shapes, as checked by ``app.query_plans``."""
+
+import pytest
+
+from app.database import engine
+from app.query_plans import ORDERED_SCAN_SHAPES, explain, listing_statements, uses_index
+
+
+def test_every_listing_shape_searches_an_index(client):
+    with engine.connect() as connection:
+        for name, statement in listing_statements("sqlite").items():
+            plan = explain(connection, statement)
+            assert uses_index(plan, "sqlite", ordered_scan=name in ORDERED_SCAN_SHAPES), (name, plan)
+
+
+@pytest.mark.parametrize(
+    ("plan", "ordered_scan", "ok"),
+    [
+        (["SEARCH properties USING INDEX ix_properties_bedrooms (bedrooms>? AND bedrooms<?)"], False, True),
+        (["SEARCH properties USING COVERING INDEX ix_properties_price (price>?)"], False, True),
+        (["SCAN properties USING INDEX ix_properties_created_at_id"], False, False),
+        (["SCAN properties USING INDEX ix_properties_created_at_id"], True, True),
+        (["SCAN properties"], True, False),
+    ],
+)
+def test_sqlite_index_scans_only_pass_for_ordered_shapes(plan, ordered_scan, ok):
+    assert uses_index(plan, "sqlite", ordered_scan=ordered_scan) is ok
+
+
+@pytest.mark.parametrize(
+    ("line", "ordered_scan", "ok"),
+    [
+        ("properties: type=ref key=ix_properties_status_created_at extra=Using where", False, True),
+        ("properties: type=range key=ix_properties_bedrooms extra=Using filesort", False, True),
+        ("properties: type=index key=ix_properties_created_at_id extra=Using where", False, False),
+        ("properties: type=index key=ix_properties_created_at_id extra=None", True, True),
+        ("properties: type=ALL key=None extra=Using where", True, False),
+    ],
+)
+def test_mysql_full_index_scans_only_pass_for_ordered_shapes(line, ordered_scan, ok):
+    assert uses_index([line], "mysql", ordered_scan=ordered_scan) is ok
@@ -0,0 +1,23 @@
+"""Password hashing pool."""
+
+import asyncio
+
+from app.security import HASHING_START_METHOD, PasswordHasher
+
+
+def test_hashing_workers_are_not_forked_from_the_server():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+
+    async def round_trip() -> tuple[bool, str | None]:
+        hashed = await hasher.hash("TestPass123!")
+        return await hasher.verify("TestPass123!", hashed)
+
+    try:
+        valid, new_hash = asyncio.run(round_trip())
+        start_method = hasher._executor._mp_context.get_start_method()
+    finally:
+        hasher.close()
+
+    assert valid and new_hash is None
+    assert start_method == HASHING_START_METHOD != "fork"
+    assert hasher._executor is None
@@ -0,0 +1,63 @@
+"""Access control of the user administration routes."""
+
+import json
+
+import pytest
+
+from .conftest import auth_headers
+
+
+@pytest.mark.parametrize("path", ["/api/v1/users", "/api/v1/users/export"])
+def test_user_listings_require_a_token_despite_the_demo_fallback(client, users, path):
+    assert client.get(path).status_code == 401
+
+
+@pytest.mark.parametrize("path", ["/api/v1/users", "/api/v1/users/export"])
+def test_user_listings_are_forbidden_to_regular_users(client, users, path):
+    assert client.get(path, headers=auth_headers(client, users["regular"])).status_code == 403
+
+
+def test_user_page_is_served_to_superusers(client, users):
+    response = client.get("/api/v1/users", headers=auth_headers(client, users["admin"]))
+
+    assert response.status_code == 200
+    assert {"agent@example.com", "admin@example.com"} <= {user["email"] for user in response.json()}
+
+
+def test_export_streams_users_to_superusers(client, users):
+    response = client.get("/api/v1/users/export", headers=auth_headers(client, users["admin"]))
+
+    assert response.status_code == 200
+    emails = {json.loads(line)["email"] for line in response.text.splitlines()}
+    assert {"agent@example.com", "admin@example.com"} <= emails
+
+
+def test_deactivate_requires_a_token_despite_the_demo_fallback(client, users):
+    response = client.post(f"/api/v1/users/{users['admin'].id}/deactivate")
+
+    assert response.status_code == 401
+
+
+def test_regular_users_cannot_deactivate_others(client, users):
+    response = client.post(
+        f"/api/v1/users/{users['admin'].id}/deactivate", headers=auth_headers(client, users["regular"])
+    )
+
+    assert response.status_code == 403
+
+
+def test_token_less_requests_never_act_as_a_superuser(client, users):
+    # The demo fallback skips the admin even though it is active.
+    response = client.post(
+        "/api/v1/properties",
+        json={
+            "title": "Studio",
+            "description": "Studio meublé",
+            "price": 100000,
+            "city": "Lomé",
+            "property_type": "apartment",
+        },
+    )
+
+    assert response.status_code == 201, response.text
+    assert response.json()["owner_id"] == users["regular"].id
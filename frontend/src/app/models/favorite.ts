@@ -5,3 +5,8 @@ export interface Favorite {
   created_at: string;
   property: Property;
 }
+
+export interface FavoritePage {
+  items: Favorite[];
+  nextCursor: string | null;
+}
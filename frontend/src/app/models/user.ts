@@ -8,3 +8,9 @@ export interface User {
   created_at: string;
   updated_at: string;
 }
+
+export interface UserToken extends User {
+  access_token: string;
+  token_type: string;
+  expires_in: number;
+}
@@ -1,5 +1,6 @@
 import { Component, OnInit } from '@angular/core';
 import { CommonModule } from '@angular/common';
+import { MatButtonModule } from '@angular/material/button';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 
 import { ApiService } from '../../services/api.service';
@@ -9,12 +10,13 @@ import { PropertyCardComponent } from '../../components/property-card/property-c
 @Component({
   selector: 'app-favorites-page',
   standalone: true,
-  imports: [CommonModule, MatSnackBarModule, PropertyCardComponent],
+  imports: [CommonModule, MatButtonModule, MatSnackBarModule, PropertyCardComponent],
   templateUrl: './favorites-page.component.html',
   styleUrls: ['./favorites-page.component.scss']
 })
 export class FavoritesPageComponent implements OnInit {
   favorites: Favorite[] = [];
+  nextCursor: string | null = null;
 
   constructor(private api: ApiService, private snackBar: MatSnackBar) {}
 
@@ -22,9 +24,12 @@ export class FavoritesPageComponent implements OnInit {
     this.loadFavorites();
   }
 
-  loadFavorites(): void {
-    this.api.listFavorites().subscribe({
-      next: (favorites) => (this.favorites = favorites),
+  loadFavorites(cursor?: string): void {
+    this.api.listFavorites(cursor).subscribe({
+      next: (page) => {
+        this.favorites = cursor ? [...this.favorites, ...page.items] : page.items;
+        this.nextCursor = page.nextCursor;
+      },
       error: () =>
         this.snackBar.open('Impossible de charger vos favoris', 'Fermer', {
           duration: 3000
@@ -32,6 +37,12 @@ export class FavoritesPageComponent implements OnInit {
     });
   }
 
+  loadMore(): void {
+    if (this.nextCursor) {
+      this.loadFavorites(this.nextCursor);
+    }
+  }
+
   removeFavorite(propertyId: number): void {
     this.api.removeFavorite(propertyId).subscribe({
       next: () => {
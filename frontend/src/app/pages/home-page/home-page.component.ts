@@ -34,13 +34,13 @@ export class HomePageComponent {
     private snackBar: MatSnackBar
   ) {
     this.loadProperties();
-    this.loadFavorites();
   }
 
   loadProperties(): void {
     this.api.getProperties(this.filters).subscribe({
       next: (properties) => {
         this.properties = properties;
+        this.loadFavorites();
       },
       error: () => {
         this.snackBar.open('Impossible de charger les propriétés', 'Fermer', {
@@ -51,9 +51,13 @@ export class HomePageComponent {
   }
 
   loadFavorites(): void {
-    this.api.listFavorites().subscribe({
-      next: (favorites) => {
-        this.favorites = new Set(favorites.map((fav) => fav.property.id));
+    if (!this.properties.length) {
+      this.favorites.clear();
+      return;
+    }
+    this.api.lookupFavorites(this.properties.map((property) => property.id)).subscribe({
+      next: (favorited) => {
+        this.favorites = new Set(favorited);
       },
       error: () => {
         this.favorites.clear();
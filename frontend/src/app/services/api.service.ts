@@ -1,17 +1,22 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { map, tap } from 'rxjs/operators';
 
 import { environment } from '../../environments/environment';
 import { Property, PropertyFilters } from '../models/property';
-import { Favorite } from '../models/favorite';
-import { User } from '../models/user';
+import { Favorite, FavoritePage } from '../models/favorite';
+import { User, UserToken } from '../models/user';
+import { AuthService } from './auth.service';
 
 @Injectable({ providedIn: 'root' })
 export class ApiService {
   private readonly baseUrl = environment.apiUrl;
 
-  constructor(private http: HttpClient) {}
+  constructor(
+    private http: HttpClient,
+    private auth: AuthService
+  ) {}
 
   getProperties(filters: PropertyFilters = {}): Observable<Property[]> {
     let params = new HttpParams();
@@ -39,8 +44,22 @@ export class ApiService {
     return this.http.delete<void>(`${this.baseUrl}/properties/${id}`);
   }
 
-  listFavorites(): Observable<Favorite[]> {
-    return this.http.get<Favorite[]>(`${this.baseUrl}/favorites`);
+  listFavorites(cursor?: string): Observable<FavoritePage> {
+    const params = cursor ? new HttpParams().set('cursor', cursor) : undefined;
+    return this.http
+      .get<Favorite[]>(`${this.baseUrl}/favorites`, { params, observe: 'response' })
+      .pipe(
+        map((response) => ({
+          items: response.body ?? [],
+          nextCursor: response.headers.get('X-Next-Cursor')
+        }))
+      );
+  }
+
+  lookupFavorites(propertyIds: number[]): Observable<number[]> {
+    return this.http
+      .post<{ favorited: number[] }>(`${this.baseUrl}/favorites/lookup`, { property_ids: propertyIds })
+      .pipe(map((result) => result.favorited));
   }
 
   addFavorite(propertyId: number): Observable<Favorite> {
@@ -55,7 +74,13 @@ export class ApiService {
     return this.http.post<User>(`${this.baseUrl}/users`, user);
   }
 
-  login(credentials: { email: string; password: string }): Observable<User> {
-    return this.http.post<User>(`${this.baseUrl}/users/login`, credentials);
+  login(credentials: { email: string; password: string }): Observable<UserToken> {
+    return this.http
+      .post<UserToken>(`${this.baseUrl}/users/login`, credentials)
+      .pipe(tap((session) => this.auth.saveToken(session)));
+  }
+
+  logout(): void {
+    this.auth.clearToken();
   }
 }
@@ -0,0 +1,30 @@
+import { Injectable } from '@angular/core';
+import { HttpErrorResponse, HttpEvent, HttpHandler, HttpInterceptor, HttpRequest } from '@angular/common/http';
+import { Observable, throwError } from 'rxjs';
+import { catchError } from 'rxjs/operators';
+
+import { environment } from '../../environments/environment';
+import { AuthService } from './auth.service';
+
+/** Sends the access token from /users/login to the API as a bearer token. */
+@Injectable()
+export class AuthInterceptor implements HttpInterceptor {
+  constructor(private auth: AuthService) {}
+
+  intercept(request: HttpRequest<unknown>, next: HttpHandler): Observable<HttpEvent<unknown>> {
+    const token = this.auth.getToken();
+    if (!token || !request.url.startsWith(environment.apiUrl)) {
+      return next.handle(request);
+    }
+    const authorized = request.clone({ setHeaders: { Authorization: `Bearer ${token}` } });
+    return next.handle(authorized).pipe(
+      catchError((error: HttpErrorResponse) => {
+        // A revoked or expired token must not keep failing every request.
+        if (error.status === 401) {
+          this.auth.clearToken();
+        }
+        return throwError(() => error);
+      })
+    );
+  }
+}
@@ -0,0 +1,38 @@
+import { Injectable } from '@angular/core';
+
+import { UserToken } from '../models/user';
+
+const STORAGE_KEY = 'smartimmo.accessToken';
+
+interface StoredToken {
+  token: string;
+  expiresAt: number;
+}
+
+@Injectable({ providedIn: 'root' })
+export class AuthService {
+  saveToken(session: UserToken): void {
+    const stored: StoredToken = {
+      token: session.access_token,
+      expiresAt: Date.now() + session.expires_in * 1000
+    };
+    localStorage.setItem(STORAGE_KEY, JSON.stringify(stored));
+  }
+
+  getToken(): string | null {
+    const raw = localStorage.getItem(STORAGE_KEY);
+    if (!raw) {
+      return null;
+    }
+    const stored = JSON.parse(raw) as StoredToken;
+    if (stored.expiresAt <= Date.now()) {
+      this.clearToken();
+      return null;
+    }
+    return stored.token;
+  }
+
+  clearToken(): void {
+    localStorage.removeItem(STORAGE_KEY);
+  }
+}